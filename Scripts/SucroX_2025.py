@@ -1,16 +1,20 @@
-import os, sys, csv, json, datetime
+import os, sys, csv, datetime, threading
 from pathlib import Path
-from collections import defaultdict
+import numpy as np
 import pandas as pd
 
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import Qt, QUrl, QFileSystemWatcher, QEvent
+from PyQt5.QtCore import (
+    Qt, QUrl, QFileSystemWatcher, QEvent, QAbstractTableModel, QAbstractProxyModel,
+    QModelIndex, QObject, QThread, pyqtSignal
+)
 from PyQt5.QtGui import QFont, QIcon, QColor
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QGridLayout, QTableWidget, QTableWidgetItem,
+    QLabel, QPushButton, QGridLayout, QTableWidget, QTableWidgetItem, QTableView,
     QFileDialog, QCheckBox, QMessageBox, QButtonGroup, QListWidget,
-    QListWidgetItem, QDialog, QComboBox, QLineEdit, QScrollArea, QStyledItemDelegate
+    QListWidgetItem, QDialog, QComboBox, QLineEdit, QScrollArea, QStyledItemDelegate, QCompleter,
+    QProgressBar
 )
 from PyQt5.QtGui import QDesktopServices
 
@@ -42,132 +46,58 @@ julian_date = date.toordinal() - datetime.date(date.year, 1, 1).toordinal() + 1
 SCRIPT_PATH = Path(__file__).resolve()
 PARENT_DIR = SCRIPT_PATH.parent.parent  # parent.parent per your requirement
 os.chdir(str(PARENT_DIR))
-
-GROUPS_PATH = PARENT_DIR / "column_groups.json"
-PATHS_PATH  = PARENT_DIR / "paths.json"
-RULES_PATH  = PARENT_DIR / "rules.json"
-
-GROUPS_DEFAULT = {}
-PATHS_DEFAULT = {
-    "photoperiod": str(PARENT_DIR / "Photoperiod_Pos_2025.csv"),
-    "crossingdataset": str(PARENT_DIR / "ZT_CrossingDataset.csv"),
-    "gv": str(PARENT_DIR / "ZT_GVs_1.4.csv"),
-    "amat": str(PARENT_DIR / "AMAT_25.csv"),
-}
-RULES_DEFAULT = {
-    "females_per_male": 1,
-    "males_per_female": 1,
-    "hidden_columns": [],
-    "highlight_rules": [],
-    "display_names": {},
-    "column_order": []   # NEW: preferred order of original CSV headers
-}
+sys.path.insert(0, str(PARENT_DIR))
+
+# Pipeline + config helpers live in the Qt-free engine (shared with `python -m sucrox`)
+from sucrox import engine
+from sucrox.photoperiod import PhotoperiodIndex
+from sucrox.highlight import RuleSet, TypedColumn
+from sucrox.pairs import parquet_available
+from sucrox.engine import (
+    GROUPS_PATH, PATHS_PATH, RULES_PATH, ensure_dirs, config_store, get_paths, save_paths,
+    get_rules, save_rules, load_groups, save_groups, reorder_headers,
+)
 
 # -------------------- util functions --------------------
-def ensure_dirs():
-    for rel in ["tassle_survey_data", "Tassles", "Combinations",
-                "Crosses for the day", "Photoperiod_Pos", "CrossingDataset"]:
-        (PARENT_DIR / rel).mkdir(parents=True, exist_ok=True)
-
-def read_json(path, default):
-    try:
-        if path.exists():
-            return json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        pass
-    return json.loads(json.dumps(default))
-
-def write_json(path, data):
-    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
-
-def get_paths():
-    paths = read_json(PATHS_PATH, PATHS_DEFAULT)
-    def _first_existing(cands):
-        for c in cands:
-            if not c:
-                continue
-            p = Path(c)
-            if p.exists():
-                return str(p)
-        return cands[0] if cands else ""
-    paths["photoperiod"] = _first_existing([
-        paths.get("photoperiod",""), str(PARENT_DIR / "Photoperiod_Pos_2025.csv"),
-        str(PARENT_DIR / "Photoperiod_Pos" / "Photoperiod_Pos_2025.csv")
-    ])
-    paths["crossingdataset"] = _first_existing([
-        paths.get("crossingdataset",""), str(PARENT_DIR / "ZT_CrossingDataset.csv"),
-        str(PARENT_DIR / "CrossingDataset" / "ZT_CrossingDataset.csv")
-    ])
-    paths["gv"] = _first_existing([paths.get("gv",""), str(PARENT_DIR / "ZT_GVs_1.4.csv")])
-    paths["amat"] = _first_existing([paths.get("amat",""), str(PARENT_DIR / "AMAT_25.csv")])
-    write_json(PATHS_PATH, paths)
-    return paths
-
-def get_rules():
-    return read_json(RULES_PATH, RULES_DEFAULT)
-
-def save_rules(d):
-    write_json(RULES_PATH, d)
-
 def julian_csv(prefix):
-    mapping = {
-        "tassel_survey_data": PARENT_DIR / "tassle_survey_data" / f"tassel_survey_data_{julian_date}.csv",
-        "tassles": PARENT_DIR / "Tassles" / f"Tassles_{julian_date}.csv",
-        "combinations": PARENT_DIR / "Combinations" / f"Combinations_{julian_date}.csv",
-        "possible_crossings": PARENT_DIR / "Crosses for the day" / f"Possible_crossings_{julian_date}.csv",
-        "allocated": PARENT_DIR / "Crosses for the day" / f"allocated_{julian_date}.csv",
-    }
-    return mapping[prefix]
-
-def load_groups():
-    if GROUPS_PATH.exists():
-        try:
-            return json.loads(GROUPS_PATH.read_text(encoding="utf-8"))
-        except Exception:
-            pass
-    return GROUPS_DEFAULT.copy()
-
-def save_groups(groups):
-    write_json(GROUPS_PATH, groups)
-
-def build_key_maps(pp_path: Path):
-    """Map between NUMVAR, AVARIETY, STDVARIETY using Photoperiod_Pos_2025."""
-    maps = {
-        "AV_to_STD": {},
-        "AV_to_NUM": {},
-        "STD_to_NUM": {},
-        "NUM_to_STD": {},
-        "NUM_to_AV": {},
-    }
-    if not pp_path or not pp_path.exists():
-        return maps
-    df = pd.read_csv(pp_path, dtype=str).fillna("")
-    cols = {c.upper().strip(): c for c in df.columns}
-    a = cols.get("AVARIETY"); s = cols.get("STDVARIETY"); n = cols.get("NUMVAR")
-    if not (a and s and n):
-        return maps
-    for av, sd, num in zip(df[a].astype(str), df[s].astype(str), df[n].astype(str)):
-        av = av.strip(); sd = sd.strip(); num = num.strip()
-        if not av and not sd and not num:
-            continue
-        if av and sd: maps["AV_to_STD"][av] = sd
-        if av and num: maps["AV_to_NUM"][av] = num
-        if sd and num: maps["STD_to_NUM"][sd] = num
-        if num and sd: maps["NUM_to_STD"][num] = sd
-        if num and av: maps["NUM_to_AV"][num] = av
-    return maps
-
-def safe_upper_strip(s):
-    return str(s or "").strip().upper()
-
-def reorder_headers(csv_headers, preferred_order):
-    """Return csv_headers reordered by preferred_order (unknown headers appended)."""
-    pref = [h for h in (preferred_order or []) if h in csv_headers]
-    rest = [h for h in csv_headers if h not in pref]
-    return pref + rest
-
-# -------------------- Single-click check delegate --------------------
-class SingleClickCheckDelegate(QStyledItemDelegate):
+    return engine.julian_csv(prefix, julian_date, PARENT_DIR)
+
+# -------------------- Config notifications --------------------
+class ConfigRelay(QObject):
+    """A config store's notifications as a Qt signal.
+
+    The store calls subscribers on whichever thread noticed the change (e.g. a
+    worker's get_rules()); slots of GUI objects connected here run on the GUI thread.
+    """
+    changed = pyqtSignal(str, object)   # config name, new data
+
+_relays = {}   # store folder -> ConfigRelay
+
+def config_changed():
+    """changed(name, data) signal of the data folder's config store; create on the GUI thread."""
+    store = config_store()
+    if store.base not in _relays:
+        _relays[store.base] = ConfigRelay()
+        store.subscribe(_relays[store.base].changed.emit)
+    return _relays[store.base].changed
+
+# -------------------- Delegates --------------------
+ROW_COLOR_ROLE = Qt.UserRole + 1
+
+class RowColorDelegate(QStyledItemDelegate):
+    """Paints the row's highlight color (ROW_COLOR_ROLE) under the cell."""
+    _colors = {}
+
+    def paint(self, painter, option, index):
+        color = index.data(ROW_COLOR_ROLE)
+        if color:
+            q = self._colors.get(color)
+            if q is None:
+                q = self._colors[color] = QColor(color)
+            painter.fillRect(option.rect, q)
+        super().paint(painter, option, index)
+
+class SingleClickCheckDelegate(RowColorDelegate):
     """Toggle a checkable item when you click anywhere in the cell."""
     def editorEvent(self, event, model, option, index):
         if not (index.flags() & Qt.ItemIsUserCheckable):
@@ -178,11 +108,358 @@ class SingleClickCheckDelegate(QStyledItemDelegate):
             return True
         return super().editorEvent(event, model, option, index)
 
+# -------------------- Table model (columnar) --------------------
+class CrossingsModel(QAbstractTableModel):
+    """Read-only table over one object array per column, with an optional Export checkbox column.
+
+    Only cells the view asks for are materialized, so load time and memory do
+    not depend on how many widgets a large day would need.
+    """
+    checkToggled = pyqtSignal(int, bool)   # source row, checked
+
+    def __init__(self, checkable=True, parent=None):
+        super().__init__(parent)
+        self.checkable = checkable
+        self.labels = []                   # header labels (without Export)
+        self.columns = []                  # object arrays, one per displayed data column
+        self.checked = np.zeros(0, dtype=bool)
+        self.row_colors = np.empty(0, dtype=object)   # highlight color string or None per row
+        self._n = 0
+
+    def set_table(self, labels, columns):
+        self.beginResetModel()
+        self.labels = list(labels)
+        self.columns = list(columns)
+        self._n = len(self.columns[0]) if self.columns else 0
+        self.checked = np.zeros(self._n, dtype=bool)
+        self.row_colors = np.full(self._n, None, dtype=object)
+        self.endResetModel()
+
+    def clear(self):
+        self.set_table([], [])
+
+    @property
+    def offset(self):
+        return 1 if self.checkable else 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._n
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns) + (self.offset if self.columns else 0)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r, c = index.row(), index.column() - self.offset
+        if role == ROW_COLOR_ROLE:
+            return self.row_colors[r]
+        if c < 0:
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if self.checked[r] else Qt.Unchecked
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.columns[c][r]
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not self.checkable or index.column() != 0:
+            return False
+        r = index.row()
+        on = value == Qt.Checked
+        if bool(self.checked[r]) != on:
+            self.checked[r] = on
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+            self.checkToggled.emit(r, on)
+        return True
+
+    def set_checked(self, rows, on):
+        """Bulk check/uncheck (no checkToggled signals)."""
+        self.checked[np.asarray(rows, dtype=int)] = on
+        if self._n:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._n - 1, 0), [Qt.CheckStateRole])
+
+    def set_row_colors(self, colors):
+        """Replace the per-row colors; repaint only runs of rows whose color changed."""
+        changed = np.flatnonzero(self.row_colors != colors) if len(colors) == self._n else np.arange(self._n)
+        self.row_colors = colors
+        if not len(changed):
+            return
+        last = self.columnCount() - 1
+        breaks = np.flatnonzero(np.diff(changed) > 1)
+        for a, b in zip(np.r_[0, breaks + 1], np.r_[breaks, len(changed) - 1]):
+            self.dataChanged.emit(self.index(int(changed[a]), 0), self.index(int(changed[b]), last), [ROW_COLOR_ROLE])
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if self.checkable and index.column() == 0:
+            return Qt.ItemIsUserCheckable | Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Vertical:
+            return str(section + 1)
+        if self.checkable:
+            return "Export" if section == 0 else self.labels[section - 1]
+        return self.labels[section]
+
+    def set_labels(self, labels):
+        self.labels = list(labels)
+        if self.columns:
+            self.headerDataChanged.emit(Qt.Horizontal, 0, self.columnCount() - 1)
+
+    def column(self, display_col):
+        """Object array behind a displayed column (Export column -> None)."""
+        c = display_col - self.offset
+        return self.columns[c] if 0 <= c < len(self.columns) else None
+
+class RowMapProxy(QAbstractProxyModel):
+    """Sort/filter proxy whose row mapping is a NumPy permutation.
+
+    Sorting is a stable argsort over the column array (applied to the current
+    order, like repeated QTableWidget.sortItems calls) and filtering is a
+    boolean mask, so neither calls back into Python per row.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._order = np.zeros(0, dtype=int)   # all source rows, in sort order
+        self._mask = None                      # bool per source row, or None (all visible)
+        self._rows = np.zeros(0, dtype=int)    # proxy row -> source row
+        self._inv = np.zeros(0, dtype=int)     # source row -> proxy row (-1 when filtered out)
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._on_source_reset)
+        model.dataChanged.connect(self._on_source_data_changed)
+        model.headerDataChanged.connect(self.headerDataChanged)
+        self._on_source_reset()
+
+    def _on_source_reset(self):
+        self._order = np.arange(self.sourceModel().rowCount(), dtype=int)
+        self._mask = None
+        self._apply()
+        self.endResetModel()
+
+    def _apply(self):
+        self._rows = self._order if self._mask is None else self._order[self._mask[self._order]]
+        self._inv = np.full(len(self._order), -1, dtype=int)
+        self._inv[self._rows] = np.arange(len(self._rows))
+
+    def _relayout(self):
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        src = [(self.mapToSource(i).row(), i.column()) for i in old]
+        self._apply()
+        new = [self.index(int(self._inv[r]), c) if r >= 0 and self._inv[r] >= 0 else QModelIndex()
+               for r, c in src]
+        self.changePersistentIndexList(old, new)
+        self.layoutChanged.emit()
+
+    def set_mask(self, mask):
+        """Show only source rows where mask is True (None shows everything)."""
+        self._mask = None if mask is None else np.asarray(mask, dtype=bool)
+        self._relayout()
+
+    def update_mask(self, rows, visible):
+        """Set visibility of some source rows; re-layouts only when one of them flips."""
+        if self._mask is None:
+            self._mask = np.ones(len(self._order), dtype=bool)
+        rows = np.asarray(rows, dtype=int)
+        visible = np.asarray(visible, dtype=bool)
+        if np.array_equal(self._mask[rows], visible):
+            return
+        self._mask[rows] = visible
+        self._relayout()
+
+    def is_visible(self, source_row):
+        return self._inv[source_row] >= 0
+
+    def source_order(self):
+        """Every source row in the current sort order (including filtered-out rows)."""
+        return self._order
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        src = self.sourceModel()
+        vals = src.column(column)
+        if vals is None:
+            vals = src.checked if column == 0 and src.checkable else None
+        if vals is None:
+            return
+        keys = pd.Series(vals[self._order])
+        self._order = self._order[keys.sort_values(ascending=order == Qt.AscendingOrder, kind="stable").index.to_numpy()]
+        self._relayout()
+
+    def _on_source_data_changed(self, tl, br, roles=()):
+        if tl.row() == br.row():
+            r = self._inv[tl.row()] if tl.row() < len(self._inv) else -1
+            if r >= 0:
+                self.dataChanged.emit(self.index(int(r), tl.column()), self.index(int(r), br.column()), roles)
+        else:
+            rows = self._inv[tl.row():br.row() + 1]
+            rows = rows[rows >= 0]
+            if len(rows):
+                self.dataChanged.emit(self.index(int(rows.min()), tl.column()),
+                                      self.index(int(rows.max()), br.column()), roles)
+
+    # ---- QAbstractProxyModel plumbing ----
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self._rows)) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.sourceModel() is None else self.sourceModel().columnCount()
+
+    def mapToSource(self, index):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return QModelIndex()
+        return self.sourceModel().index(int(self._rows[index.row()]), index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid() or index.row() >= len(self._inv) or self._inv[index.row()] < 0:
+            return QModelIndex()
+        return self.createIndex(int(self._inv[index.row()]), index.column())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Vertical:
+            return str(section + 1) if role == Qt.DisplayRole else None
+        return self.sourceModel().headerData(section, orientation, role)
+
+# -------------------- Background tasks --------------------
+class Worker(QThread):
+    """Runs fn(progress) off the GUI thread; the result comes back in a single `done` signal."""
+    progressed = pyqtSignal(str, object)   # stage label, fraction (None: unknown)
+    done = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    cancelled = pyqtSignal()
+
+    def __init__(self, fn, parent=None):
+        super().__init__(parent)
+        self.fn = fn
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _progress(self, label, fraction=None):
+        if self._cancel.is_set():
+            raise engine.Cancelled()
+        self.progressed.emit(label, fraction)
+
+    def run(self):
+        try:
+            result = self.fn(self._progress)
+        except engine.Cancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(e)
+        else:
+            self.done.emit(result)
+
+class TaskBar(QWidget):
+    """Progress bar, stage label and Cancel button for a tab's background tasks.
+
+    One task runs at a time; a new task with the key of the running one cancels
+    it and takes its place, other keys wait their turn. `buttons` are disabled
+    while anything runs. Results are handed to on_done on the GUI thread.
+    """
+    def __init__(self, buttons=(), parent=None):
+        super().__init__(parent)
+        self.buttons = list(buttons)
+        self.worker = None
+        self.key = None
+        self.queue = []    # [(key, fn, on_done, label)]
+        lay = QHBoxLayout(self)
+        lay.setContentsMargins(0, 0, 0, 0)
+        self.label = QLabel("")
+        self.bar = QProgressBar()
+        self.bar.setRange(0, 1000)
+        self.bar.setTextVisible(False)
+        self.btn_cancel = QPushButton("Cancel")
+        self.btn_cancel.clicked.connect(self.cancel)
+        lay.addWidget(self.label, 2); lay.addWidget(self.bar, 3); lay.addWidget(self.btn_cancel)
+        self.hide()
+
+    def busy(self):
+        return self.worker is not None
+
+    def run(self, key, fn, on_done, label="Working…"):
+        """Run fn(progress) in a Worker and call on_done(result) when it finished."""
+        self.queue = [t for t in self.queue if t[0] != key] + [(key, fn, on_done, label)]
+        if self.worker is None:
+            self._next()
+        elif self.key == key:
+            self.worker.cancel()
+
+    def cancel(self):
+        self.queue = []
+        if self.worker is not None:
+            self.worker.cancel()
+            self.btn_cancel.setEnabled(False)
+            self.label.setText("Cancelling…")
+
+    def stop(self):
+        """Cancel everything and wait for the running task (e.g. on close)."""
+        self.cancel()
+        if self.worker is not None:
+            self.worker.wait()
+
+    def _next(self):
+        if not self.queue:
+            self.hide()
+            for b in self.buttons:
+                b.setEnabled(True)
+            return
+        self.key, fn, on_done, label = self.queue.pop(0)
+        for b in self.buttons:
+            b.setEnabled(False)
+        self._on_progress(label, None)
+        self.btn_cancel.setEnabled(True)
+        self.show()
+        w = self.worker = Worker(fn, self)
+        w.progressed.connect(self._on_progress)
+        w.done.connect(lambda result: self._finish(w, on_done, result))
+        w.failed.connect(lambda e: self._finish(w, self._on_failed, e))
+        w.cancelled.connect(lambda: self._finish(w, None, None))
+        w.start()
+
+    def _on_progress(self, label, fraction):
+        self.label.setText(label)
+        if fraction is None:
+            self.bar.setRange(0, 0)   # busy indicator
+        else:
+            self.bar.setRange(0, 1000)
+            self.bar.setValue(int(1000 * fraction))
+
+    def _finish(self, worker, callback, value):
+        worker.wait()
+        worker.deleteLater()
+        self.worker = self.key = None
+        try:
+            if callback is not None:
+                callback(value)
+        finally:
+            self._next()
+
+    def _on_failed(self, e):
+        QMessageBox.critical(self, "Error", f"{type(e).__name__}: {e}")
+
 # -------------------- Tassel Survey Tab --------------------
 class TasselSurveyTab(QWidget):
-    def __init__(self, switch_to_matrix_callback=None, parent=None):
+    def __init__(self, switch_to_matrix_callback=None, matched_callback=None, parent=None):
         super().__init__(parent)
         self.switch_to_matrix_callback = switch_to_matrix_callback
+        self.matched_callback = matched_callback   # called after Match Crossings rewrote the day's crosses
         self.setFont(APP_FONT)
         self.setStyleSheet(f"""
             QWidget {{ background: {BG}; }}
@@ -217,6 +494,8 @@ class TasselSurveyTab(QWidget):
 
         ensure_dirs()
         self.paths = get_paths()
+        self.pp_index = PhotoperiodIndex(self.paths.get("photoperiod"),
+                                         registry=lambda path: engine.variety_registry(path, PARENT_DIR))
 
         root = QVBoxLayout(self)
 
@@ -309,6 +588,19 @@ class TasselSurveyTab(QWidget):
         grid_card.setStyleSheet(f"background:{CARD}; border:1px solid {BORDER}; border-radius:12px; padding:12px;")
         root.addWidget(grid_card)
 
+        # Find a variety's can(s) by name prefix
+        find_row = QHBoxLayout()
+        lab = QLabel("Find variety:"); lab.setStyleSheet("font-weight:600;")
+        find_row.addWidget(lab)
+        self.find_edit = QLineEdit(); self.find_edit.setPlaceholderText("AVARIETY or STDVARIETY prefix")
+        self.find_completer = QCompleter([], self.find_edit)
+        self.find_completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.find_edit.setCompleter(self.find_completer)
+        find_row.addWidget(self.find_edit, 1)
+        self.find_result = QLabel("")
+        find_row.addWidget(self.find_result, 2)
+        root.addLayout(find_row)
+
         # Buttons
         btns = QHBoxLayout()
         self.btn_submit = QPushButton("Submit")
@@ -326,6 +618,10 @@ class TasselSurveyTab(QWidget):
 
         self.status = QLabel("")
         root.addWidget(self.status)
+        self.tasks = TaskBar([self.btn_submit, self.btn_generate, self.btn_match])
+        root.addWidget(self.tasks)
+        self._spec_worker = None      # the one background speculation (engine.speculate_match)
+        self._spec_pending = False    # entries submitted while it ran: run once more afterwards
 
         # Badges for today's entries by sex
         badges = QHBoxLayout()
@@ -345,6 +641,15 @@ class TasselSurveyTab(QWidget):
         self.btn_submit.clicked.connect(self.submit_entry)
         self.btn_generate.clicked.connect(self.generate_combos)
         self.btn_match.clicked.connect(self.match_crossings)
+        self.find_edit.textEdited.connect(self._on_find_edited)
+        self.find_edit.returnPressed.connect(self._on_find_chosen)
+        self.find_completer.activated.connect(self._on_find_chosen)
+
+        # Follow the Photoperiod file itself, and paths.json via the config store
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_source_changed)
+        self._watch_sources()
+        config_changed().connect(self._on_config_changed)
 
         self.update_preview()
         self._refresh_entry_counts()
@@ -353,6 +658,44 @@ class TasselSurveyTab(QWidget):
         if callable(self.switch_to_matrix_callback):
             self.switch_to_matrix_callback()
 
+    def _watch_sources(self):
+        # re-add after every change: editors/atomic writes replace the file
+        if self._watcher.files():
+            self._watcher.removePaths(self._watcher.files())
+        p = self.paths.get("photoperiod", "")
+        if p and Path(p).exists():
+            self._watcher.addPath(p)
+
+    def _on_source_changed(self, _path):
+        self.pp_index.refresh(force=True)
+        self._watch_sources()
+        self.update_preview()
+
+    def _on_config_changed(self, name, data):
+        if name != "paths":
+            return
+        self.paths = data
+        self.pp_index.set_path(self.paths.get("photoperiod"))
+        self._watch_sources()
+        self.update_preview()
+
+    def _on_find_edited(self, text):
+        self.find_completer.model().setStringList(self.pp_index.search(text))
+
+    def _on_find_chosen(self, text=None):
+        name = (text or self.find_edit.text()).strip()
+        locs = self.pp_index.locations(name)
+        if not locs:
+            self.find_result.setText("Not in Photoperiod file")
+            return
+        self.find_result.setText("  •  ".join(f"Bay {b} {c} Can {n}" for b, c, n in locs))
+        bay, cart, can = locs[0]
+        for group, val in [(self.bay_group, bay), (self.cart_group, cart), (self.bucket_group, can)]:
+            for b in group.buttons():
+                if b.text() == val:
+                    b.setChecked(True)
+        self.update_preview()
+
     def _refresh_entry_counts(self):
         total = male = female = 0
         try:
@@ -379,22 +722,9 @@ class TasselSurveyTab(QWidget):
         return bay, cart, bucket, tas, pollen
 
     def lookup_variety(self, bay, cart, can):
-        pp = Path(get_paths()["photoperiod"])
-        if not pp or not pp.exists():
-            return ("No file","No file")
-        with open(pp, newline="", encoding="utf-8") as f:
-            for row in csv.DictReader(f):
-                if str(row.get("BAY")).strip()==str(bay) and str(row.get("CART")).strip()==str(cart) and str(row.get("CAN")).strip()==str(can):
-                    av=row.get("AVARIETY") or row.get("avariety") or ""
-                    std=row.get("STDVARIETY") or av
-                    return str(av).strip(), str(std).strip()
-        return ("No match","No match")
+        return self.pp_index.lookup(bay, cart, can)
 
-    @staticmethod
-    def pollen_to_sex(p):
-        if 1<=p<=4: return "male"
-        if 5<=p<=10: return "female"
-        return "unknown"
+    pollen_to_sex = staticmethod(engine.pollen_to_sex)
 
     def update_preview(self):
         bay, cart, can, tas, pollen = self._current()
@@ -414,172 +744,57 @@ class TasselSurveyTab(QWidget):
         self.status.setText(f"Saved {av}/{std} • Bay {bay} {cart} Can {can} • #Tas {tas} • Pollen {pollen} ({sex})")
         self._refresh_entry_counts()
         self.update_preview()
+        # enrich the new pairs now, so Match Crossings only has to write them
+        self._speculate()
+
+    def _speculate(self):
+        """One speculation at a time; entries made while it runs fold into a single rerun."""
+        if self._spec_worker is not None:
+            self._spec_pending = True
+            return
+        self._spec_pending = False
+        w = self._spec_worker = Worker(lambda progress: engine.speculate_match(julian_date, PARENT_DIR, progress), self)
+        w.failed.connect(lambda e: self.status.setText(
+            f"{self.status.text()} | Background enrichment failed: {type(e).__name__}: {e}"))
+        w.finished.connect(self._speculated)
+        w.start()
+
+    def _speculated(self):
+        self._spec_worker.deleteLater()
+        self._spec_worker = None
+        if self._spec_pending:
+            self._speculate()
+
+    def stop_speculation(self, wait=False):
+        """Cancel the background speculation and any rerun queued behind it."""
+        self._spec_pending = False
+        if self._spec_worker is not None:
+            self._spec_worker.cancel()
+            if wait:
+                self._spec_worker.wait()
 
     def generate_combos(self):
         ensure_dirs()
-        in_file = julian_csv("tassel_survey_data")
-        if not in_file.exists():
+        if not julian_csv("tassel_survey_data").exists():
             QMessageBox.warning(self,"Missing data","No tassel survey CSV for today yet.")
             return
-
-        data = list(csv.DictReader(open(in_file, newline="", encoding="utf-8")))
-        male_avar, female_avar = defaultdict(int), defaultdict(int)
-
-        kmap = build_key_maps(Path(get_paths()["photoperiod"]))
-        av_to_std = kmap["AV_to_STD"]; av_to_num = kmap["AV_to_NUM"]
-
-        for row in data:
-            avar = (row.get("AVARIETY", "") or "").strip()
-            sex = (row.get("Sex", "") or "").lower()
-            try:
-                tas = int(row.get("#Tas", "0"))
-            except Exception:
-                tas = 0
-
-            if sex == "female":
-                female_avar[avar] += tas
-            elif sex == "male":
-                male_avar[avar] += tas
-
-        combos = []
-        for f_av in female_avar.keys():
-            for m_av in male_avar.keys():
-                f_std = av_to_std.get(f_av, f_av)
-                m_std = av_to_std.get(m_av, m_av)
-                f_num = av_to_num.get(f_av, f_av)
-                m_num = av_to_num.get(m_av, m_av)
-                combos.append((f_av, m_av, f_std, m_std, f_num, m_num))
-
-        df = pd.DataFrame(combos, columns=["FEMALE_AVAR", "MALE_AVAR", "FEMALE_STD", "MALE_STD", "FEMALE_NUMVAR", "MALE_NUMVAR"]).drop_duplicates()
-        df.to_csv(julian_csv("combinations"), index=False)
-
-        # Totals by STD
-        female_std = defaultdict(int); male_std = defaultdict(int)
-        for av, cnt in female_avar.items():
-            female_std[av_to_std.get(av, av)] += cnt
-        for av, cnt in male_avar.items():
-            male_std[av_to_std.get(av, av)] += cnt
-        all_std = set(list(male_std.keys()) + list(female_std.keys()))
-        tassles_df = pd.DataFrame({
-            "STDVARIETY": list(all_std),
-            "MALE TASSLES": [male_std.get(v, 0) for v in all_std],
-            "FEMALE TASSLES": [female_std.get(v, 0) for v in all_std],
-        })
-        tassles_df.to_csv(julian_csv("tassles"), index=False)
-        self.status.setText("Generated combinations and tassel totals.")
+        combos, _ = engine.generate_combos(julian_date, PARENT_DIR)
+        self.status.setText(f"Generated combinations and tassel totals. | Cache: {combos.attrs.get('cache', 'off')}")
 
     def match_crossings(self):
         ensure_dirs()
-        combos_path = julian_csv("combinations")
-        if not combos_path.exists():
+        if not julian_csv("combinations").exists():
             QMessageBox.warning(self,"Missing combos","Generate combinations first.")
             return
-
-        combos = pd.read_csv(combos_path, dtype=str).fillna("")
-        combos.columns = [safe_upper_strip(c) for c in combos.columns]
-        for c in ["FEMALE_AVAR","MALE_AVAR","FEMALE_STD","MALE_STD","FEMALE_NUMVAR","MALE_NUMVAR"]:
-            if c not in combos.columns: combos[c] = ""
-            combos[c] = combos[c].astype(str).str.strip()
-        out_df = combos.copy()
-
-        # GV traits by NUMVAR (GV.VARIETY)
-        gv_attached = False
-        gv_path = Path(get_paths()["gv"])
-        if gv_path.exists():
-            try:
-                gv = pd.read_csv(gv_path, dtype=str).fillna("")
-                gv.columns = [safe_upper_strip(c) for c in gv.columns]
-                if "VARIETY" in gv.columns:
-                    gf = gv.rename(columns={"VARIETY": "JOIN_KEY"}).copy()
-                    out_df = out_df.merge(gf, left_on="FEMALE_NUMVAR", right_on="JOIN_KEY", how="left")
-                    f_cols = [c for c in gf.columns if c != "JOIN_KEY"]
-                    out_df.rename(columns={c: f"FEMALE_{c}" for c in f_cols}, inplace=True)
-                    out_df.drop(columns=["JOIN_KEY"], inplace=True, errors="ignore")
-
-                    gm = gv.rename(columns={"VARIETY": "JOIN_KEY"}).copy()
-                    out_df = out_df.merge(gm, left_on="MALE_NUMVAR", right_on="JOIN_KEY", how="left")
-                    m_cols = [c for c in gm.columns if c != "JOIN_KEY"]
-                    out_df.rename(columns={c: f"MALE_{c}" for c in m_cols}, inplace=True)
-                    out_df.drop(columns=["JOIN_KEY"], inplace=True, errors="ignore")
-                    gv_attached = True
-            except Exception:
-                pass
-
-        # Per-parent CrossingDataset traits (female excludes ^M; male excludes ^F)
-        cd_attached = False
-        cd_path = Path(get_paths()["crossingdataset"])
-        if cd_path.exists():
-            try:
-                cdf = pd.read_csv(cd_path, dtype=str).fillna("")
-                cdf.columns = [safe_upper_strip(c) for c in cdf.columns]
-                has_f = "FVARIETY" in cdf.columns
-                has_m = "MVARIETY" in cdf.columns
-
-                if has_f:
-                    fem_cols = [c for c in cdf.columns if not c.startswith("M")]
-                    fem_tbl = cdf[fem_cols].copy().groupby("FVARIETY", as_index=False).first()
-                    rename_f = {c: (f"FEMALE_CD_{c}" if c != "FVARIETY" else c) for c in fem_tbl.columns}
-                    fem_tbl.rename(columns=rename_f, inplace=True)
-                    out_df = out_df.merge(fem_tbl, left_on="FEMALE_NUMVAR", right_on="FVARIETY", how="left")
-
-                if has_m:
-                    mal_cols = [c for c in cdf.columns if not c.startswith("F")]
-                    mal_tbl = cdf[mal_cols].copy().groupby("MVARIETY", as_index=False).first()
-                    rename_m = {c: (f"MALE_CD_{c}" if c != "MVARIETY" else c) for c in mal_tbl.columns}
-                    mal_tbl.rename(columns=rename_m, inplace=True)
-                    out_df = out_df.merge(mal_tbl, left_on="MALE_NUMVAR", right_on="MVARIETY", how="left")
-
-                cd_attached = has_f or has_m
-            except Exception:
-                pass
-
-        # % of GV baseline 2001299
-        if gv_attached:
-            try:
-                gv_raw = pd.read_csv(gv_path, dtype=str).fillna("")
-                gv_raw.columns = [safe_upper_strip(c) for c in gv_raw.columns]
-                base_rows = gv_raw[gv_raw["VARIETY"].astype(str).str.strip() == "2001299"]
-                if not base_rows.empty:
-                    base = base_rows.iloc[0]
-                    trait_cols = [c for c in gv_raw.columns if c != "VARIETY"]
-                    for c in trait_cols:
-                        b = pd.to_numeric(pd.Series([base.get(c)]*len(out_df)), errors="coerce")
-                        fv = pd.to_numeric(out_df.get(f"FEMALE_{c}", pd.Series([], dtype=float)), errors="coerce")
-                        mv = pd.to_numeric(out_df.get(f"MALE_{c}", pd.Series([], dtype=float)), errors="coerce")
-                        out_df[f"FEMALE_{c}_PCT_2001299"] = (fv / b * 100.0).round(3)
-                        out_df[f"MALE_{c}_PCT_2001299"]   = (mv / b * 100.0).round(3)
-            except Exception:
-                pass
-
-        # Kinship via STD intersection
-        kin_attached = False
-        amat_path = Path(get_paths()["amat"])
-        if amat_path.exists():
-            try:
-                amx = pd.read_csv(amat_path, index_col=0, dtype=str)
-                amx.index = amx.index.astype(str).str.strip()
-                amx.columns = amx.columns.astype(str).str.strip()
-                vals = []
-                for _, r in out_df.iterrows():
-                    fstd = str(r.get("FEMALE_STD","")).strip()
-                    mstd = str(r.get("MALE_STD","")).strip()
-                    v = ""
-                    if fstd in amx.index and mstd in amx.columns:
-                        v = amx.loc[fstd, mstd]
-                    elif mstd in amx.index and fstd in amx.columns:
-                        v = amx.loc[mstd, fstd]
-                    vals.append(v)
-                out_df["KINSHIP"] = vals
-                kin_attached = True
-            except Exception:
-                pass
-
-        out_path = julian_csv("possible_crossings")
-        out_df.to_csv(out_path, index=False, encoding="utf-8")
-        self.status.setText(
-            f"Saved {len(out_df)} rows → {out_path.name} | GV:{'Y' if gv_attached else 'N'} "
-            f"| Per-parent CD:{'Y' if cd_attached else 'N'} | Kinship:{'Y' if kin_attached else 'N'}"
-        )
+        self.stop_speculation()   # the match does this work itself
+        self.tasks.run("match", lambda progress: engine.match_crossings(julian_date, PARENT_DIR, progress),
+                       self._matched, "Matching crossings…")
+
+    def _matched(self, result):
+        out_df, attached = result
+        self.status.setText(engine.match_status(out_df, attached, julian_csv("possible_crossings")))
+        if callable(self.matched_callback):
+            self.matched_callback()
         self.open_matrix_tab()
 
 # -------------------- Group Config Dialog --------------------
@@ -668,8 +883,8 @@ class MatrixTab(QWidget):
             }}
             QPushButton:hover {{ background: {BTN_HOVER}; }}
             QHeaderView::section {{ background: {HEADER}; padding: 6px; border: none; }}
-            QTableWidget::item {{ padding: 6px; }}
-            QTableWidget {{ background: {CARD}; border: 1px solid {BORDER}; gridline-color:{BORDER}; }}
+            QTableView::item {{ padding: 6px; }}
+            QTableView {{ background: {CARD}; border: 1px solid {BORDER}; gridline-color:{BORDER}; }}
         """)
         self.group_cols = load_groups()  # { group_name: [col_idx_from_csv] }
         self.headers_all = []            # displayed labels
@@ -677,6 +892,14 @@ class MatrixTab(QWidget):
         self.display_names = {}          # header -> display label
         self.tassel_counts = {}
         self._suspend_selection_updates = False
+        self._std = None                 # cached (FEMALE_STD, MALE_STD) arrays of the loaded table
+        self._rows_by_parent = None      # cached ({female: rows}, {male: rows}) of the loaded table
+        self._typed = {}                 # original key -> highlight.TypedColumn of the loaded table
+        self._hl_rules = RuleSet([])     # compiled highlight_rules
+        self.ledger = None               # engine.CapacityLedger incl. checked rows
+        self._avail_rows = {}            # (variety, "male_cap"/"female_cap") -> avail_table row
+        self.day = julian_date           # Julian day shown (day selector)
+        self._day_widths = {}            # day -> (columns loaded, column widths): reopening skips the resize
 
         # mapping from original CSV column index -> displayed table column index
         # (displayed includes Export column at 0; data cols start at 1)
@@ -722,38 +945,73 @@ class MatrixTab(QWidget):
         avail_box.addWidget(self.avail_table)
         lay.addLayout(avail_box)
 
-        # Table + controls
-        self.table = QTableWidget()
+        # Best partners of one parent (engine.top_partners, Auto-allocate score)
+        partner_row = QHBoxLayout()
+        lab = QLabel("Best partners for:"); lab.setStyleSheet("font-weight:bold;")
+        partner_row.addWidget(lab)
+        self.partner_edit = QLineEdit(); self.partner_edit.setPlaceholderText("STDVARIETY (female or male)")
+        self.partner_completer = QCompleter([], self.partner_edit)
+        self.partner_completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.partner_edit.setCompleter(self.partner_completer)
+        partner_row.addWidget(self.partner_edit, 2)
+        self.partner_k = QtWidgets.QSpinBox(); self.partner_k.setRange(1, 100); self.partner_k.setValue(5)
+        partner_row.addWidget(QLabel("Top:")); partner_row.addWidget(self.partner_k)
+        self.btn_partners = QPushButton("Find")
+        partner_row.addWidget(self.btn_partners)
+        lay.addLayout(partner_row)
+        self.partner_table = QTableWidget()
+        self.partner_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.partner_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.partner_table.setMaximumHeight(180)
+        self.partner_table.horizontalHeader().setStretchLastSection(True)
+        self.partner_table.hide()
+        lay.addWidget(self.partner_table)
+        self.btn_partners.clicked.connect(self.find_partners)
+        self.partner_edit.returnPressed.connect(self.find_partners)
+        self.partner_table.cellDoubleClicked.connect(self._goto_partner_row)
+
+        # Table + controls (columnar model -> sort/filter proxy -> view)
+        self.model = CrossingsModel(checkable=True, parent=self)
+        self.proxy = RowMapProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
         self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.table.verticalHeader().setDefaultSectionSize(28)
+        self.table.horizontalHeader().setSortIndicatorShown(True)
         lay.addWidget(self.table)
 
         # Bigger checkbox indicator + single-click toggle
         self.table.setStyleSheet("""
             QTableView::indicator { width: 22px; height: 22px; }
         """)
+        self.table.setItemDelegate(RowColorDelegate(self.table))
         self.table.setItemDelegateForColumn(0, SingleClickCheckDelegate(self.table))
 
         ctrl = QHBoxLayout()
+        self.day_combo = QComboBox()   # days with a Possible_crossings; recently opened ones load from memory
+        ctrl.addWidget(QLabel("Day:"))
+        ctrl.addWidget(self.day_combo)
         self.btn_reload = QPushButton("Reload Today's Crosses")
         self.btn_export = QPushButton("Export Selected Rows (Guarded)")
-        for b in [self.btn_reload,self.btn_export]:
+        self.btn_auto = QPushButton("Auto-allocate")
+        for b in [self.btn_reload,self.btn_auto,self.btn_export]:
             ctrl.addWidget(b)
         ctrl.addStretch(1)
         lay.addLayout(ctrl)
+        self.tasks = TaskBar([self.btn_export])
+        lay.addWidget(self.tasks)
 
-        self.btn_reload.clicked.connect(self.load_all)
+        self.btn_reload.clicked.connect(lambda: self.load_all())
         self.btn_export.clicked.connect(self.export_selected_guarded)
+        self.btn_auto.clicked.connect(self.auto_allocate)
+        self.refresh_days()
+        self.day_combo.currentIndexChanged.connect(self._on_day_selected)
         self.table.horizontalHeader().sectionClicked.connect(self.sort_table)
-        self.table.itemChanged.connect(self._on_table_item_changed)
+        self.model.checkToggled.connect(self._on_row_check_toggled)
 
-        # Watch groups file for live updates to buttons
-        try:
-            self._watcher = QFileSystemWatcher(self)
-            self._watcher.addPath(str(GROUPS_PATH))
-            self._watcher.fileChanged.connect(self._on_groups_file_changed)
-        except Exception:
-            self._watcher = None
+        # Live updates to group buttons / rules from Settings or edits on disk (always on the GUI thread)
+        config_changed().connect(self._on_config_changed)
 
         self._active_group_btns = {}  # name -> button
         self._active_group = None     # currently applied group name or None
@@ -776,83 +1034,55 @@ class MatrixTab(QWidget):
 
     # Availability & rules
     def _load_tassel_counts(self):
-        self.tassel_counts = {}
-        tass = julian_csv("tassles")
-        if not tass.exists():
-            return
-        df = pd.read_csv(tass)
-        for _, r in df.iterrows():
-            var = str(r.get("STDVARIETY","")).strip()
-            try:
-                m = int(r.get("MALE TASSLES",0))
-                f = int(r.get("FEMALE TASSLES",0))
-            except Exception:
-                m,f = 0,0
-            self.tassel_counts[var] = {"male": m, "female": f}
+        self.tassel_counts = engine.load_tassel_counts(self.day, PARENT_DIR)
 
     def _load_rules_pair(self):
-        r = get_rules()
-        try:
-            fpm = int(r.get("females_per_male", 1))
-        except Exception:
-            fpm = 1
-        try:
-            mpf = int(r.get("males_per_female", 1))
-        except Exception:
-            mpf = 1
-        return max(1, fpm), max(1, mpf)
+        return engine.load_rules_pair()
+
+    def _std_columns(self):
+        """(FEMALE_STD, MALE_STD) arrays of the loaded table, stripped; None when missing."""
+        if self._std is None:
+            fstd_idx = self._col_idx("FEMALE_STD")
+            mstd_idx = self._col_idx("MALE_STD")
+            if fstd_idx is None or mstd_idx is None:
+                return None
+            strip = lambda a: pd.Series(np.asarray(a, dtype=object)).str.strip().to_numpy(dtype=object)
+            self._std = (strip(self.model.column(fstd_idx)), strip(self.model.column(mstd_idx)))
+        return self._std
+
+    def _parent_rows(self):
+        """({FEMALE_STD: source rows}, {MALE_STD: source rows}) of the loaded table."""
+        if self._rows_by_parent is None:
+            fstd, mstd = self._std_columns()
+            self._rows_by_parent = (pd.Series(fstd).groupby(fstd).indices,
+                                    pd.Series(mstd).groupby(mstd).indices)
+        return self._rows_by_parent
 
     def _current_checked_rows(self):
-        fstd_idx = self._col_idx("FEMALE_STD")
-        mstd_idx = self._col_idx("MALE_STD")
-        if fstd_idx is None or mstd_idx is None:
+        cols = self._std_columns()
+        if cols is None:
             return []
-        pairs = []
-        for i in range(self.table.rowCount()):
-            it = self.table.item(i,0)
-            if it and it.checkState()==Qt.Checked:
-                fstd = self.table.item(i, fstd_idx).text() if self.table.item(i, fstd_idx) else ""
-                mstd = self.table.item(i, mstd_idx).text() if self.table.item(i, mstd_idx) else ""
-                pairs.append((fstd.strip(), mstd.strip()))
-        return pairs
+        fstd, mstd = cols
+        # pending pairs in the order the rows are shown
+        order = [r for r in self.proxy.source_order() if self.model.checked[r]]
+        return [(fstd[r], mstd[r]) for r in order]
 
     def _compute_capacities(self):
-        """Compute remaining capacities after allocated + pending (checked) rows."""
+        """Compute remaining capacities after allocated + pending (checked) rows.
+
+        Re-reads Tassles/allocated and rebuilds self.ledger, which checkbox toggles then update in place.
+        """
         self._load_tassel_counts()
-        females_per_male, males_per_female = self._load_rules_pair()
-
-        capacities = {}
-        for var, d in self.tassel_counts.items():
-            m_tas = int(d.get("male",0))
-            f_tas = int(d.get("female",0))
-            capacities[var] = {
-                "male_cap":   m_tas * females_per_male,
-                "female_cap": f_tas * males_per_female
-            }
-
-        # subtract already allocated crosses
-        alloc_path = julian_csv("allocated")
-        if alloc_path.exists():
-            try:
-                df_a = pd.read_csv(alloc_path)
-                for _,r in df_a.iterrows():
-                    fstd = str(r.get("FEMALE","")).strip()
-                    mstd = str(r.get("MALE","")).strip()
-                    if fstd in capacities:
-                        capacities[fstd]["female_cap"] = max(0, capacities[fstd]["female_cap"] - 1)
-                    if mstd in capacities:
-                        capacities[mstd]["male_cap"] = max(0, capacities[mstd]["male_cap"] - 1)
-            except Exception:
-                pass
-
-        # subtract pending (checked but not exported yet)
+        self.ledger = engine.CapacityLedger.for_day(self.day, PARENT_DIR, self.tassel_counts)
         for fstd, mstd in self._current_checked_rows():
-            if fstd in capacities:
-                capacities[fstd]["female_cap"] = max(0, capacities[fstd]["female_cap"] - 1)
-            if mstd in capacities:
-                capacities[mstd]["male_cap"] = max(0, capacities[mstd]["male_cap"] - 1)
+            self.ledger.add(fstd, mstd)
+        return self.ledger.capacities()
 
-        return capacities
+    @staticmethod
+    def _avail_item(rem):
+        rem_it = QTableWidgetItem(str(rem))
+        if rem <= 0: rem_it.setBackground(QColor("#ffd6d6"))
+        return rem_it
 
     def _render_availability(self, capacities):
         """Render availability into simplified table: [STDVARIETY | Male | Flowers remaining]"""
@@ -863,29 +1093,41 @@ class MatrixTab(QWidget):
         rows.sort(key=lambda x: (x[0], not x[1]))  # variety, then male first
 
         self.avail_table.setRowCount(len(rows))
+        self._avail_rows = {}
         for i, (var, is_male, rem) in enumerate(rows):
             self.avail_table.setItem(i, 0, QTableWidgetItem(var))
             self.avail_table.setItem(i, 1, QTableWidgetItem("MALE" if is_male else "FEMALE"))
-            rem_it = QTableWidgetItem(str(rem))
-            if rem <= 0: rem_it.setBackground(QColor("#ffd6d6"))
-            self.avail_table.setItem(i, 2, rem_it)
+            self.avail_table.setItem(i, 2, self._avail_item(rem))
+            self._avail_rows[(var, "male_cap" if is_male else "female_cap")] = i
         self.avail_table.resizeColumnsToContents()
 
     def _apply_row_filtering(self, capacities):
-        fstd_idx = self._col_idx("FEMALE_STD")
-        mstd_idx = self._col_idx("MALE_STD")
-        if fstd_idx is None or mstd_idx is None:
+        cols = self._std_columns()
+        if cols is None:
             return
-        checked_rows = set(i for i in range(self.table.rowCount()) if self.table.item(i,0) and self.table.item(i,0).checkState()==Qt.Checked)
-        for i in range(self.table.rowCount()):
-            if i in checked_rows:
-                self.table.setRowHidden(i, False)
-                continue
-            fstd = self.table.item(i, fstd_idx).text() if self.table.item(i, fstd_idx) else ""
-            mstd = self.table.item(i, mstd_idx).text() if self.table.item(i, mstd_idx) else ""
-            f_ok = capacities.get(fstd,{"female_cap":0}).get("female_cap",0) > 0
-            m_ok = capacities.get(mstd,{"male_cap":0}).get("male_cap",0) > 0
-            self.table.setRowHidden(i, not (f_ok and m_ok))
+        fstd, mstd = cols
+        f_ok = pd.Series(fstd).map({v: d["female_cap"] > 0 for v, d in capacities.items()}).eq(True).to_numpy()
+        m_ok = pd.Series(mstd).map({v: d["male_cap"] > 0 for v, d in capacities.items()}).eq(True).to_numpy()
+        self.proxy.set_mask(self.model.checked | (f_ok & m_ok))
+
+    def _apply_check_toggle(self, row, on):
+        """Move one row in/out of the ledger; redraw only the availability cells and rows it affects."""
+        fstd, mstd = self._std_columns()
+        f, m = fstd[row], mstd[row]
+        touched = self.ledger.add(f, m) if on else self.ledger.remove(f, m)
+        for key in touched:
+            i = self._avail_rows.get(key)
+            if i is not None:
+                self.avail_table.setItem(i, 2, self._avail_item(self.ledger.remaining(*key)))
+
+        by_female, by_male = self._parent_rows()
+        parts = [np.array([row])]
+        parts += [by_female.get(var, ()) if key == "female_cap" else by_male.get(var, ()) for var, key in touched]
+        rows = np.unique(np.concatenate([np.asarray(p, dtype=int) for p in parts]))
+        rem = self.ledger.remaining
+        visible = [self.model.checked[r] or (rem(fstd[r], "female_cap") > 0 and rem(mstd[r], "male_cap") > 0)
+                   for r in rows]
+        self.proxy.update_mask(rows, visible)
 
     def _live_refresh(self):
         capacities = self._compute_capacities()
@@ -894,18 +1136,21 @@ class MatrixTab(QWidget):
         self.apply_highlights()
 
     # Load & table helpers
-    def load_all(self):
-        poss = julian_csv("possible_crossings")
-        if not poss.exists():
+    def load_all(self, then=None):
+        """Read the day's crosses in the background, then show them and call then()."""
+        if not engine.crossings_exist(self.day, PARENT_DIR):
             self.info("Missing Possible_crossings CSV. Use the Tassel Survey tab first.")
-            self.table.setRowCount(0); self.table.setColumnCount(0)
+            self._std = self._rows_by_parent = None
+            self._typed = {}
+            self.model.clear()
             return
+        day = self.day
+        self.tasks.run("load", lambda progress: engine.open_day(day, PARENT_DIR, progress),
+                       lambda result: self._show_crossings(*result, then), f"Loading day {day}…")
 
+    def _show_crossings(self, headers_csv, columns, then=None):
+        # headers_csv: original CSV headers in their natural order
         self._load_display_names()
-        with open(poss, newline='', encoding='utf-8') as f:
-            r = csv.reader(f)
-            headers_csv = next(r)  # original CSV headers in their natural order
-            rows = list(r)
 
         # Determine display order from rules
         rules = get_rules()
@@ -917,7 +1162,7 @@ class MatrixTab(QWidget):
         # Use display names for UI only
         shown = ["Export"] + [self.display_names.get(h, h) for h in ordered_headers]
         self.headers_all = shown
-        self.populate_table_display(headers_csv, ordered_headers, shown, rows)
+        self.populate_table_display(headers_csv, ordered_headers, shown, columns)
 
         # Map original CSV indices -> displayed column indices
         self._orig_index_to_display.clear()
@@ -939,40 +1184,93 @@ class MatrixTab(QWidget):
             pass
 
         # Optional: ensure the first column is wide enough for easy clicking
-        if self.table.columnCount() > 0:
+        if self.model.columnCount() > 0:
             self.table.setColumnWidth(0, 90)
 
+        cols = self._std_columns()
+        if cols is not None:
+            self.partner_completer.model().setStringList(sorted(set(cols[0]) | set(cols[1])))
         self._live_refresh()
+        if then is not None:
+            then()
 
-    def populate_table_display(self, original_headers, ordered_headers, shown_headers, rows):
-        """Render table with columns in ordered_headers (display names in shown_headers)."""
-        self.table.clear()
-        col_count = len(shown_headers)
-        self.table.setColumnCount(col_count)
-        self.table.setHorizontalHeaderLabels(shown_headers)
-        self.table.setRowCount(0)
+    def _pair_keys(self):
+        """Identity of each loaded row: its combinations columns plus the occurrence number."""
+        cols = [self.model.column(i) for i in (self._col_idx(c) for c in engine.COMBO_COLUMNS) if i is not None]
+        if not cols:
+            return None
+        df = pd.DataFrame({i: np.asarray(c, dtype=object) for i, c in enumerate(cols)})
+        df["n"] = df.groupby(list(range(len(cols)))).cumcount()
+        return pd.MultiIndex.from_frame(df)
+
+    def refresh_days(self):
+        """Fill the day selector (today is always listed) without triggering a load."""
+        self.day_combo.blockSignals(True)
+        self.day_combo.clear()
+        for d in sorted(set(engine.crossing_days(PARENT_DIR)) | {julian_date}, reverse=True):
+            self.day_combo.addItem(f"{d} (today)" if d == julian_date else str(d), d)
+        self.day_combo.setCurrentIndex(max(0, self.day_combo.findData(self.day)))
+        self.day_combo.blockSignals(False)
+
+    def _on_day_selected(self, i):
+        day = self.day_combo.itemData(i)
+        if day is None or day == self.day:
+            return
+        self.day = day
+        self.partner_table.hide()
+        self.load_all()
 
-        # Precompute original index lookup
+    def patch_crossings(self):
+        """Reload after a match, keeping the checks on pairs that are still there and the sort."""
+        if self.day != julian_date:   # the match was for today: open it
+            self.day = julian_date
+            self.refresh_days()
+            self.load_all()
+            return
+        self.refresh_days()
+        old = self._pair_keys() if self.model.rowCount() else None
+        checked = old[self.model.checked] if old is not None and self.model.checked.any() else None
+        header = self.table.horizontalHeader()
+        section, order = header.sortIndicatorSection(), header.sortIndicatorOrder()
+
+        def restore():
+            if section >= 0 and self.model.rowCount():
+                header.setSortIndicator(section, order)
+                self.proxy.sort(section, order)
+            new = self._pair_keys() if checked is not None and self.model.rowCount() else None
+            if new is not None:
+                rows = np.flatnonzero(new.isin(checked))
+                if len(rows):
+                    self.model.set_checked(rows, True)
+                    self._live_refresh()
+        self.load_all(then=restore)
+
+    def populate_table_display(self, original_headers, ordered_headers, shown_headers, columns):
+        """Render table with columns in ordered_headers (display names in shown_headers).
+
+        columns maps original CSV index -> object array; only cells in view are drawn.
+        """
         name_to_orig_idx = {name: idx for idx, name in enumerate(original_headers)}
-
-        for i, row in enumerate(rows):
-            self.table.insertRow(i)
-            # Export checkbox in col 0
-            chk = QTableWidgetItem()
-            chk.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            chk.setCheckState(Qt.Unchecked)
-            self.table.setItem(i, 0, chk)
-
-            # Fill data columns in the desired display order
-            for j, header_name in enumerate(ordered_headers, start=1):
-                orig_idx = name_to_orig_idx.get(header_name, None)
-                val = row[orig_idx] if (orig_idx is not None and orig_idx < len(row)) else ""
-                self.table.setItem(i, j, QTableWidgetItem(val))
-
-        self.table.resizeColumnsToContents()
+        n = len(next(iter(columns.values()))) if columns else 0
+        empty = np.full(n, "", dtype=object)
+        data = [columns.get(name_to_orig_idx.get(h), empty) for h in ordered_headers]
+        self._std = self._rows_by_parent = None
+        self._typed = {}
+        self.model.set_table(shown_headers[1:], data)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        seen = self._day_widths.get(self.day)
+        if seen is not None and seen[0] is columns and len(seen[1]) == self.model.columnCount():
+            for i, width in enumerate(seen[1]):
+                self.table.setColumnWidth(i, width)
+        else:
+            self.table.resizeColumnsToContents()
+            self._day_widths.pop(self.day, None)
+            self._day_widths[self.day] = (columns, [self.table.columnWidth(i) for i in range(self.model.columnCount())])
+            while len(self._day_widths) > engine.DAY_CACHE_SIZE:
+                self._day_widths.pop(next(iter(self._day_widths)))
 
     def sort_table(self, column_index):
-        self.table.sortItems(column_index, self.table.horizontalHeader().sortIndicatorOrder())
+        self.proxy.sort(column_index, self.table.horizontalHeader().sortIndicatorOrder())
 
     def info(self,msg):
         QMessageBox.information(self,"Info",msg)
@@ -997,8 +1295,20 @@ class MatrixTab(QWidget):
             self.group_btns_layout.insertWidget(self.group_btns_layout.count()-1, btn)
             self._active_group_btns[name] = btn
 
-    def _on_groups_file_changed(self, _path):
-        self.refresh_group_buttons()
+    def _on_config_changed(self, name, data):
+        if name == "groups":
+            self.refresh_group_buttons()
+        elif name == "rules" and self.model.columnCount():
+            # names, hidden columns, capacity rules and highlights apply in place;
+            # a new column order takes effect on the next reload
+            self.display_names = data.get("display_names", {}) or {}
+            hidden = set(data.get("hidden_columns", []))
+            self.model.set_labels([self.display_names.get(k, k) for k in self.header_keys[1:]])
+            if self._active_group is None:
+                for i, key in enumerate(self.header_keys):
+                    if i:
+                        self.table.setColumnHidden(i, key in hidden)
+            self._live_refresh()
 
     def _on_group_button_toggled(self, name, btn, checked):
         if checked:
@@ -1025,59 +1335,47 @@ class MatrixTab(QWidget):
         visible = {0}  # always keep Export
         for orig_idx in cols:
             disp_col = self._orig_index_to_display.get(orig_idx)
-            if disp_col is not None and 0 <= disp_col < self.table.columnCount():
+            if disp_col is not None and 0 <= disp_col < self.model.columnCount():
                 visible.add(disp_col)
         visible |= self.core_columns()
-        for c in range(self.table.columnCount()):
+        for c in range(self.model.columnCount()):
             self.table.setColumnHidden(c, c not in visible)
 
     def show_all_columns(self):
-        for c in range(self.table.columnCount()):
+        for c in range(self.model.columnCount()):
             self.table.setColumnHidden(c, False)
 
     def hide_all_columns(self):
         core = self.core_columns() | {0}
-        for c in range(self.table.columnCount()):
+        for c in range(self.model.columnCount()):
             self.table.setColumnHidden(c, c not in core)
 
     # Export guarded (rule-aware)
     def export_selected_guarded(self):
-        capacities = self._compute_capacities()
-        remaining = dict((k, {"male_cap": v["male_cap"], "female_cap": v["female_cap"]})
-                         for k, v in capacities.items())
+        # the checked rows are what is being guarded: capacity after allocated crosses only
+        capacities = engine.compute_capacities(self.day, PARENT_DIR)
 
-        selected_rows = [i for i in range(self.table.rowCount())
-                         if self.table.item(i,0) and self.table.item(i,0).checkState()==Qt.Checked]
+        # source rows, in the order they are shown
+        selected_rows = [r for r in self.proxy.source_order() if self.model.checked[r]]
         if not selected_rows:
             QMessageBox.information(self,"No selection","Check the 'Export' box on one or more rows first.")
             return
 
         # Build header list from original keys (skip "Export")
         headers = self.header_keys[1:]
-        fstd_idx = self._col_idx("FEMALE_STD")
-        mstd_idx = self._col_idx("MALE_STD")
-        if fstd_idx is None or mstd_idx is None:
+        cols = self._std_columns()
+        if cols is None:
             QMessageBox.warning(self, "Missing columns", "FEMALE_STD / MALE_STD not found.")
             return
 
-        export_rows, skipped = [], []
-        for r in selected_rows:
-            female_std = self.table.item(r,fstd_idx).text() if self.table.item(r,fstd_idx) else ""
-            male_std   = self.table.item(r,mstd_idx).text() if self.table.item(r,mstd_idx) else ""
-
-            f_ok = remaining.get(female_std,{"female_cap":0}).get("female_cap",0) > 0
-            m_ok = remaining.get(male_std,{"male_cap":0}).get("male_cap",0) > 0
-
-            if f_ok and m_ok:
-                remaining[female_std]["female_cap"] -= 1
-                remaining[male_std]["male_cap"] -= 1
-                row_vals=[self.table.item(r,j).text() if self.table.item(r,j) else "" for j in range(1, self.table.columnCount())]
-                export_rows.append((r,row_vals,female_std,male_std))
-            else:
-                reason=[]
-                if not f_ok: reason.append(f"female '{female_std}' has 0 remaining")
-                if not m_ok: reason.append(f"male '{male_std}' has 0 remaining (rule-adjusted)")
-                skipped.append((r,"; ".join(reason)))
+        fstd, mstd = cols
+        pairs = [(fstd[r], mstd[r]) for r in selected_rows]
+        accepted, skipped_pos = engine.guard_pairs(pairs, capacities)
+
+        export_rows = [selected_rows[k] for k in accepted]
+        allocated = [pairs[k] for k in accepted]
+        # report the row number as shown in the table
+        skipped = [(int(self.proxy._inv[selected_rows[k]]), reason) for k, reason in skipped_pos]
 
         if not export_rows:
             QMessageBox.warning(self,"Insufficient availability","None of the selected rows fit remaining availability.")
@@ -1086,25 +1384,17 @@ class MatrixTab(QWidget):
         path,_ = QFileDialog.getSaveFileName(self,"Export CSV","","CSV Files (*.csv)")
         if not path:
             return
-        with open(path,"w",newline="",encoding="utf-8") as f:
-            w=csv.writer(f)
-            w.writerow(headers)
-            for _,row_vals,_,_ in export_rows:
-                w.writerow(row_vals)
-
-        alloc_path = julian_csv("allocated")
-        df_append = pd.DataFrame([{"FEMALE":f,"MALE":m} for _,_,f,m in export_rows])
-        if alloc_path.exists():
-            df_out = pd.concat([pd.read_csv(alloc_path), df_append], ignore_index=True)
-        else:
-            df_out = df_append
-        df_out.to_csv(alloc_path, index=False)
 
+        columns, day = list(self.model.columns), self.day
+        def export(progress):
+            engine.export_rows(path, headers, columns, export_rows, progress)
+            engine.append_allocated(allocated, day, PARENT_DIR)   # not cancellable once the file is complete
+        self.tasks.run("export", export, lambda _: self._exported(export_rows, skipped), "Exporting…")
+
+    def _exported(self, export_rows, skipped):
         self._suspend_selection_updates = True
         try:
-            for r,_,_,_ in export_rows:
-                it=self.table.item(r,0)
-                if it: it.setCheckState(Qt.Unchecked)
+            self.model.set_checked(export_rows, False)
         finally:
             self._suspend_selection_updates = False
 
@@ -1116,69 +1406,84 @@ class MatrixTab(QWidget):
         else:
             QMessageBox.information(self,"Export complete",f"Exported {len(export_rows)} rows.")
 
-    def _on_table_item_changed(self, item):
+    def find_partners(self):
+        """Top-K partners of the typed parent; double-click a result to jump to its row."""
+        parent = self.partner_edit.text().strip()
+        if not parent:
+            return
+        try:
+            res = engine.top_partners(parent, self.partner_k.value(), day=self.day, base=PARENT_DIR)
+        except Exception as e:
+            self.info(f"Could not rank partners: {e}")
+            return
+        if res.empty:
+            self.partner_table.hide()
+            self.info(f"'{parent}' is not a parent in today's crosses.")
+            return
+        self.partner_table.setColumnCount(len(res.columns))
+        self.partner_table.setHorizontalHeaderLabels([self.display_names.get(c, c) for c in res.columns])
+        self.partner_table.setRowCount(len(res))
+        for i, row in enumerate(res.itertuples(index=False)):
+            for j, v in enumerate(row):
+                text = "" if pd.isna(v) else (f"{v:.3f}" if isinstance(v, float) else str(v))
+                self.partner_table.setItem(i, j, QTableWidgetItem(text))
+        self.partner_table.resizeColumnsToContents()
+        self.partner_table.show()
+
+    def _goto_partner_row(self, i, _col):
+        if self._std_columns() is None:
+            return
+        f, m = self.partner_table.item(i, 0).text(), self.partner_table.item(i, 1).text()
+        by_female, by_male = self._parent_rows()
+        rows = np.intersect1d(by_female.get(f, []), by_male.get(m, []))
+        shown = [int(self.proxy._inv[r]) for r in rows if self.proxy._inv[r] >= 0]
+        if not shown:
+            self.info(f"{f} × {m} is not shown (no availability left, or filtered out).")
+            return
+        self.table.selectRow(shown[0])
+        self.table.scrollTo(self.proxy.index(shown[0], 0))
+
+    def auto_allocate(self):
+        """Check the best-scoring crosses that fit what is left after allocated and checked rows."""
+        if not self.model.rowCount() or self._std_columns() is None:
+            self.info("Load today's crosses first.")
+            return
+        capacities = self._compute_capacities()
+        taken = engine.load_allocated_pairs(self.day, PARENT_DIR) + self._current_checked_rows()
+        rows = engine.suggest_crosses(lambda key: self.model.column(self._col_idx(key, -1)), self.model.rowCount(),
+                                      capacities, taken, engine.allocation_settings())
+        if not rows:
+            self.info("No further crosses fit the remaining availability.")
+            return
+        self._suspend_selection_updates = True
+        try:
+            self.model.set_checked(rows, True)
+        finally:
+            self._suspend_selection_updates = False
+        self._live_refresh()
+        self.info(f"Checked {len(rows)} suggested crosses. Review them, then export.")
+
+    def _on_row_check_toggled(self, row, on):
         if self._suspend_selection_updates:
             return
-        if item and item.column()==0 and item.flags() & Qt.ItemIsUserCheckable:
+        if self.ledger is None or self._std_columns() is None:
             self._live_refresh()
+        else:
+            self._apply_check_toggle(row, on)
 
     # Highlighting engine
-    def _value_matches(self, cell_text: str, op: str, target: str) -> bool:
-        t = (cell_text or "").strip()
-        v = (target or "").strip()
-        def to_float(x):
-            try:
-                return float(str(x).replace(",",""))
-            except Exception:
-                return None
-        if op in (">",">=","<","<=","==","!="):
-            a = to_float(t); b = to_float(v)
-            if a is not None and b is not None:
-                if op == ">":  return a >  b
-                if op == ">=": return a >= b
-                if op == "<":  return a <  b
-                if op == "<=": return a <= b
-                if op == "==": return a == b
-                if op == "!=": return a != b
-            if op == "==": return t == v
-            if op == "!=": return t != v
-            return False
-        elif op == "contains":
-            return v.lower() in t.lower()
-        elif op == "not contains":
-            return v.lower() not in t.lower()
-        return False
+    def _typed_column(self, key):
+        if key not in self._typed:
+            vals = self.model.column(self._col_idx(key, -1))
+            self._typed[key] = TypedColumn(np.asarray(vals, dtype=object)) if vals is not None else None
+        return self._typed[key]
 
     def apply_highlights(self):
-        rules = get_rules()
-        hrules = rules.get("highlight_rules", [])
-        if not hrules:
-            return
-        headers = { key: i for i, key in enumerate(self.header_keys) }  # original key -> index
-        for row in range(self.table.rowCount()):
-            for rule in hrules:
-                color = rule.get("color", "#FFEB3B")
-                logic = (rule.get("logic","AND") or "AND").upper()
-                clauses = rule.get("clauses", [])
-                results = []
-                for c in clauses:
-                    colname = c.get("column","")
-                    op = c.get("op","")
-                    val = c.get("value","")
-                    idx = headers.get(colname)
-                    if idx is None:
-                        results.append(False)
-                        continue
-                    it = self.table.item(row, idx)
-                    txt = it.text() if it else ""
-                    results.append(self._value_matches(txt, op, val))
-                ok = (all(results) if logic == "AND" else any(results)) if results else False
-                if ok:
-                    qcol = QColor(color)
-                    for col in range(self.table.columnCount()):
-                        it = self.table.item(row, col)
-                        if it:
-                            it.setBackground(qcol)
+        hrules = get_rules().get("highlight_rules", [])
+        if RuleSet.key_for(hrules) != self._hl_rules.key:
+            self._hl_rules = RuleSet(hrules)
+        n = self.model.rowCount()
+        self.model.set_row_colors(self._hl_rules.colors(self._typed_column, n))
 
 # -------------------- Settings Tab (scrollable) --------------------
 class SettingsTab(QWidget):
@@ -1226,16 +1531,7 @@ class SettingsTab(QWidget):
 
         # read possible headers (from today's Possible_crossings) once
         def _read_possible_headers():
-            poss = julian_csv("possible_crossings")
-            if not poss.exists():
-                return []
-            with open(poss, newline="", encoding="utf-8") as f:
-                r = csv.reader(f)
-                try:
-                    headers = next(r)
-                except StopIteration:
-                    return []
-            return headers
+            return engine.crossings_headers(julian_date, PARENT_DIR)
 
         self._possible_headers = _read_possible_headers()
         self.rules = get_rules()
@@ -1258,7 +1554,7 @@ class SettingsTab(QWidget):
                 if path:
                     edit.setText(path)
                     self.paths[key] = path
-                    write_json(PATHS_PATH, self.paths)
+                    save_paths(self.paths)
             b.clicked.connect(pick)
             h.addWidget(b)
             return h
@@ -1285,10 +1581,50 @@ class SettingsTab(QWidget):
         rule_row2.addWidget(self.rule_mpf)
         right.addLayout(rule_row2)
 
+        rule_row3 = QHBoxLayout()
+        self.rule_format = QComboBox()
+        self.rule_format.addItem("CSV", "csv")
+        self.rule_format.addItem("Parquet (typed, column reads)" if parquet_available()
+                                 else "Parquet (install pyarrow)", "parquet")
+        self.rule_format.setCurrentIndex(max(0, self.rule_format.findData(self.rules.get("crossings_format", "csv"))))
+        rule_row3.addWidget(QLabel("Crosses storage (next match):"))
+        rule_row3.addWidget(self.rule_format)
+        right.addLayout(rule_row3)
+
+        # Hard exclusions: pairs dropped by the next match, before GV/CD/kinship are joined
+        ex = engine.exclusion_rules(self.rules)
+        rule_row4 = QHBoxLayout()
+        self.ex_kinship = QLineEdit("" if ex["max_kinship"] in (None, "") else str(ex["max_kinship"]))
+        self.ex_kinship.setPlaceholderText("off")
+        rule_row4.addWidget(QLabel("Exclude KINSHIP above:"))
+        rule_row4.addWidget(self.ex_kinship)
+        right.addLayout(rule_row4)
+        rule_row5 = QHBoxLayout()
+        self.ex_checks = {}
+        for key, text in [("same_variety", "Selfs"), ("same_family", "Same family"),
+                          ("made_crosses", "Already made"), ("zero_capacity", "No capacity")]:
+            cb = QCheckBox(text); cb.setChecked(bool(ex[key]))
+            self.ex_checks[key] = cb
+            rule_row5.addWidget(cb)
+        rule_row5.addStretch(1)
+        right.addWidget(QLabel("Exclude before matching:"))
+        right.addLayout(rule_row5)
+
         btn_save_rule = QPushButton("Save Rules")
         def _save_rule():
             self.rules["females_per_male"] = int(self.rule_fpm.value())
             self.rules["males_per_female"] = int(self.rule_mpf.value())
+            self.rules["crossings_format"] = self.rule_format.currentData()
+            ex = dict(self.rules.get("exclusions") or {})
+            try:
+                text = self.ex_kinship.text().strip()
+                ex["max_kinship"] = float(text) if text else None
+            except ValueError:
+                QMessageBox.warning(self, "Invalid value", "KINSHIP ceiling must be a number (or empty for off).")
+                return
+            for key, cb in self.ex_checks.items():
+                ex[key] = cb.isChecked()
+            self.rules["exclusions"] = ex
             save_rules(self.rules)
             QMessageBox.information(self, "Saved", "Crossing rules updated.")
         btn_save_rule.clicked.connect(_save_rule)
@@ -1527,6 +1863,8 @@ class SettingsTab(QWidget):
         top.addLayout(right, 3)
         card_lay.addLayout(top)
 
+        config_changed().connect(self._on_config_changed)
+
         # wire buttons
         self.btn_add.clicked.connect(self.add_group)
         self.btn_rename.clicked.connect(self.rename_group)
@@ -1539,6 +1877,18 @@ class SettingsTab(QWidget):
         for g in self.groups.keys():
             self.group_list.addItem(g)
 
+    def _on_config_changed(self, name, data):
+        if name == "groups":
+            self.groups = data
+            self.refresh()
+        elif name == "rules":
+            self.rules = data
+        elif name == "paths":
+            self.paths = data
+            for key, edit in [("photoperiod", self.pp_edit), ("crossingdataset", self.cd_edit),
+                              ("gv", self.gv_edit), ("amat", self.am_edit)]:
+                edit.setText(data.get(key, ""))
+
     def add_group(self):
         name, ok = QtWidgets.QInputDialog.getText(self, "New Group", "Group name:")
         if not ok or not name:
@@ -1588,12 +1938,10 @@ class SettingsTab(QWidget):
         w.show()
 
     def edit_group_columns(self):
-        poss = julian_csv("possible_crossings")
-        if not poss.exists():
+        if not engine.crossings_exist(julian_date, PARENT_DIR):
             QMessageBox.information(self, "No data", "No Possible_crossings file yet.")
             return
-        with open(poss, newline="", encoding="utf-8") as f:
-            r = csv.reader(f); headers = next(r)
+        headers = engine.crossings_headers(julian_date, PARENT_DIR)
         it = self.group_list.currentItem()
         if not it:
             return
@@ -1612,7 +1960,9 @@ class GroupWindow(QWidget):
         super().__init__(parent)
         self.setWindowTitle(f"View: {group_name}")
         v = QVBoxLayout(self)
-        self.table = QTableWidget()
+        self.model = CrossingsModel(checkable=False, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.setStyleSheet(f"background:{CARD}; border:1px solid {BORDER};")
         v.addWidget(self.table)
         self.group_name = group_name
@@ -1620,22 +1970,14 @@ class GroupWindow(QWidget):
         self.reload()
 
     def reload(self):
-        poss = julian_csv("possible_crossings")
-        self.table.clear()
-        if not poss.exists():
-            self.table.setRowCount(0); self.table.setColumnCount(0)
+        if not engine.crossings_exist(julian_date, PARENT_DIR):
+            self.model.clear()
             return
-        with open(poss, newline="", encoding="utf-8") as f:
-            r = csv.reader(f); headers = next(r); rows = list(r)
+        # only the group's columns are parsed
+        headers = engine.crossings_headers(julian_date, PARENT_DIR)
         wanted = [c for c in self.columns if 0 <= c < len(headers)]
-        sub_headers = [headers[i] for i in wanted]
-        self.table.setColumnCount(len(sub_headers))
-        self.table.setHorizontalHeaderLabels(sub_headers)
-        self.table.setRowCount(len(rows))
-        for i, row in enumerate(rows):
-            for j, col_idx in enumerate(wanted):
-                val = row[col_idx] if col_idx < len(row) else ""
-                self.table.setItem(i, j, QtWidgets.QTableWidgetItem(val))
+        _, data = engine.load_crossings(julian_date, PARENT_DIR, usecols=wanted)
+        self.model.set_table([headers[i] for i in wanted], [data[i] for i in wanted])
         self.table.resizeColumnsToContents()
 
 # -------------------- Main Window --------------------
@@ -1660,16 +2002,37 @@ class MainWindow(QMainWindow):
         self.tabs.setStyleSheet("QTabBar::tab { padding:10px 16px; }")
         lay.addWidget(self.tabs)
         self.matrix_tab = MatrixTab()
-        self.tassel_tab = TasselSurveyTab(switch_to_matrix_callback=self.goto_matrix)
+        self.tassel_tab = TasselSurveyTab(switch_to_matrix_callback=self.goto_matrix,
+                                          matched_callback=self.matrix_tab.patch_crossings)
         self.settings_tab = SettingsTab()
         self.tabs.addTab(self.tassel_tab,"Tassel Survey")
         self.tabs.addTab(self.matrix_tab,"Crosses for the Day")
         self.tabs.addTab(self.settings_tab,"Settings")
         self.resize(1380,900)
 
+        # Hand edits to the JSON configs on disk -> config store -> subscribed tabs
+        self._config_watcher = QFileSystemWatcher(self)
+        self._config_watcher.fileChanged.connect(self._on_config_file_changed)
+        self._watch_config_files()
+
+    def _watch_config_files(self):
+        for p in [GROUPS_PATH, PATHS_PATH, RULES_PATH]:
+            if p.exists() and str(p) not in self._config_watcher.files():
+                self._config_watcher.addPath(str(p))
+
+    def _on_config_file_changed(self, _path):
+        config_store().check(force=True)
+        self._watch_config_files()
+
     def goto_matrix(self):
         self.tabs.setCurrentWidget(self.matrix_tab)
 
+    def closeEvent(self, event):
+        self.tassel_tab.stop_speculation(wait=True)
+        for tab in [self.tassel_tab, self.matrix_tab]:
+            tab.tasks.stop()
+        super().closeEvent(event)
+
 # -------------------- main --------------------
 def main():
     if '--check' in sys.argv:
@@ -0,0 +1,207 @@
+"""Latency of Crosses-tab interactions, headless (QT_QPA_PLATFORM=offscreen).
+
+For each synthetic season (sucrox.bench.make_dataset) the day is combined
+and matched once, then a shown MatrixTab is driven the way a user would:
+load_all (cold, with the day LRU and column widths dropped, and cached),
+checkbox toggles, a full _live_refresh, header sorts, group buttons on/off,
+and opening a SettingsTab. Each sample runs until the UI is idle again,
+repaint included. p50/p95 per interaction can be saved as a baseline and
+compared later.
+
+    python Scripts/ui_bench.py [--scale 100:1000] [--repeat 20] [--save-baseline]
+"""
+import os, sys, time, argparse
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+CWD = Path.cwd()              # importing the GUI moves to the repo root
+
+import SucroX_2025 as S   # puts the repo root on sys.path
+from PyQt5.QtCore import Qt, QEventLoop, qInstallMessageHandler
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from sucrox import bench, engine
+
+WINDOW = (1380, 900)
+SLACK_MS = 10.0               # p95 differences below this are noise, never "slower"
+COLD_SHARE = 4                # cold loads take seconds at scale: repeat // COLD_SHARE samples (at least 3)
+
+# -------------------- Setup --------------------
+def _groups(headers, n=4):
+    """n groups over the non-core columns (original CSV indices), like hand-made ones."""
+    core = {"FEMALE_AVAR", "MALE_AVAR", "FEMALE_STD", "MALE_STD", "KINSHIP"}
+    rest = [i for i, h in enumerate(headers) if h not in core]
+    return {f"Group {k + 1}": [int(i) for i in part] for k, part in enumerate(np.array_split(rest, n)) if len(part)}
+
+def prepare(dataset, work, day=bench.BENCH_DAY):
+    """Fresh copy of `dataset` with the day matched, highlight rules and column groups; returns its Path."""
+    base = bench.fresh_copy(Path(dataset), Path(work), {"highlight_rules": bench.HIGHLIGHTS})
+    engine.generate_combos(day, base)
+    engine.match_crossings(day, base)
+    engine.write_json(base / "column_groups.json", _groups(engine.crossings_headers(day, base)))
+    return base
+
+@contextmanager
+def use_base(base, day):
+    """Point the GUI module (and the engine's defaults) at another data folder for the block."""
+    saved = engine.BASE_DIR, S.PARENT_DIR, S.julian_date, os.getcwd()
+    engine.BASE_DIR = S.PARENT_DIR = Path(base)
+    S.julian_date = day
+    os.chdir(str(base))
+    try:
+        yield
+    finally:
+        engine.BASE_DIR, S.PARENT_DIR, S.julian_date = saved[:3]
+        os.chdir(saved[3])
+
+@contextmanager
+def quiet():
+    """Message boxes answer Ok without showing, and the offscreen plugin's warning on every show() is dropped."""
+    boxes = {k: vars(QMessageBox)[k] for k in ("information", "warning")}
+    QMessageBox.information = QMessageBox.warning = staticmethod(lambda *a, **k: QMessageBox.Ok)
+    previous = qInstallMessageHandler(
+        lambda kind, ctx, msg: None if "propagateSizeHints" in msg else sys.stderr.write(msg + "\n"))
+    try:
+        yield
+    finally:
+        for k, f in boxes.items():
+            setattr(QMessageBox, k, f)
+        qInstallMessageHandler(previous)
+
+# -------------------- Timing --------------------
+def _idle(app, until=None):
+    """Process events until until() holds (background loads) and nothing is pending (repaints)."""
+    while until is not None and not until():
+        app.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents, 50)
+    app.processEvents()
+
+def _sample(app, fn, until=None):
+    t = time.perf_counter()
+    fn()
+    _idle(app, until)
+    return (time.perf_counter() - t) * 1000
+
+def _load(app, tab):
+    done = []
+    return _sample(app, lambda: tab.load_all(then=lambda: done.append(1)), lambda: bool(done))
+
+def measure(app, base, day=bench.BENCH_DAY, repeat=20, seed=0):
+    """{interaction: [milliseconds per sample]} on the matched day in `base`.
+
+    The GUI module's data folder, day and cwd, the message boxes and the Qt
+    message handler are all restored afterwards.
+    """
+    with use_base(base, day), quiet():
+        return _measure(app, repeat, seed)
+
+def _measure(app, repeat, seed):
+    rng = np.random.default_rng(seed)
+    tab = S.MatrixTab()
+    tab.resize(*WINDOW); tab.show()
+    _idle(app, lambda: not tab.tasks.busy() and tab.model.rowCount() > 0)
+    out = {k: [] for k in ["load_all (cold)", "load_all (cached day)", "toggle check", "_live_refresh",
+                           "sort", "group on", "group off", "open Settings"]}
+
+    for i in range(repeat):
+        if i < max(3, repeat // COLD_SHARE):
+            engine._days.clear(); tab._day_widths.clear()
+            out["load_all (cold)"].append(_load(app, tab))
+        out["load_all (cached day)"].append(_load(app, tab))
+
+    rows = [tab.proxy.mapToSource(tab.proxy.index(int(r), 0)).row()
+            for r in rng.choice(tab.proxy.rowCount(), size=min(repeat, tab.proxy.rowCount()), replace=False)]
+    for on in (Qt.Checked, Qt.Unchecked):
+        for r in rows:
+            out["toggle check"].append(_sample(app, lambda: tab.model.setData(tab.model.index(r, 0), on, Qt.CheckStateRole)))
+    for _ in range(repeat):
+        out["_live_refresh"].append(_sample(app, tab._live_refresh))
+
+    header = tab.table.horizontalHeader()
+    cols = [c for c in (tab._col_idx("KINSHIP"), tab._col_idx("FEMALE_STD")) if c is not None]
+    for i in range(repeat):
+        col, order = cols[i % len(cols)], Qt.DescendingOrder if i % 2 else Qt.AscendingOrder
+        def click():   # what a header click does: flip the indicator, then sectionClicked
+            header.setSortIndicator(col, order)
+            header.sectionClicked.emit(col)
+        out["sort"].append(_sample(app, click))
+
+    btns = list(tab._active_group_btns.values())
+    for i in range(repeat if btns else 0):
+        btn = btns[i % len(btns)]
+        out["group on"].append(_sample(app, btn.click))
+        out["group off"].append(_sample(app, btn.click))
+
+    for _ in range(repeat):
+        holder = []
+        def open_settings():
+            holder.append(S.SettingsTab())
+            holder[0].resize(*WINDOW); holder[0].show()
+        out["open Settings"].append(_sample(app, open_settings))
+        holder[0].close(); holder[0].deleteLater()
+        _idle(app)
+
+    tab.tasks.stop(); tab.close(); tab.deleteLater()
+    _idle(app)
+    return {k: v for k, v in out.items() if v}
+
+def summarize(samples):
+    """{interaction: {"n", "p50_ms", "p95_ms"}}."""
+    return {k: {"n": len(v), "p50_ms": round(float(np.percentile(v, 50)), 2),
+                "p95_ms": round(float(np.percentile(v, 95)), 2)} for k, v in samples.items()}
+
+def compare(results, baseline, tolerance=1.25):
+    """Report lines plus the (scale, interaction) entries whose p95 is above tolerance x baseline."""
+    lines, slower = [], []
+    for label, stats in results.items():
+        lines.append(label)
+        lines.append(f"  {'interaction':<24}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'base p95':>10}{'ratio':>8}")
+        for name, r in stats.items():
+            b = (baseline.get(label) or {}).get(name)
+            ratio = r["p95_ms"] / b["p95_ms"] if b and b.get("p95_ms") else None
+            if ratio is not None and ratio > tolerance and r["p95_ms"] - b["p95_ms"] > SLACK_MS:
+                slower.append((label, name))
+            was = "-" if not b else f"{b['p95_ms']:.1f}"
+            lines.append(f"  {name:<24}{r['n']:>5}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{was:>10}"
+                         f"{'-' if ratio is None else f'{ratio:.2f}':>8}"
+                         + ("  slower" if (label, name) in slower else ""))
+    return lines, slower
+
+# -------------------- main --------------------
+def main(argv=None):
+    p = argparse.ArgumentParser(description="p50/p95 latency of Crosses-tab interactions on synthetic seasons.")
+    p.add_argument("--scale", action="append", metavar="PARENTS:AMAT",
+                   help="parents per sex and AMAT varieties, repeatable (default: 10:200, 100:1000, 500:2000)")
+    p.add_argument("--seed", type=int, default=0, help="synthetic data seed")
+    p.add_argument("--repeat", type=int, default=20, help="samples per interaction (default 20)")
+    p.add_argument("--work", type=Path, default=None, help="folder for data and runs (default: .sucrox_cache/bench)")
+    p.add_argument("--baseline", type=Path, default=None, help="baseline JSON (default: <work>/ui_baseline.json)")
+    p.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    p.add_argument("--tolerance", type=float, default=1.25, help="p95 above this x baseline fails (default 1.25)")
+    args = p.parse_args(argv)
+
+    work = CWD / args.work if args.work else S.PARENT_DIR / engine.CACHE_DIRNAME / "bench"
+    baseline = CWD / args.baseline if args.baseline else work / "ui_baseline.json"
+    scales = [tuple(int(x) for x in s.split(":")) for s in args.scale] if args.scale else bench.SCALES
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    app.setFont(S.APP_FONT)
+    results = {}
+    for parents, amat in scales:
+        label = bench.scale_label(parents, amat)
+        data = bench.make_dataset(work / "data" / f"{label}-s{args.seed}", parents, amat, args.seed)
+        base = prepare(data, work / "ui" / label)
+        results[label] = summarize(measure(app, base, repeat=args.repeat, seed=args.seed))
+    lines, slower = compare(results, bench.load_baseline(baseline), args.tolerance)
+    print("\n".join(lines))
+    if args.save_baseline:
+        bench.save_baseline(baseline, results)
+        print(f"Baseline saved → {baseline}")
+    elif slower:
+        print(f"{len(slower)} interaction(s) with p95 above {args.tolerance}x the baseline")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
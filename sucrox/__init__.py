@@ -0,0 +1 @@
+"""SucroX crossing pipeline (Qt-free). The PyQt5 app lives in Scripts/SucroX_2025.py."""
@@ -0,0 +1,103 @@
+"""Auto-allocation: the best set of crosses that fits the remaining flowers.
+
+The day's candidates form a flow network: source -> female (capacity: her
+remaining crosses) -> male (1 per distinct pair) -> sink (capacity: his
+remaining crosses). A min-cost flow with cost = -score then picks the crosses
+of maximum total score. Paths are found with a NumPy Bellman-Ford over the
+residual edge arrays, so a few thousand candidates solve in milliseconds.
+"""
+import numpy as np
+import pandas as pd
+
+ALLOCATION_DEFAULT = {
+    "traits": {"T_SPACRE": 1.0},   # GV trait -> weight of its standardized mid-parent value
+    "kinship_penalty": 4.0,        # subtracted per unit of KINSHIP
+    "fill": True,                  # use as many flowers as possible; False: only crosses that add score
+}
+
+def pair_scores(column, n, settings):
+    """Score per row: weighted mid-parent GV z-scores minus kinship_penalty x KINSHIP.
+
+    column(name) returns a wide column (or None when missing). Missing trait
+    values count as average (z = 0), a missing KINSHIP as no penalty.
+    """
+    num = lambda name: pd.to_numeric(pd.Series(np.asarray(column(name), dtype=object)), errors="coerce") \
+        if column(name) is not None else pd.Series(np.nan, index=range(n))
+    score = np.zeros(n)
+    for trait, weight in (settings.get("traits") or {}).items():
+        mid = pd.concat([num(f"FEMALE_{trait}"), num(f"MALE_{trait}")], axis=1).mean(axis=1)
+        sd = mid.std()
+        if mid.notna().any() and sd > 0:
+            score += float(weight) * ((mid - mid.mean()) / sd).fillna(0).to_numpy()
+    score -= float(settings.get("kinship_penalty", 0) or 0) * num("KINSHIP").fillna(0).to_numpy()
+    return score
+
+def _shortest_path(nodes, head, tail, cap, cost, source):
+    """Bellman-Ford over residual edges with cap > 0: (dist, predecessor edge) per node.
+
+    Each round only relaxes the edges leaving nodes that improved in the last one.
+    """
+    dist = np.full(nodes, np.inf); dist[source] = 0.0
+    pred = np.full(nodes, -1)
+    frontier = np.zeros(nodes, dtype=bool); frontier[source] = True
+    open_ = cap > 0
+    for _ in range(nodes):
+        e = np.flatnonzero(frontier[tail] & open_)
+        if not len(e):
+            break
+        cand = dist[tail[e]] + cost[e]
+        best = np.full(nodes, np.inf)
+        np.minimum.at(best, head[e], cand)
+        frontier = best < dist - 1e-12
+        if not frontier.any():
+            break
+        dist[frontier] = best[frontier]
+        won = e[frontier[head[e]] & (cand <= best[head[e]])]
+        pred[head[won]] = won
+    return dist, pred
+
+def max_weight_flow(females, males, weights, female_cap, male_cap, fill=True):
+    """Which candidate pairs to cross: a bool mask over the candidates.
+
+    females / males: parent ids per candidate (distinct pairs); weights: score
+    per candidate; female_cap / male_cap: {id: crosses left}. With fill the
+    flow is as large as the capacities allow (best total score among those);
+    otherwise augmenting stops once a further cross would lower the score.
+    """
+    weights = np.asarray(weights, dtype=float)
+    n = len(weights)
+    if not n:
+        return np.zeros(0, dtype=bool)
+    f_ids, f_idx = np.unique(np.asarray(females, dtype=object).astype(str), return_inverse=True)
+    m_ids, m_idx = np.unique(np.asarray(males, dtype=object).astype(str), return_inverse=True)
+    nf, nm = len(f_ids), len(m_ids)
+    source, sink = nf + nm, nf + nm + 1
+    # every cross earns `bonus` on top of its score, so with fill more crosses always win
+    bonus = 1.0 + 2.0 * (nf + nm + 1) * (np.abs(weights).max() if n else 0.0) if fill else 0.0
+
+    tail = np.concatenate([np.full(nf, source), f_idx, nf + np.arange(nm)])
+    head = np.concatenate([np.arange(nf), nf + m_idx, np.full(nm, sink)])
+    cap = np.concatenate([[max(0, int(female_cap.get(v, 0))) for v in f_ids], np.ones(n),
+                          [max(0, int(male_cap.get(v, 0))) for v in m_ids]]).astype(np.int64)
+    cost = np.concatenate([np.zeros(nf), -(weights + bonus), np.zeros(nm)])
+    # residual graph: edge 2k forward, 2k + 1 its reverse
+    m = len(tail)
+    T = np.empty(2 * m, dtype=np.int64); H = np.empty(2 * m, dtype=np.int64)
+    C = np.zeros(2 * m, dtype=np.int64); W = np.empty(2 * m)
+    T[0::2], H[0::2], C[0::2], W[0::2] = tail, head, cap, cost
+    T[1::2], H[1::2], W[1::2] = head, tail, -cost
+
+    while True:
+        dist, pred = _shortest_path(nf + nm + 2, H, T, C, W, source)
+        if not np.isfinite(dist[sink]) or dist[sink] >= -1e-12:
+            break
+        path, v = [], sink
+        while v != source:
+            e = pred[v]
+            path.append(e)
+            v = T[e]
+        path = np.array(path)
+        push = C[path].min()
+        C[path] -= push
+        C[path ^ 1] += push
+    return C[2 * nf + 1:2 * (nf + n):2] > 0   # reverse capacity of a pair edge = its flow
@@ -0,0 +1,317 @@
+"""Benchmarks of the crossing pipeline on synthetic seasons.
+
+make_dataset() writes a complete data folder: Photoperiod, a day's tassel
+survey with `parents` females and as many males, GV traits, a
+CrossingDataset and a square, symmetric AMAT over `amat` varieties. The
+folder is reused while it exists. run_stages() times each pipeline stage and
+its peak traced memory (tracemalloc, from a separate run): combine, match (cold, then with every
+output current), loading the day, capacities, highlight rules and the guarded
+export. Results can be saved as a baseline and later runs compared to it.
+
+differential() runs the match once with every shortcut off (the reference)
+and once per optimized path: packed AMAT, Parquet pairs tables, stage cache
+hits, an incremental match after a smaller survey, and a speculative match.
+Each path must write a byte-identical Possible_crossings_<day>.csv. The
+reference excludes pairs above a KINSHIP ceiling, so the packed AMAT path's
+numeric lookups are held to the CSV's.
+
+golden() anchors all of this to the original matcher: tests/golden holds a
+sample day's inputs and the Possible_crossings the original GUI wrote for
+them, and the default pipeline must reproduce it line for line.
+"""
+import os, json, time, shutil, hashlib, tracemalloc
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from sucrox import engine
+from sucrox.highlight import RuleSet, TypedColumn
+
+BENCH_DAY = 200
+EXPORT_ROWS = 1000                                # rows selected for the guarded export, spread over the day
+SCALES = [(10, 200), (100, 1000), (500, 2000)]   # (parents per sex, AMAT varieties)
+PREFIXES = ["L", "HoCP", "Ho"]
+TRAITS = ["FIBER", "MSTWT", "POPN", "TRS_TON", "TCA", "T_SPACRE"]
+HIGHLIGHTS = [
+    {"name": "close", "color": "#FFEB3B", "logic": "AND",
+     "clauses": [{"column": "KINSHIP", "op": "<", "value": "0.15"}]},
+    {"name": "strong", "color": "#A5D6A7", "logic": "OR",
+     "clauses": [{"column": "FEMALE_T_SPACRE", "op": ">", "value": "9000"},
+                 {"logic": "AND", "clauses": [{"column": "MALE_FIBER", "op": ">=", "value": "12"},
+                                              {"column": "FEMALE_STD", "op": "contains", "value": "hocp"}]}]},
+]
+REFERENCE_RULES = {"stage_cache": False, "incremental_match": False, "speculative_match": False,
+                   "amat_cache": False, "crossings_format": "csv", "write_wide_crossings": True,
+                   "exclusions": {"max_kinship": 0.3}}   # synthetic kinship is 0 .. 0.5
+GOLDEN = Path(__file__).resolve().parent.parent / "tests" / "golden"   # sample-day inputs (SOURCES layout)
+GOLDEN_DAY = 246
+SOURCES = {
+    "photoperiod": "Photoperiod_Pos/Photoperiod_Pos_2025.csv",
+    "crossingdataset": "CrossingDataset/ZT_CrossingDataset.csv",
+    "gv": "CrossingDataset/ZT_GVs_1.4.csv",
+    "amat": "CrossingDataset/AMAT_25.csv",
+}
+
+def scale_label(parents, amat):
+    return f"p{parents}-a{amat}"
+
+# -------------------- Synthetic data --------------------
+def _varieties(n):
+    """(AVARIETY, STDVARIETY, NUMVAR) of n distinct varieties."""
+    i = np.arange(n)
+    yy = 10 + i % 15
+    prefix = np.array(PREFIXES, dtype=object)[i % len(PREFIXES)]
+    av = [f"{p.upper()}{y:02d}-{k:03d}" for p, y, k in zip(prefix, yy, i)]
+    std = [f"{p}{y:02d}-{k:04d}" for p, y, k in zip(prefix, yy, i)]
+    num = [f"20{y:02d}{k:04d}" for y, k in zip(yy, i)]
+    return av, std, num
+
+def _write_paths(folder):
+    (folder / "paths.json").write_text(json.dumps({k: str(folder / v) for k, v in SOURCES.items()}, indent=2),
+                                       encoding="utf-8")
+
+def _write_amat(path, ids):
+    """Symmetric AMAT: the value of (i, j) only depends on the unordered pair; 1 on the diagonal."""
+    n = len(ids)
+    cells = np.array([f"{v / 10000:.4f}" for v in range(10001)], dtype=object)   # 0.0000 .. 1.0000
+    j = np.arange(n, dtype=np.int64)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("," + ",".join(ids) + "\n")
+        for i in range(n):
+            lo, hi = np.minimum(i, j), np.maximum(i, j)
+            code = (lo * 2654435761 + hi * 40503) % 5000   # kinship 0 .. 0.5
+            code[i] = 10000
+            f.write(ids[i] + "," + ",".join(cells[code]) + "\n")
+
+def make_dataset(folder, parents, amat, seed=0, day=BENCH_DAY):
+    """Write (or reuse) a synthetic data folder; returns its Path."""
+    folder = Path(folder)
+    done = folder / ".complete"
+    if done.exists():
+        return folder
+    if folder.exists():
+        shutil.rmtree(folder)
+    rng = np.random.default_rng(seed)
+    n = max(2 * parents, amat)
+    av, std, num = _varieties(n)
+    for rel in ["Photoperiod_Pos", "CrossingDataset", "tassle_survey_data"]:
+        (folder / rel).mkdir(parents=True, exist_ok=True)
+
+    idx = np.arange(n)
+    pd.DataFrame({"PREFIX": [s.split("-")[0].rstrip("0123456789") for s in std],
+                  "VARIETY": [f"20{x[2:4]}-{x[4:]}" for x in num], "NUMVAR": num,
+                  "AVARIETY": av, "STDVARIETY": std, "BAY": idx // 200 + 1,
+                  "CART": np.array(list("ABCDEFGH"))[(idx // 25) % 8], "CAN": idx % 25 + 1,
+                  "FAMILY": [f"F{k}" for k in idx % max(1, n // 8)]}) \
+        .to_csv(folder / SOURCES["photoperiod"], index=False)
+
+    # the survey: varieties [0, parents) flower as females, [parents, 2 parents) as males
+    rows = []
+    for k in range(2 * parents):
+        female = k < parents
+        pollen = int(rng.integers(5, 11) if female else rng.integers(1, 5))
+        rows.append([av[k], std[k], k % 25 + 1, "ABCDEFGH"[(k // 25) % 8], k // 200 + 1,
+                     int(rng.integers(1, 7)), pollen, "female" if female else "male"])
+    pd.DataFrame(rows, columns=engine.SURVEY_HEADER) \
+        .to_csv(engine.julian_csv("tassel_survey_data", day, folder), index=False)
+
+    # GV for ~90% of the varieties, plus the default baseline
+    has_gv = rng.random(n) < 0.9
+    gv = pd.DataFrame({"VARIETY": np.array(num, dtype=object)[has_gv]})
+    for t in TRAITS:
+        gv[t] = rng.normal(100, 15, len(gv)).round(6)
+    gv.loc[len(gv)] = [engine.BASELINES_DEFAULT[0]] + [100.0] * len(TRAITS)
+    gv["T_SPACRE"] *= 90
+    gv.to_csv(folder / SOURCES["gv"], index=False)
+
+    # past crosses among the varieties, some pairs repeated
+    m = 3 * n
+    f, ma = rng.integers(0, n, m), rng.integers(0, n, m)
+    numa = np.array(num, dtype=object)
+    pd.DataFrame({"FVARIETY": numa[f], "FEMALE": "F" + numa[f], "MVARIETY": numa[ma], "MALE": "M" + numa[ma],
+                  "XN": rng.integers(1, 5, m), "FAVGGERM": rng.random(m).round(2) * 30,
+                  "MAVGGERM": rng.random(m).round(2) * 30,
+                  "CROSS": [f"XL{y}-{k:04d}" for y, k in zip(rng.integers(10, 25, m), range(m))],
+                  "DATE": rng.integers(200, 300, m), "SEED": np.where(rng.random(m) < 0.8, (rng.random(m) * 900).round(1), np.nan),
+                  "GERM": rng.integers(0, 21, m), "SUMSEEDX": (rng.random(m) * 100).round(6),
+                  "FLS": rng.choice(["R", "S", ""], m)}) \
+        .to_csv(folder / SOURCES["crossingdataset"])
+
+    _write_amat(folder / SOURCES["amat"], std[:amat])
+    _write_paths(folder)
+    done.write_text(json.dumps({"parents": parents, "amat": amat, "seed": seed, "day": day}), encoding="utf-8")
+    return folder
+
+def fresh_copy(src, dst, rules):
+    """Inputs of a dataset in a new folder, with `rules` over the defaults."""
+    if dst.exists():
+        shutil.rmtree(dst)
+    dst.mkdir(parents=True)
+    for rel in [*SOURCES.values(), "tassle_survey_data"]:
+        (dst / rel).parent.mkdir(parents=True, exist_ok=True)
+        (shutil.copytree if (src / rel).is_dir() else shutil.copy2)(src / rel, dst / rel)
+    _write_paths(dst)
+    (dst / "rules.json").write_text(json.dumps({**engine.RULES_DEFAULT, **rules}, indent=2), encoding="utf-8")
+    return dst
+
+# -------------------- Stage timings --------------------
+def _timed(fn):
+    """(fn(), seconds)."""
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+def _traced(fn):
+    """Peak traced MB of fn()."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+def _highlights(day, base):
+    headers, columns = engine.load_crossings(day, base)
+    pos = {h: i for i, h in enumerate(headers)}
+    n = len(next(iter(columns.values()))) if columns else 0
+    typed = {}
+    def column(name):
+        if name not in typed:
+            typed[name] = TypedColumn(np.asarray(columns[pos[name]], dtype=object)) if name in pos else None
+        return typed[name]
+    return RuleSet(HIGHLIGHTS).colors(column, n)
+
+def _guarded_export(day, base, out_path):
+    """What the Export button does with EXPORT_ROWS rows selected."""
+    headers, columns = engine.load_crossings(day, base)
+    cols = [columns[i] for i in range(len(headers))]
+    f, m = cols[headers.index("FEMALE_STD")], cols[headers.index("MALE_STD")]
+    rows = np.arange(0, len(f), max(1, len(f) // EXPORT_ROWS))[:EXPORT_ROWS]
+    pairs = list(zip(np.asarray(f[rows], dtype=object), np.asarray(m[rows], dtype=object)))
+    accepted, _ = engine.guard_pairs(pairs, engine.compute_capacities(day, base))
+    engine.export_rows(out_path, headers, cols, rows[accepted])
+    engine.append_allocated([pairs[i] for i in accepted], day, base)
+    return len(accepted)
+
+def run_stages(dataset, work, day=BENCH_DAY, memory=True):
+    """{stage: {"seconds", "peak_mb", "rows"}} of a run on a fresh copy of `dataset`.
+
+    tracemalloc slows Python code several times over, so the peaks come from a
+    second run on its own copy and the timings stay untraced.
+    """
+    stages = lambda base: [
+        ("combine", lambda: len(engine.generate_combos(day, base)[0])),
+        ("match", lambda: len(engine.match_crossings(day, base)[0])),
+        ("match (outputs current)", lambda: len(engine.match_crossings(day, base)[0])),
+        ("load day", lambda: len(next(iter(engine.load_crossings(day, base)[1].values())))),
+        ("capacities", lambda: len(engine.compute_capacities(day, base))),
+        ("highlights", lambda: len(_highlights(day, base))),
+        ("guarded export", lambda: _guarded_export(day, base, base / "export.csv")),
+    ]
+    out = {}
+    for name, fn in stages(fresh_copy(Path(dataset), Path(work) / "timed", {})):
+        rows, seconds = _timed(fn)
+        out[name] = {"seconds": round(seconds, 4), "peak_mb": None, "rows": rows}
+    if memory:
+        for name, fn in stages(fresh_copy(Path(dataset), Path(work) / "traced", {})):
+            out[name]["peak_mb"] = round(_traced(fn), 1)
+    return out
+
+# -------------------- Baselines --------------------
+def load_baseline(path):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+def save_baseline(path, results):
+    """Merge {scale label: stages} into the baseline file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {**load_baseline(path), **results}
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+def compare(results, baseline, tolerance=1.25):
+    """Report lines plus the (scale, stage) entries slower than tolerance x baseline."""
+    lines, slower = [], []
+    for label, stages in results.items():
+        lines.append(f"{label}")
+        lines.append(f"  {'stage':<26}{'seconds':>10}{'peak MB':>10}{'rows':>10}{'baseline':>10}{'ratio':>8}")
+        for stage, r in stages.items():
+            b = (baseline.get(label) or {}).get(stage)
+            ratio = r["seconds"] / b["seconds"] if b and b.get("seconds") else None
+            if ratio is not None and ratio > tolerance and r["seconds"] - b["seconds"] > 0.01:
+                slower.append((label, stage))
+            peak = "-" if r["peak_mb"] is None else f"{r['peak_mb']:.1f}"
+            was = "-" if not b else f"{b['seconds']:.3f}"
+            lines.append(f"  {stage:<26}{r['seconds']:>10.3f}{peak:>10}{r['rows']:>10}{was:>10}"
+                         f"{'-' if ratio is None else f'{ratio:.2f}':>8}"
+                         + ("  slower" if (label, stage) in slower else ""))
+    return lines, slower
+
+# -------------------- Differential check --------------------
+def _sha1(path):
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+def _combine_match(day, base):
+    engine.generate_combos(day, base)
+    engine.match_crossings(day, base)
+
+def _cache_hits(day, base):
+    """Match, drop the outputs, match again: GV, CD and kinship come from the stage cache."""
+    _combine_match(day, base)
+    engine.julian_csv("possible_crossings", day, base).unlink()
+    shutil.rmtree(engine.pairs_dir(day, base))
+    engine.match_crossings(day, base)
+
+def _incremental(day, base):
+    """Match a survey without its last fifth of rows, then the whole survey incrementally."""
+    survey = engine.julian_csv("tassel_survey_data", day, base)
+    full = survey.read_text(encoding="utf-8")
+    lines = full.splitlines(True)
+    survey.write_text("".join(lines[:1 + (len(lines) - 1) * 4 // 5]), encoding="utf-8")
+    _combine_match(day, base)
+    survey.write_text(full, encoding="utf-8")
+    _combine_match(day, base)
+
+def _speculative(day, base):
+    engine.speculate_match(day, base)
+    _combine_match(day, base)
+
+VARIANTS = [   # (name, rules over the reference, run)
+    ("packed AMAT", {"amat_cache": True}, _combine_match),
+    ("parquet pairs", {"crossings_format": "parquet"}, _combine_match),
+    ("stage cache", {"stage_cache": True}, _cache_hits),
+    ("incremental", {"incremental_match": True}, _incremental),
+    ("speculative", {"speculative_match": True, "incremental_match": True}, _speculative),
+]
+
+def differential(dataset, work, day=BENCH_DAY):
+    """[(variant, sha1 of its Possible_crossings, matches the reference)]; the reference comes first."""
+    dataset, work = Path(dataset), Path(work)
+    out_path = lambda base: engine.julian_csv("possible_crossings", day, base)
+    ref = fresh_copy(dataset, work / "reference", REFERENCE_RULES)
+    _combine_match(day, ref)
+    want = _sha1(out_path(ref))
+    results = [("reference", want, True)]
+    for name, rules, run in VARIANTS:
+        base = fresh_copy(dataset, work / name.replace(" ", "_"), {**REFERENCE_RULES, **rules})
+        run(day, base)
+        got = _sha1(out_path(base))
+        results.append((name, got, got == want))
+    return results
+
+def golden(work, folder=GOLDEN, day=GOLDEN_DAY):
+    """(sha1 of the Possible_crossings written here, same lines as the recorded one) for the golden day.
+
+    `folder` holds the day's inputs and Possible_crossings_<day>.csv as the
+    original matcher wrote it; the run uses the default rules.
+    """
+    folder = Path(folder)
+    base = fresh_copy(folder, Path(work), {})
+    _combine_match(day, base)
+    out = engine.julian_csv("possible_crossings", day, base)
+    lines = lambda path: Path(path).read_text(encoding="utf-8").splitlines()   # checkouts may turn LF into CRLF
+    return _sha1(out), lines(out) == lines(folder / f"Possible_crossings_{day}.csv")
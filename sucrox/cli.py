@@ -0,0 +1,137 @@
+"""Headless entry point: `python -m sucrox {combine,match,allocate,...,bench}`."""
+import sys, argparse
+from pathlib import Path
+
+from sucrox import engine
+
+def _cmd_combine(args):
+    try:
+        combos, tassles = engine.generate_combos(args.day, args.base)
+    except FileNotFoundError as e:
+        print(f"No tassel survey CSV yet: {e}"); return 1
+    print(f"Generated {len(combos)} combinations and tassel totals for {len(tassles)} varieties."
+          f" | Cache: {combos.attrs.get('cache', 'off')}")
+    return 0
+
+def _cmd_match(args):
+    try:
+        out_df, attached = engine.match_crossings(args.day, args.base)
+    except FileNotFoundError as e:
+        print(f"Generate combinations first: {e}"); return 1
+    print(engine.match_status(out_df, attached, engine.julian_csv("possible_crossings", args.day, args.base)))
+    return 0
+
+def _cmd_allocate(args):
+    try:
+        n, skipped = engine.allocate(args.selected, args.out, args.day, args.base)
+    except ValueError as e:
+        print(e); return 1
+    for i, reason in skipped:
+        print(f"Row {i+1}: {reason}")
+    if not n:
+        print("None of the selected rows fit remaining availability."); return 1
+    print(f"Exported {n} rows → {Path(args.out).name}" + (f" (skipped {len(skipped)})" if skipped else ""))
+    return 0
+
+def _cmd_suggest(args):
+    try:
+        n = engine.suggest(args.out, args.day, args.base)
+    except FileNotFoundError as e:
+        print(f"Match crossings first: {e}"); return 1
+    print(f"Suggested {n} crosses → {Path(args.out).name}")
+    return 0
+
+def _cmd_partners(args):
+    try:
+        res = engine.top_partners(args.parent, args.k, args.side, args.day, args.base)
+    except FileNotFoundError as e:
+        print(f"Match crossings first: {e}"); return 1
+    if res.empty:
+        print(f"'{args.parent}' is not a parent in the day's crosses."); return 1
+    print(res.to_string(index=False))
+    return 0
+
+def _cmd_history(args):
+    store = engine.season_history(args.base)
+    if args.sql:
+        print(store.query(args.sql).to_string(index=False))
+        return 0
+    if not args.variety:
+        print("Days with allocations:", ", ".join(map(str, store.days())) or "none")
+        return 0
+    for k, v in store.usage(engine.variety_registry(base=args.base).std(args.variety)).items():
+        print(f"{k}: {', '.join(map(str, v)) if isinstance(v, list) else v}")
+    return 0
+
+def _cmd_bench(args):
+    from sucrox import bench
+    work = args.work or engine.BASE_DIR / engine.CACHE_DIRNAME / "bench"
+    baseline = args.baseline or work / "baseline.json"
+    scales = [tuple(int(x) for x in s.split(":")) for s in args.scale] if args.scale else bench.SCALES
+    results, status = {}, 0
+    if args.diff:
+        sha, same = bench.golden(work / "diff" / "golden")
+        print(f"day {bench.GOLDEN_DAY}  {'original':<14} {sha[:12]}  {'identical' if same else 'DIFFERENT'}")
+        status |= not same
+    for parents, amat in scales:
+        label = bench.scale_label(parents, amat)
+        data = bench.make_dataset(work / "data" / f"{label}-s{args.seed}", parents, amat, args.seed)
+        if args.diff:
+            for name, sha, same in bench.differential(data, work / "diff" / label):
+                print(f"{label}  {name:<14} {sha[:12]}  {'identical' if same else 'DIFFERENT'}")
+                status |= not same
+        results[label] = bench.run_stages(data, work / "run" / label, memory=not args.no_memory)
+    lines, slower = bench.compare(results, bench.load_baseline(baseline), args.tolerance)
+    print("\n".join(lines))
+    if args.save_baseline:
+        bench.save_baseline(baseline, results)
+        print(f"Baseline saved → {baseline}")
+    elif slower:
+        print(f"{len(slower)} stage(s) slower than {args.tolerance}x the baseline")
+        status = 1
+    return status
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="sucrox", description="SucroX crossing pipeline without the GUI.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--day", type=int, default=None, help="Julian day (default: today)")
+    common.add_argument("--base", type=Path, default=None, help="SucroX data folder (default: repo root)")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("combine", parents=[common], help="survey -> Combinations_<day>.csv + Tassles_<day>.csv") \
+        .set_defaults(func=_cmd_combine)
+    sub.add_parser("match", parents=[common], help="Combinations -> Possible_crossings_<day>.csv") \
+        .set_defaults(func=_cmd_match)
+    a = sub.add_parser("allocate", parents=[common], help="guarded export of selected crossing rows")
+    a.add_argument("selected", type=Path, help="CSV of selected Possible_crossings rows")
+    a.add_argument("-o", "--out", type=Path, required=True, help="export CSV to write")
+    a.set_defaults(func=_cmd_allocate)
+    s = sub.add_parser("suggest", parents=[common], help="Auto-allocate: best crosses for the remaining capacity")
+    s.add_argument("-o", "--out", type=Path, required=True, help="CSV of suggested rows (input for allocate)")
+    s.set_defaults(func=_cmd_suggest)
+    t = sub.add_parser("partners", parents=[common], help="best K partners of one parent (Auto-allocate score)")
+    t.add_argument("parent", help="STD variety")
+    t.add_argument("-k", type=int, default=5, help="how many partners (default 5)")
+    t.add_argument("--side", choices=["F", "M"], default=None, help="parent's sex (default: female if present)")
+    t.set_defaults(func=_cmd_partners)
+    h = sub.add_parser("history", parents=[common], help="season history across all days (season_history.sqlite)")
+    h.add_argument("variety", nargs="?", help="STD variety to summarize (default: list days)")
+    h.add_argument("--sql", help="run a SELECT over the survey / tassles / combinations / allocated tables")
+    h.set_defaults(func=_cmd_history)
+    b = sub.add_parser("bench", help="time each stage on synthetic data (and check optimized paths with --diff)")
+    b.add_argument("--scale", action="append", metavar="PARENTS:AMAT",
+                   help="parents per sex and AMAT varieties, repeatable (default: 10:200, 100:1000, 500:2000)")
+    b.add_argument("--seed", type=int, default=0, help="synthetic data seed")
+    b.add_argument("--work", type=Path, default=None, help="folder for data and runs (default: .sucrox_cache/bench)")
+    b.add_argument("--baseline", type=Path, default=None, help="baseline JSON (default: <work>/baseline.json)")
+    b.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    b.add_argument("--tolerance", type=float, default=1.25, help="slower than this x baseline fails (default 1.25)")
+    b.add_argument("--no-memory", action="store_true", help="skip the second, tracemalloc-traced run")
+    b.add_argument("--diff", action="store_true",
+                   help="check the sample day against the original matcher and optimized paths against the reference")
+    b.set_defaults(func=_cmd_bench)
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sys.exit(args.func(args))
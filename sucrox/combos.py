@@ -0,0 +1,65 @@
+"""The day's female x male combinations, kept as their two parent lists.
+
+The product is only materialized in chunks of at most `chunk` rows, so writing
+Combinations_<day>.csv costs memory in proportion to the parents, not the pairs.
+Parents are deduplicated by canonical (STD) variety before the product: two
+AVARIETY spellings of one variety give one parent, under its canonical spelling
+(sucrox.varieties).
+"""
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+COMBO_CHUNK = 200000   # pairs per chunk
+
+def canonical_parents(avars, resolve):
+    """[(AVARIETY, STD, NUMVAR)], one per STD variety, in first-seen order.
+
+    resolve(name) -> (AVARIETY, STD, NUMVAR) of a spelling (VarietyRegistry.resolve).
+    """
+    seen = {}
+    for av in avars:
+        ids = resolve(av)
+        seen.setdefault(ids[1], ids)
+    return list(seen.values())
+
+class ParentProduct:
+    """females x males in female-major order, with the Combinations column layout."""
+
+    def __init__(self, females, males, columns):
+        self.females = np.array(females, dtype=object).reshape(-1, 3)
+        self.males = np.array(males, dtype=object).reshape(-1, 3)
+        self.columns = list(columns)   # FEMALE_AVAR, MALE_AVAR, FEMALE_STD, MALE_STD, FEMALE_NUMVAR, MALE_NUMVAR
+        self.attrs = {}
+
+    def __len__(self):
+        return len(self.females) * len(self.males)
+
+    def chunks(self, chunk=COMBO_CHUNK):
+        """DataFrames of whole females' rows, each at most max(chunk, #males) rows."""
+        f, m = self.females, self.males
+        per = max(1, chunk // max(1, len(m)))
+        for a in range(0, len(f), per):
+            fb = f[a:a + per]
+            fi = np.repeat(np.arange(len(fb)), len(m))
+            mi = np.tile(np.arange(len(m)), len(fb))
+            yield pd.DataFrame({col: (fb[fi, k // 2] if k % 2 == 0 else m[mi, k // 2])
+                                for k, col in enumerate(self.columns)})
+
+    def to_frame(self):
+        parts = list(self.chunks())
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=self.columns)
+
+    def to_csv(self, path, chunk=COMBO_CHUNK):
+        """Write the combinations chunk by chunk; the file is replaced only once complete."""
+        path = Path(path)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", newline="", encoding="utf-8") as fh:
+            first = True
+            for part in self.chunks(chunk):
+                part.to_csv(fh, index=False, header=first)
+                first = False
+            if first:
+                pd.DataFrame(columns=self.columns).to_csv(fh, index=False)
+        os.replace(tmp, path)
@@ -0,0 +1,141 @@
+"""Process-wide cache for rules.json, paths.json and column_groups.json.
+
+Reads are served from memory. The files are stat()ed at most every `recheck`
+seconds (or on `check(force=True)`, e.g. from a file watcher) and re-parsed
+only when their mtime/size moved. Writes update memory immediately, notify
+subscribers, and reach disk atomically after a short debounce; pending writes
+are flushed at exit. Reads never write: values a resolver fills in stay in
+memory until the next set().
+
+Subscribers are called on the thread that noticed the change (a set(), or a
+get()/check() that re-read a file), which may be a worker thread.
+"""
+import os, json, copy, time, atexit, weakref, threading
+from pathlib import Path
+
+FILES = {"rules": "rules.json", "paths": "paths.json", "groups": "column_groups.json"}
+_stores = weakref.WeakSet()   # every live ConfigStore, flushed once at exit
+
+@atexit.register
+def _flush_all():
+    for store in list(_stores):
+        store.flush()
+
+class ConfigStore:
+    def __init__(self, base, defaults, resolvers=None, recheck=1.0, write_delay=0.5):
+        self.base = Path(base)
+        self.defaults = defaults            # name -> default dict
+        self.resolvers = resolvers or {}    # name -> fn(data) -> data, applied after each load
+        self.recheck = recheck
+        self.write_delay = write_delay
+        self._data, self._stamp, self._checked = {}, {}, {}
+        self._timers = {}
+        self._subs = []
+        self._lock = threading.RLock()
+        _stores.add(self)
+
+    def path(self, name):
+        return self.base / FILES[name]
+
+    def _stat(self, name):
+        try:
+            st = os.stat(self.path(name))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    # ---- reads ----
+    def get(self, name):
+        """Deep copy of the cached config (safe to mutate and pass back to set())."""
+        self.check(name)
+        with self._lock:
+            return copy.deepcopy(self._data[name])
+
+    def check(self, name=None, force=False):
+        """Re-load files that changed on disk and notify subscribers about them."""
+        changed = []
+        with self._lock:
+            for n in ([name] if name else list(FILES)):
+                now = time.monotonic()
+                if not force and n in self._data and now - self._checked.get(n, 0) < self.recheck:
+                    continue
+                self._checked[n] = now
+                if n in self._timers:
+                    continue  # our own write is pending; memory is newer than disk
+                stamp = self._stat(n)
+                if n in self._data and stamp == self._stamp.get(n):
+                    continue
+                if n in self._data:
+                    changed.append(n)
+                self._load(n, stamp)
+        for n in changed:
+            self._notify(n)
+
+    def _load(self, name, stamp):
+        data = None
+        try:
+            if stamp is not None:
+                data = json.loads(self.path(name).read_text(encoding="utf-8"))
+        except Exception:
+            pass
+        if data is None:
+            data = copy.deepcopy(self.defaults.get(name, {}))
+        self._stamp[name] = stamp
+        resolve = self.resolvers.get(name)
+        self._data[name] = resolve(copy.deepcopy(data)) if resolve else data
+
+    # ---- writes ----
+    def set(self, name, data, delay=None):
+        """Replace a config in memory, notify subscribers, write it to disk after `delay` seconds."""
+        with self._lock:
+            self._data[name] = copy.deepcopy(data)
+            self._schedule(name, self.write_delay if delay is None else delay)
+        self._notify(name)
+
+    def _schedule(self, name, delay):
+        t = self._timers.pop(name, None)
+        if t:
+            t.cancel()
+        if delay <= 0:
+            self._write(name)
+            return
+        t = threading.Timer(delay, self._write, [name])
+        t.daemon = True
+        self._timers[name] = t
+        t.start()
+
+    def _write(self, name):
+        with self._lock:
+            self._timers.pop(name, None)
+            text = json.dumps(self._data[name], indent=2)
+            path = self.path(name)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)
+            self._stamp[name] = self._stat(name)
+
+    def flush(self):
+        """Write every pending config now."""
+        with self._lock:
+            for name in list(self._timers):
+                self._timers.pop(name).cancel()
+                self._write(name)
+
+    # ---- notifications ----
+    def subscribe(self, callback):
+        """callback(name, data) after a config changes (set() here or an edit on disk)."""
+        self._subs.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._subs:
+            self._subs.remove(callback)
+
+    def _notify(self, name):
+        with self._lock:
+            data = self._data.get(name)
+        for cb in list(self._subs):
+            try:
+                cb(name, copy.deepcopy(data))
+            except Exception:
+                pass
@@ -0,0 +1,1382 @@
+"""Qt-free crossing pipeline: tassel survey -> combinations -> possible crossings -> allocation.
+
+Everything here works on plain files under a base directory (the repo root by
+default) so it can be driven from the GUI, the `python -m sucrox` CLI or a
+headless batch job alike.
+"""
+import io, os, re, csv, json, time, datetime, threading
+from pathlib import Path
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from sucrox.config import ConfigStore
+from sucrox.kinship import load_kinship
+from sucrox.gv import GVTable, BASELINES_DEFAULT
+from sucrox.pairs import PairTable, INDEX, as_text
+from sucrox.combos import ParentProduct, canonical_parents
+from sucrox.assign import ALLOCATION_DEFAULT, pair_scores, max_weight_flow
+from sucrox.history import HistoryStore
+from sucrox.varieties import VarietyRegistry
+from sucrox.stagecache import StageCache, MISSING, frame_key, digest
+
+# -------------------- Date & paths --------------------
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+GROUPS_PATH = BASE_DIR / "column_groups.json"
+PATHS_PATH  = BASE_DIR / "paths.json"
+RULES_PATH  = BASE_DIR / "rules.json"
+CACHE_DIRNAME = ".sucrox_cache"   # derived binary stores (packed AMAT, ...)
+HISTORY_FILENAME = "season_history.sqlite"   # season-long index of the dated CSVs (sucrox.history)
+ALIAS_FILENAME = "alias_map.json"            # extra variety spellings -> STDVARIETY (sucrox.varieties)
+
+GROUPS_DEFAULT = {}
+PATHS_DEFAULT = {
+    "photoperiod": str(BASE_DIR / "Photoperiod_Pos_2025.csv"),
+    "crossingdataset": str(BASE_DIR / "ZT_CrossingDataset.csv"),
+    "gv": str(BASE_DIR / "ZT_GVs_1.4.csv"),
+    "amat": str(BASE_DIR / "AMAT_25.csv"),
+}
+RULES_DEFAULT = {
+    "females_per_male": 1,
+    "males_per_female": 1,
+    "hidden_columns": [],
+    "highlight_rules": [],
+    "display_names": {},
+    "column_order": [],  # preferred order of original CSV headers
+    "gv_baselines": list(BASELINES_DEFAULT),  # GV VARIETY ids for the *_PCT_<id> columns
+    "write_wide_crossings": True,             # also expand the pairs into Possible_crossings_<day>.csv
+    "crossings_format": "csv",                # pairs folder tables: "csv" or "parquet" (needs pyarrow)
+    "stage_cache": True,                      # reuse combine/match stage results when inputs are unchanged
+    "incremental_match": True,                # enrich only parents/pairs new since the last match
+    "speculative_match": True,                # GUI: enrich in the background after each survey entry
+    "exclusions": {},                         # hard exclusions applied before matching (EXCLUSIONS_DEFAULT)
+    "allocation": {},                         # Auto-allocate score and mode (sucrox.assign.ALLOCATION_DEFAULT)
+    "pair_history": False,                    # opt-in PAIR_CD_* columns (past crosses of each pair), after KINSHIP
+    "amat_cache": True,                       # packed float64 AMAT for the KINSHIP exclusion / partner ranking;
+                                              # Possible_crossings always keeps the AMAT's CSV text
+}
+
+EXCLUSIONS_DEFAULT = {
+    "max_kinship": None,       # drop pairs whose KINSHIP is above this ceiling
+    "same_variety": False,     # drop selfs (FEMALE_STD == MALE_STD)
+    "same_family": False,      # drop pairs whose parents share a family ...
+    "family_column": "FAMILY", # ... as given by this Photoperiod column
+    "made_crosses": False,     # drop pairs in allocated_<day>.csv or already in the CrossingDataset
+    "zero_capacity": False,    # drop pairs with a parent that has no rule-adjusted capacity left
+}
+
+COMBO_COLUMNS = ["FEMALE_AVAR", "MALE_AVAR", "FEMALE_STD", "MALE_STD", "FEMALE_NUMVAR", "MALE_NUMVAR"]
+SURVEY_HEADER = ["AVARIETY", "STDVARIETY", "Can", "Cart", "Bay", "#Tas", "Pollen Rating", "Sex"]
+
+class Cancelled(BaseException):
+    """Raised by a progress callback to stop a long run.
+
+    A BaseException, so the pipeline's broad `except Exception` fallbacks do
+    not swallow it. Runs are only stopped before they write anything.
+    """
+
+def _step(progress, label, fraction=None):
+    """Report a stage to progress(label, fraction) (fraction None: unknown); it may raise Cancelled."""
+    if progress is not None:
+        progress(label, fraction)
+
+def _uncancellable(progress):
+    """progress for steps that must finish once started: cancel requests are ignored."""
+    def step(label, fraction=None):
+        try:
+            _step(progress, label, fraction)
+        except Cancelled:
+            pass
+    return step
+
+def julian_day(d=None):
+    d = d or datetime.date.today()
+    return d.toordinal() - datetime.date(d.year, 1, 1).toordinal() + 1
+
+def julian_csv(prefix, day=None, base=None):
+    day = julian_day() if day is None else int(day)
+    base = Path(base) if base else BASE_DIR
+    mapping = {
+        "tassel_survey_data": base / "tassle_survey_data" / f"tassel_survey_data_{day}.csv",
+        "tassles": base / "Tassles" / f"Tassles_{day}.csv",
+        "combinations": base / "Combinations" / f"Combinations_{day}.csv",
+        "possible_crossings": base / "Crosses for the day" / f"Possible_crossings_{day}.csv",
+        "allocated": base / "Crosses for the day" / f"allocated_{day}.csv",
+    }
+    return mapping[prefix]
+
+# -------------------- util functions --------------------
+def ensure_dirs(base=None):
+    base = Path(base) if base else BASE_DIR
+    for rel in ["tassle_survey_data", "Tassles", "Combinations",
+                "Crosses for the day", "Photoperiod_Pos", "CrossingDataset"]:
+        (base / rel).mkdir(parents=True, exist_ok=True)
+
+def write_json(path, data):
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+def _resolve_paths(paths, base):
+    """Fill each data source with the first candidate that exists."""
+    def _first_existing(cands):
+        for c in cands:
+            if not c:
+                continue
+            p = Path(c)
+            if p.exists():
+                return str(p)
+        return cands[0] if cands else ""
+    paths["photoperiod"] = _first_existing([
+        paths.get("photoperiod",""), str(base / "Photoperiod_Pos_2025.csv"),
+        str(base / "Photoperiod_Pos" / "Photoperiod_Pos_2025.csv")
+    ])
+    paths["crossingdataset"] = _first_existing([
+        paths.get("crossingdataset",""), str(base / "ZT_CrossingDataset.csv"),
+        str(base / "CrossingDataset" / "ZT_CrossingDataset.csv")
+    ])
+    paths["gv"] = _first_existing([paths.get("gv",""), str(base / "ZT_GVs_1.4.csv")])
+    paths["amat"] = _first_existing([paths.get("amat",""), str(base / "AMAT_25.csv")])
+    return paths
+
+_stores = {}
+
+def config_store(base=None):
+    """The shared ConfigStore for a data folder (rules / paths / groups)."""
+    base = (Path(base) if base else BASE_DIR).resolve()
+    if base not in _stores:
+        _stores[base] = ConfigStore(
+            base,
+            {"rules": RULES_DEFAULT, "paths": PATHS_DEFAULT, "groups": GROUPS_DEFAULT},
+            resolvers={"paths": lambda d: _resolve_paths(d, base)},
+        )
+    return _stores[base]
+
+def get_paths(base=None):
+    return config_store(base).get("paths")
+
+def save_paths(d, base=None):
+    config_store(base).set("paths", d)
+
+def get_rules(base=None):
+    return config_store(base).get("rules")
+
+def save_rules(d, base=None):
+    config_store(base).set("rules", d)
+
+def load_groups(base=None):
+    return config_store(base).get("groups")
+
+def save_groups(groups, base=None):
+    config_store(base).set("groups", groups)
+
+_registries = {}                  # (photoperiod, alias map) -> (their stamps, VarietyRegistry)
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def variety_registry(pp_path=None, base=None):
+    """VarietyRegistry of the Photoperiod file and <base>/alias_map.json, rebuilt only when either changes.
+
+    Every variety join and lookup resolves ids through it (see sucrox.varieties).
+    """
+    pp_path = Path(pp_path) if pp_path else Path(get_paths(base)["photoperiod"])
+    alias_path = (Path(base) if base else BASE_DIR) / ALIAS_FILENAME
+    key = (str(pp_path), str(alias_path))
+    stamp = (_file_stamp(pp_path), _file_stamp(alias_path))
+    hit = _registries.get(key)
+    if hit is None or hit[0] != stamp:
+        hit = _registries[key] = (stamp, VarietyRegistry.load(pp_path, alias_path))
+    return hit[1]
+
+def safe_upper_strip(s):
+    return str(s or "").strip().upper()
+
+def reorder_headers(csv_headers, preferred_order):
+    """Return csv_headers reordered by preferred_order (unknown headers appended)."""
+    pref = [h for h in (preferred_order or []) if h in csv_headers]
+    rest = [h for h in csv_headers if h not in pref]
+    return pref + rest
+
+def pollen_to_sex(p):
+    if 1<=p<=4: return "male"
+    if 5<=p<=10: return "female"
+    return "unknown"
+
+# -------------------- Survey -> Combinations --------------------
+def read_survey_totals(survey_path: Path):
+    """Sum #Tas per AVARIETY for each sex -> (female_avar, male_avar)."""
+    male_avar, female_avar = defaultdict(int), defaultdict(int)
+    with open(survey_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            avar = (row.get("AVARIETY", "") or "").strip()
+            sex = (row.get("Sex", "") or "").lower()
+            try:
+                tas = int(row.get("#Tas", "0"))
+            except Exception:
+                tas = 0
+
+            if sex == "female":
+                female_avar[avar] += tas
+            elif sex == "male":
+                male_avar[avar] += tas
+    return female_avar, male_avar
+
+def stage_cache(base=None, rules=None):
+    """StageCache under <base>/.sucrox_cache (disabled by rules "stage_cache": false)."""
+    rules = rules if rules is not None else get_rules(base)
+    return StageCache((Path(base) if base else BASE_DIR) / CACHE_DIRNAME,
+                      enabled=rules.get("stage_cache", True))
+
+def _combos_from_survey(in_file, pp_path, base=None):
+    with ThreadPoolExecutor(max_workers=1) as pool:   # survey and Photoperiod read side by side
+        totals = pool.submit(read_survey_totals, in_file)
+        reg = variety_registry(pp_path, base)
+        female_avar, male_avar = totals.result()
+
+    # one parent per STD variety; the pairs themselves are only built when written
+    combos = ParentProduct(canonical_parents(female_avar, reg.resolve),
+                           canonical_parents(male_avar, reg.resolve), COMBO_COLUMNS)
+
+    # Totals by STD
+    female_std = defaultdict(int); male_std = defaultdict(int)
+    for av, cnt in female_avar.items():
+        female_std[reg.std(av)] += cnt
+    for av, cnt in male_avar.items():
+        male_std[reg.std(av)] += cnt
+    all_std = set(list(male_std.keys()) + list(female_std.keys()))
+    tassles_df = pd.DataFrame({
+        "STDVARIETY": list(all_std),
+        "MALE TASSLES": [male_std.get(v, 0) for v in all_std],
+        "FEMALE TASSLES": [female_std.get(v, 0) for v in all_std],
+    })
+    return combos, tassles_df
+
+def _survey_combos(in_file, pp_path, cache, base=None):
+    alias_path = (Path(base) if base else BASE_DIR) / ALIAS_FILENAME
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        key = cache.key("combos", "parents", *pool.map(cache.file_key, [in_file, pp_path, alias_path]))
+    return cache.cached("combos", key, lambda: _combos_from_survey(in_file, pp_path, base))
+
+def generate_combos(day=None, base=None):
+    """Write Combinations_<day>.csv and Tassles_<day>.csv from the day's tassel survey.
+
+    Returns (combos, tassles_df): combos is a sucrox.combos.ParentProduct, written
+    to the CSV in chunks; combos.attrs["cache"] is "hit" when the survey and
+    Photoperiod file were unchanged since a previous run.
+    Raises FileNotFoundError when there is no survey yet.
+    """
+    ensure_dirs(base)
+    in_file = julian_csv("tassel_survey_data", day, base)
+    if not in_file.exists():
+        raise FileNotFoundError(in_file)
+
+    cache = stage_cache(base)
+    combos, tassles_df = _survey_combos(in_file, Path(get_paths(base)["photoperiod"]), cache, base)
+
+    combos.to_csv(julian_csv("combinations", day, base))
+    tassles_df.to_csv(julian_csv("tassles", day, base), index=False)
+    combos.attrs["cache"] = cache.report["combos"]
+    return combos, tassles_df
+
+# -------------------- Hard exclusions --------------------
+def exclusion_rules(rules=None, base=None):
+    """rules "exclusions" over EXCLUSIONS_DEFAULT, max_kinship as a float or None.
+
+    A max_kinship that is not a number is switched off and reported under "errors".
+    """
+    rules = rules if rules is not None else get_rules(base)
+    ex = {**EXCLUSIONS_DEFAULT, **(rules.get("exclusions") or {}), "errors": {}}
+    if isinstance(ex["max_kinship"], str) and not ex["max_kinship"].strip():
+        ex["max_kinship"] = None
+    if ex["max_kinship"] is not None:
+        try:
+            ex["max_kinship"] = float(ex["max_kinship"])
+        except (TypeError, ValueError):
+            ex["errors"]["kinship"] = f"max_kinship {ex['max_kinship']!r} is not a number"
+            ex["max_kinship"] = None
+    return ex
+
+def _families(pp_path, column, reg):
+    """{STDVARIETY: family} from the Photoperiod file ({} when it has no such column)."""
+    df = pd.read_csv(pp_path, dtype=str).fillna("")
+    cols = {c.upper().strip(): c for c in df.columns}
+    s, fam = cols.get("STDVARIETY"), cols.get(str(column).upper().strip())
+    if not (s and fam):
+        return {}
+    return {k: v for k, v in zip(reg.std_of(df[s]), df[fam].str.strip()) if k and v}
+
+def _made_pairs(cd_path, reg):
+    """MultiIndex of (FVARIETY, MVARIETY) NUMVAR pairs recorded in the CrossingDataset."""
+    cdf = pd.read_csv(cd_path, dtype=str).fillna("")
+    cdf.columns = [safe_upper_strip(c) for c in cdf.columns]
+    return pd.MultiIndex.from_arrays([reg.numvar_of(cdf["FVARIETY"]), reg.numvar_of(cdf["MVARIETY"])])
+
+def _exclude(combos, rules, paths, day, base, progress=None):
+    """Drop the pairs ruled out by rules "exclusions", before anything is joined to them.
+
+    Cheap tests run first; KINSHIP is only looked up for the pairs still left.
+    A test that fails (bad setting, unreadable source) drops nothing and is
+    reported. Returns (combos, {reason: pairs dropped}, {reason: why it failed}).
+    """
+    ex = exclusion_rules(rules)
+    failed = dict(ex["errors"])
+    if not (ex["same_variety"] or ex["same_family"] or ex["made_crosses"] or ex["zero_capacity"]
+            or ex["max_kinship"] is not None):
+        return combos, {}, failed
+    _step(progress, "Applying exclusions", 0.03)
+    reg = variety_registry(paths["photoperiod"], base)
+    fstd, mstd = combos["FEMALE_STD"].to_numpy(dtype=object), combos["MALE_STD"].to_numpy(dtype=object)
+    keep = np.ones(len(combos), dtype=bool)
+    dropped = {}
+
+    def drop(reason, test):
+        try:
+            bad = np.asarray(test(), dtype=bool) & keep
+        except Exception as e:
+            failed[reason] = str(e) or type(e).__name__
+            return
+        if bad.any():
+            dropped[reason] = dropped.get(reason, 0) + int(bad.sum())
+            keep[bad] = False
+
+    if ex["same_variety"]:
+        drop("same variety", lambda: pd.Series(fstd).str.upper().to_numpy() == pd.Series(mstd).str.upper().to_numpy())
+    if ex["same_family"]:
+        def same_family():
+            fam = _families(Path(paths["photoperiod"]), ex["family_column"], reg)
+            f, m = pd.Series(fstd).map(fam), pd.Series(mstd).map(fam)
+            return (f.notna() & (f == m)).to_numpy()
+        drop("same family", same_family)
+    if ex["made_crosses"]:
+        drop("already made", lambda: pd.MultiIndex.from_arrays([fstd, mstd]).isin(load_allocated_pairs(day, base)))
+        drop("already made", lambda: pd.MultiIndex.from_arrays(
+            [combos["FEMALE_NUMVAR"], combos["MALE_NUMVAR"]]).isin(_made_pairs(Path(paths["crossingdataset"]), reg)))
+    if ex["zero_capacity"]:
+        def no_capacity():
+            caps = CapacityLedger.for_day(day, base).capacities()
+            f_ok = pd.Series(fstd).map({v: d["female_cap"] > 0 for v, d in caps.items()}).eq(True).to_numpy()
+            m_ok = pd.Series(mstd).map({v: d["male_cap"] > 0 for v, d in caps.items()}).eq(True).to_numpy()
+            return ~(f_ok & m_ok)
+        drop("no capacity", no_capacity)
+    if ex["max_kinship"] is not None and keep.any():
+        def too_close():
+            ceiling = ex["max_kinship"]
+            rows = np.flatnonzero(keep)
+            kin = _load_kinship(Path(paths["amat"]), base, rules.get("amat_cache", True), combos.iloc[rows], reg)
+            values = pd.to_numeric(pd.Series(kin.gather(fstd[rows], mstd[rows])), errors="coerce").to_numpy()
+            bad = np.zeros(len(combos), dtype=bool)
+            bad[rows] = values > ceiling   # unknown KINSHIP is kept
+            return bad
+        drop("kinship", too_close)
+    if keep.all():
+        return combos, dropped, failed
+    return combos[keep].reset_index(drop=True), dropped, failed
+
+# -------------------- Combinations -> Possible crossings --------------------
+LOAD_WORKERS = 4                  # threads reading match sources (GV, CD, AMAT) side by side
+PARENT_KEYS = {"F": [c for c in COMBO_COLUMNS if c.startswith("FEMALE_")],
+               "M": [c for c in COMBO_COLUMNS if c.startswith("MALE_")]}
+_recent = {}                      # wide CSV path -> (inputs, combos key, table, attached) of the last enrichment
+_recent_lock = threading.Lock()   # guards _recent and _match_epoch only, never held while enriching
+_match_epoch = 0                  # bumped by each match_crossings: older speculations stop and are discarded
+
+def pairs_dir(day=None, base=None):
+    """Folder holding the normalized Possible_crossings (see sucrox.pairs)."""
+    p = julian_csv("possible_crossings", day, base)
+    return p.with_name(p.stem + ".pairs")
+
+def _merge_new(df, other, **kw):
+    """df.merge(other, how="left") plus the names of the columns it added."""
+    before = list(df.columns)
+    df = df.merge(other, how="left", **kw)
+    return df, [c for c in df.columns if c not in before]
+
+def _join_gv(parents, gv, baselines):
+    """Stage: GV traits and % of baselines onto both parent tables (gv: a loaded GVTable).
+
+    Returns (parents, trait layout, pct layout, attached, {baseline: why} for
+    baselines whose % columns could not be computed).
+    """
+    if "VARIETY" not in gv.frame.columns:
+        return parents, [], [], False, {}
+    parents = dict(parents)
+    gv_rows, added = {}, {"F": [], "M": []}
+    for s, side in (("F", "FEMALE"), ("M", "MALE")):
+        before = list(parents[s].columns)
+        parents[s], gv_rows[side] = gv.merge_side(parents[s], side)
+        added[s] = [c for c in parents[s].columns if c not in before]
+    pct, failed = [], {}
+    for b in baselines:
+        try:
+            cols = gv.pct_columns([b], gv_rows)
+        except Exception as e:
+            failed[str(b)] = str(e) or type(e).__name__
+            continue
+        for name, side, values in cols:
+            parents[side[0]][name] = values
+            pct.append((name, side[0]))
+    return parents, [(c, "F") for c in added["F"]] + [(c, "M") for c in added["M"]], pct, True, failed
+
+def _load_cd(cd_path, reg):
+    """CrossingDataset collapsed to one row per parent: {"F": female table, "M": male table}.
+
+    Female columns exclude ^M, male columns exclude ^F; a side is None when its
+    FVARIETY / MVARIETY column is missing. Parent ids are canonical NUMVARs.
+    """
+    cdf = pd.read_csv(cd_path, dtype=str).fillna("")
+    cdf.columns = [safe_upper_strip(c) for c in cdf.columns]
+    tables = {}
+    for s, side, key, skip in (("F", "FEMALE", "FVARIETY", "M"), ("M", "MALE", "MVARIETY", "F")):
+        if key not in cdf.columns:
+            tables[s] = None
+            continue
+        cdf[key] = reg.numvar_of(cdf[key])
+        tbl = cdf[[c for c in cdf.columns if not c.startswith(skip)]].copy().groupby(key, as_index=False).first()
+        tbl.rename(columns={c: (f"{side}_CD_{c}" if c != key else c) for c in tbl.columns}, inplace=True)
+        tables[s] = tbl
+    return tables
+
+def _join_cd(parents, cd):
+    """Stage: per-parent CrossingDataset traits (cd: from _load_cd).
+
+    Returns (parents, layout, attached).
+    """
+    parents = dict(parents)
+    layout = []
+    for s, side, key in (("F", "FEMALE", "FVARIETY"), ("M", "MALE", "MVARIETY")):
+        if cd[s] is not None:
+            parents[s], new = _merge_new(parents[s], cd[s], left_on=f"{side}_NUMVAR", right_on=key)
+            layout += [(c, s) for c in new]
+    return parents, layout, cd["F"] is not None or cd["M"] is not None
+
+PAIR_HISTORY_MEANS = {"SEED": "PAIR_CD_MEAN_SEED", "GERM": "PAIR_CD_MEAN_GERM", "SUMSEEDX": "PAIR_CD_MEAN_SUMSEEDX"}
+
+def _pair_history(cd_path, reg):
+    """Every past cross of each exact (female, male) pair in the CrossingDataset, aggregated.
+
+    DataFrame indexed by (FVARIETY, MVARIETY) canonical NUMVARs: PAIR_CD_CROSSES
+    (count), PAIR_CD_LAST_CROSS / PAIR_CD_LAST_DATE of the latest cross (by the
+    season in its CROSS code, XL17-..., then its DATE day, then file order) and
+    PAIR_CD_MEAN_SEED / _GERM / _SUMSEEDX over the crosses that have a value.
+    None when the file has no FVARIETY / MVARIETY.
+    """
+    cdf = pd.read_csv(cd_path, dtype=str).fillna("")
+    cdf.columns = [safe_upper_strip(c) for c in cdf.columns]
+    if not {"FVARIETY", "MVARIETY"} <= set(cdf.columns):
+        return None
+    key = pd.MultiIndex.from_arrays([reg.numvar_of(cdf["FVARIETY"]), reg.numvar_of(cdf["MVARIETY"])],
+                                    names=["FVARIETY", "MVARIETY"])
+    col = lambda c: cdf[c].str.strip() if c in cdf.columns else pd.Series("", index=cdf.index)
+    season = pd.to_numeric(col("CROSS").str.extract(r"(\d{2})-", expand=False), errors="coerce")
+    order = season.fillna(-1) * 1000 + pd.to_numeric(col("DATE"), errors="coerce").fillna(-1)
+    rows = pd.DataFrame({"order": order.to_numpy(), "CROSS": col("CROSS").to_numpy(),
+                         "DATE": col("DATE").to_numpy()}, index=key)
+    out = pd.DataFrame({"PAIR_CD_CROSSES": rows.groupby(level=[0, 1], sort=False).size()})
+    latest = rows.iloc[np.argsort(rows["order"].to_numpy(), kind="stable")]
+    latest = latest[~latest.index.duplicated(keep="last")]
+    for c in ("CROSS", "DATE"):
+        if c in cdf.columns:
+            out[f"PAIR_CD_LAST_{c}"] = latest[c].reindex(out.index).to_numpy()
+    for c, name in PAIR_HISTORY_MEANS.items():
+        if c in cdf.columns:
+            out[name] = pd.to_numeric(cdf[c], errors="coerce").set_axis(key).groupby(level=[0, 1]).mean() \
+                .reindex(out.index).round(3).to_numpy()
+    return out
+
+def _join_pair_history(table, hist):
+    """PAIR_CD_* pair columns from _pair_history, found by (FEMALE_NUMVAR, MALE_NUMVAR) hash lookups.
+
+    Pairs never crossed get 0 crosses and empty values.
+    """
+    pos = hist.index.get_indexer(pd.MultiIndex.from_arrays(
+        [np.asarray(table.column("FEMALE_NUMVAR")), np.asarray(table.column("MALE_NUMVAR"))]))
+    miss = pos < 0
+    for c in hist.columns:
+        values = hist[c].to_numpy()
+        if c == "PAIR_CD_CROSSES":
+            out = np.where(miss, 0, values[np.maximum(pos, 0)] if len(values) else 0).astype(np.int64)
+        else:
+            out = values[np.maximum(pos, 0)] if len(values) else np.full(len(pos), np.nan, dtype=values.dtype)
+            out = out.astype(object if values.dtype == object else float)
+            out[miss] = "" if values.dtype == object else np.nan
+        table.tables["P"][c] = out
+        table.layout.append((c, "P"))
+    return table
+
+def _normalize_combos(combos, reg):
+    """Upper-case headers, every COMBO_COLUMNS column present, STD / NUMVAR ids canonical."""
+    combos.columns = [safe_upper_strip(c) for c in combos.columns]
+    for c in COMBO_COLUMNS:
+        if c not in combos.columns: combos[c] = ""
+        combos[c] = combos[c].astype(str).str.strip()
+    for side in ("FEMALE", "MALE"):
+        combos[f"{side}_STD"] = reg.std_of(combos[f"{side}_STD"])
+        combos[f"{side}_NUMVAR"] = reg.numvar_of(combos[f"{side}_NUMVAR"])
+    return combos
+
+def _match_inputs(cache, paths, rules, combos, pool, base=None):
+    """Hash of everything besides the combination rows that enrichment depends on."""
+    files = pool.map(cache.file_key, [paths.get(k, "") for k in ("gv", "crossingdataset", "amat")])
+    return digest(*files, [str(b).strip() for b in rules.get("gv_baselines", BASELINES_DEFAULT)],
+                  list(combos.columns), variety_registry(paths["photoperiod"], base).key,
+                  rules.get("pair_history", False))
+
+def _pair_rows(combos, parents):
+    """The combinations' own pair columns plus FEMALE_IDX / MALE_IDX into the parent tables.
+
+    A parent matched to several GV rows repeats the pair, as the old row-wise merge did.
+    """
+    keys = PARENT_KEYS
+    pairs = combos[[c for c in combos.columns if c not in keys["F"] + keys["M"]] + keys["F"] + keys["M"]]
+    for s, col in INDEX.items():
+        idx = parents[s][keys[s]].assign(**{col: np.arange(len(parents[s]))})
+        pairs = pairs.merge(idx, on=keys[s], how="left")
+    return pairs.drop(columns=keys["F"] + keys["M"])
+
+def _load_kinship(amat_path, base, packed, combos, reg):
+    """AMAT lookup covering every STD variety in the combinations, keyed on canonical STD ids.
+
+    packed=False keeps the CSV text (what Possible_crossings shows); packed
+    lookups are float64 numbers, for filters and ranking only.
+    """
+    cache_dir = (Path(base) if base else BASE_DIR) / CACHE_DIRNAME
+    wanted = pd.unique(np.concatenate([combos["FEMALE_STD"].to_numpy(), combos["MALE_STD"].to_numpy()]))
+    return load_kinship(amat_path, cache_dir, packed=packed, wanted=wanted, canon=reg.std_of)
+
+def _timed(load):
+    """Pool task: (load(), seconds taken)."""
+    t = time.perf_counter()
+    out = load()
+    return out, time.perf_counter() - t
+
+def _fetch(cache, stage, key, load):
+    """Pool task: (cached stage result or MISSING, the loaded source on a miss, seconds taken)."""
+    t = time.perf_counter()
+    hit = cache.get(stage, key)
+    src = load() if hit is MISSING else None
+    return hit, src, time.perf_counter() - t
+
+def _enrich_all(combos, paths, rules, cache, base, pool, progress=None):
+    """GV, CD and kinship for every pair. Returns (table, attached).
+
+    The three sources (or their cached stage results) load concurrently in
+    `pool`; each join runs as soon as its source and the previous join are done.
+    """
+    # one row per parent; every other combinations column stays on the pair
+    keys = PARENT_KEYS
+    parents = {s: combos[keys[s]].drop_duplicates(ignore_index=True) for s in keys}
+    side_of = {c: s for s in keys for c in keys[s]}
+    layout = [(c, side_of.get(c, "P")) for c in combos.columns]
+    reg = variety_registry(paths["photoperiod"], base)
+    parents_key = digest(frame_key(parents["F"]), frame_key(parents["M"]), reg.key)
+    baselines = [str(b).strip() for b in rules.get("gv_baselines", BASELINES_DEFAULT)]
+    gv_path, cd_path, amat_path = Path(paths["gv"]), Path(paths["crossingdataset"]), Path(paths["amat"])
+
+    # GV traits by NUMVAR (GV.VARIETY) and % of baselines (rules "gv_baselines"); the
+    # CD and kinship keys follow the GV one, since a GV join can repeat parents
+    gv_key = cache.key("gv", cache.file_key(gv_path), baselines, parents_key) if gv_path.exists() else parents_key
+    jobs = {}
+    if gv_path.exists():
+        jobs["gv"] = pool.submit(_fetch, cache, "gv", gv_key, lambda: GVTable.load(gv_path, reg.numvar_of))
+    if cd_path.exists():
+        cd_key = cache.key("cd", cache.file_key(cd_path), gv_key)
+        jobs["cd"] = pool.submit(_fetch, cache, "cd", cd_key, lambda: _load_cd(cd_path, reg))
+    if cd_path.exists() and rules.get("pair_history", False):
+        hist_key = cache.key("pairhist", cache.file_key(cd_path), reg.key)
+        jobs["pairhist"] = pool.submit(_fetch, cache, "pairhist", hist_key, lambda: _pair_history(cd_path, reg))
+    if amat_path.exists():
+        kin_key = cache.key("kinship", cache.file_key(amat_path), frame_key(combos), gv_key)
+        jobs["amat"] = pool.submit(_fetch, cache, "kinship", kin_key, lambda: _load_kinship(amat_path, base, False, combos, reg))
+    timing = {}
+
+    def wait(name, label, fraction):
+        _step(progress, label, fraction)
+        hit, src, timing[name] = jobs[name].result()
+        return hit, src
+
+    gv_attached = False
+    pct_layout, pct_failed = [], {}
+    if "gv" in jobs:
+        try:
+            hit, gv = wait("gv", "Joining GV", 0.2)
+            out = hit if hit is not MISSING else cache.put("gv", gv_key, _join_gv(parents, gv, baselines))
+            parents, gv_layout, pct_layout, gv_attached, pct_failed = out
+            layout += gv_layout
+        except Exception:
+            pass
+
+    cd_attached = False
+    if "cd" in jobs:
+        try:
+            hit, cd = wait("cd", "Joining CrossingDataset", 0.35)
+            out = hit if hit is not MISSING else cache.put("cd", cd_key, _join_cd(parents, cd))
+            parents, cd_layout, cd_attached = out
+            layout += cd_layout
+        except Exception:
+            pass
+    layout += pct_layout
+
+    _step(progress, "Building pairs", 0.5)
+    table = PairTable(parents["F"], parents["M"], _pair_rows(combos, parents), layout)
+
+    # Kinship via STD intersection
+    kin_attached = False
+    if "amat" in jobs:
+        try:
+            hit, kin = wait("amat", "Looking up kinship", 0.55)
+            if hit is MISSING:
+                fstd, mstd = np.asarray(table.column("FEMALE_STD")), np.asarray(table.column("MALE_STD"))
+                hit = cache.put("kinship", kin_key, kin.gather(fstd, mstd))
+            table.tables["P"]["KINSHIP"] = hit
+            table.layout.append(("KINSHIP", "P"))
+            kin_attached = True
+        except Exception:
+            pass
+
+    # Past crosses of each exact pair
+    if "pairhist" in jobs:
+        try:
+            hit, hist = wait("pairhist", "Looking up past crosses", 0.6)
+            hist = hist if hit is MISSING else hit
+            if hit is MISSING:
+                cache.put("pairhist", hist_key, hist)
+            if hist is not None:
+                _join_pair_history(table, hist)
+        except Exception:
+            pass
+    return table, {"gv": gv_attached, "gv_pct_failed": pct_failed, "cd": cd_attached, "kinship": kin_attached,
+                   "load": timing}
+
+def _enrich_new(combos, prev, attached, paths, rules, base, pool, progress=None):
+    """Enrich only the parents and pairs missing from prev, a table enriched from the same sources.
+
+    Parents no longer in the combinations are dropped, kept ones are copied
+    from prev and KINSHIP of known (female, male) pairs is looked up in prev.
+    New values go in as CSV text where prev holds text (read back from CSV).
+    Sources are only read when there are new parents, concurrently in `pool`.
+    Returns (table, attached), or None when the new rows do not fit prev's columns.
+    """
+    keys = PARENT_KEYS
+    parents, fresh = {}, {}
+    for s in keys:
+        want = combos[keys[s]].drop_duplicates(ignore_index=True)
+        old = prev.tables[s]
+        old_keys = pd.MultiIndex.from_frame(old[keys[s]])
+        fresh[s] = want[~pd.MultiIndex.from_frame(want).isin(old_keys)].reset_index(drop=True)
+        parents[s] = old[old_keys.isin(pd.MultiIndex.from_frame(want))].reset_index(drop=True)
+    kept = {s: len(parents[s]) for s in keys}
+
+    jobs, timing = {}, {}
+    reg = variety_registry(paths["photoperiod"], base)
+    _step(progress, f"Enriching {len(fresh['F'])} new female / {len(fresh['M'])} new male parents", 0.2)
+    if len(fresh["F"]) or len(fresh["M"]):
+        if attached.get("gv"):
+            jobs["gv"] = pool.submit(_timed, lambda: GVTable.load(Path(paths["gv"]), reg.numvar_of))
+        if attached.get("cd"):
+            jobs["cd"] = pool.submit(_timed, lambda: _load_cd(Path(paths["crossingdataset"]), reg))
+        if attached.get("kinship"):
+            jobs["amat"] = pool.submit(_timed, lambda: _load_kinship(Path(paths["amat"]), base, False, combos, reg))
+
+    def wait(name):
+        src, timing[name] = jobs[name].result()
+        return src
+
+    if jobs:
+        if "gv" in jobs:
+            baselines = [str(b).strip() for b in rules.get("gv_baselines", BASELINES_DEFAULT)]
+            fresh = _join_gv(fresh, wait("gv"), baselines)[0]
+        if "cd" in jobs:
+            fresh, _, _ = _join_cd(fresh, wait("cd"))
+        for s in keys:
+            if set(fresh[s].columns) != set(parents[s].columns):
+                return None
+            new = fresh[s][list(parents[s].columns)].copy()
+            for c in new.columns:
+                if parents[s][c].dtype == object and new[c].dtype != object:
+                    new[c] = as_text(new[c])
+            parents[s] = pd.concat([parents[s], new], ignore_index=True)
+
+    _step(progress, "Building pairs", 0.5)
+    pairs = _pair_rows(combos, parents)
+    history = [c for c, s in prev.layout if s == "P" and c.startswith("PAIR_CD_")]
+    table = PairTable(parents["F"], parents["M"], pairs,
+                      [x for x in prev.layout if x != ("KINSHIP", "P") and x[0] not in history])
+    if ("KINSHIP", "P") in prev.layout:
+        _step(progress, "Looking up kinship", 0.55)
+        fstd, mstd = np.asarray(table.column("FEMALE_STD")), np.asarray(table.column("MALE_STD"))
+        old = prev.tables["P"]["KINSHIP"]
+        text = old.dtype == object
+        known = pd.Series(old.to_numpy(), index=pd.MultiIndex.from_arrays(
+            [np.asarray(prev.column("FEMALE_STD")), np.asarray(prev.column("MALE_STD"))]))
+        known = known[~known.index.duplicated()]
+        pos = known.index.get_indexer(pd.MultiIndex.from_arrays([fstd, mstd]))
+        kin = known.to_numpy()[np.maximum(pos, 0)] if len(known) else np.full(len(pos), np.nan)
+        kin = kin.astype(object if text else float)
+        miss = pos < 0
+        if miss.any():
+            amat = wait("amat") if "amat" in jobs else _load_kinship(Path(paths["amat"]), base, False, combos, reg)
+            new = amat.gather(fstd[miss], mstd[miss])
+            kin[miss] = as_text(pd.Series(new)).to_numpy(dtype=object) if text else new
+        pairs["KINSHIP"] = kin
+        table.layout.append(("KINSHIP", "P"))
+    if history:
+        _step(progress, "Looking up past crosses", 0.6)
+        cd_path, cache = Path(paths["crossingdataset"]), stage_cache(base, rules)
+        hist = cache.cached("pairhist", cache.key("pairhist", cache.file_key(cd_path), reg.key),
+                            lambda: _pair_history(cd_path, reg))
+        _join_pair_history(table, hist)
+        if [c for c, s in table.layout if c.startswith("PAIR_CD_")] != history:
+            return None
+
+    added = int(((pairs[INDEX["F"]] >= kept["F"]) | (pairs[INDEX["M"]] >= kept["M"])).sum())
+    return table, {**{k: attached.get(k, False) for k in ("gv", "cd", "kinship")}, "load": timing,
+                   "incremental": {"added": added, "removed": max(0, len(prev) - (len(pairs) - added))}}
+
+def _saved_match(day, base, inputs):
+    """(table, meta) of the saved Possible_crossings when it was enriched from `inputs`, else None."""
+    folder = _current_pairs_dir(day, base)
+    meta = PairTable.read_meta(folder) if folder is not None else None
+    if not meta or meta.get("inputs") != inputs:
+        return None
+    try:
+        return PairTable.load(folder, text=False), meta
+    except Exception:
+        return None
+
+def _enrich(combos, inputs, paths, rules, cache, day, base, pool, progress=None):
+    """(table, attached) for the combinations.
+
+    Reuses the last table enriched in this process (by a match or a
+    speculation) or the saved one when they came from the same sources, and
+    returns it as is when the combinations are unchanged too.
+    """
+    spot = str(julian_csv("possible_crossings", day, base))
+    recent = _recent.get(spot)
+    if recent is not None and recent[0] == inputs and recent[1] == frame_key(combos):
+        return recent[2], dict(recent[3])
+    prev = None
+    if rules.get("incremental_match", True):
+        if recent is not None and recent[0] == inputs:
+            prev = recent[2], recent[3]
+        else:
+            saved = _saved_match(day, base, inputs)
+            if saved is not None:
+                prev = saved[0], saved[1].get("attached") or {}
+    if prev is not None:
+        try:
+            out = _enrich_new(combos, *prev, paths, rules, base, pool, progress)
+        except Exception:
+            out = None
+        if out is not None:
+            return out
+    return _enrich_all(combos, paths, rules, cache, base, pool, progress)
+
+def _unchanged_rows(table, meta, inputs, day, base):
+    """How many leading rows of the current wide CSV `table` keeps as they are (0: rewrite it)."""
+    if meta.get("inputs") != inputs or [tuple(x) for x in meta.get("columns", [])] != table.layout:
+        return 0
+    if _current_pairs_dir(day, base) is None or not julian_csv("possible_crossings", day, base).exists():
+        return 0
+    cols = [c for c, s in table.layout if s != "P" and c in COMBO_COLUMNS]
+    try:
+        old = PairTable.load(pairs_dir(day, base), columns=cols)
+    except Exception:
+        return 0
+    n = len(old)
+    if n > len(table) or any((np.asarray(table.column(c)[:n], dtype=object) != np.asarray(old.column(c), dtype=object)).any()
+                             for c in cols):
+        return 0
+    return n
+
+def match_crossings(day=None, base=None, progress=None):
+    """Enrich the day's combinations with GV, CrossingDataset and kinship values.
+
+    Parent traits are joined once per female / male parent and kept in a
+    PairTable (parent tables + index pairs). It is saved to
+    Possible_crossings_<day>.pairs/ and, unless rules "write_wide_crossings" is
+    false, expanded into Possible_crossings_<day>.csv.
+
+    When the previous match used the same source files, only parents and pairs
+    new since then are enriched (rules "incremental_match"), and rows that only
+    extend the wide CSV are appended to it. A matching speculate_match() result
+    is used as is. Otherwise the GV, CD and kinship joins come from the stage
+    cache when their inputs are unchanged, and nothing is rewritten when the
+    outputs already hold this result.
+
+    Pairs ruled out by rules "exclusions" (see EXCLUSIONS_DEFAULT) are dropped
+    from the combinations first, so nothing is joined to them.
+
+    GV, CD and AMAT are hashed and read concurrently in a thread pool; each
+    join starts once its source is in. progress(label, fraction) is told about
+    each stage and may raise Cancelled until the outputs start being written.
+
+    Returns (pairs, attached) where attached maps "gv" / "cd" / "kinship" to
+    whether that source was joined, "load" to the seconds spent on each source
+    that was read ("gv" / "cd" / "amat"), "seconds" to the whole run, "cache" to
+    the per-stage report, "excluded" to the pairs dropped per exclusion,
+    "exclusion_failed" to the exclusions that could not be applied (and why) and,
+    for an incremental run, "incremental" to the added / removed pair counts.
+    Raises FileNotFoundError when the combinations file does not exist.
+    """
+    t0 = time.perf_counter()
+    ensure_dirs(base)
+    combos_path = julian_csv("combinations", day, base)
+    if not combos_path.exists():
+        raise FileNotFoundError(combos_path)
+    paths = get_paths(base)
+    rules = get_rules(base)
+    cache = stage_cache(base, rules)
+    _step(progress, "Reading combinations", 0.0)
+    combos = _normalize_combos(pd.read_csv(combos_path, dtype=str).fillna(""), variety_registry(paths["photoperiod"], base))
+    combos, excluded, excl_failed = _exclude(combos, rules, paths, day, base, progress)
+    _step(progress, "Hashing sources", 0.05)
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+        inputs = _match_inputs(cache, paths, rules, combos, pool, base)
+
+    # outputs that already hold exactly this result are left alone
+    out_path = julian_csv("possible_crossings", day, base)
+    folder = pairs_dir(day, base)
+    wide = rules.get("write_wide_crossings", True)
+    fmt = rules.get("crossings_format", "csv")
+    out_key = cache.key("output", inputs, frame_key(combos), wide, fmt)
+    meta = PairTable.read_meta(folder) or {}
+    if (cache.enabled and meta.get("key") == out_key and _current_pairs_dir(day, base) is not None
+            and out_path.exists() == bool(wide)):
+        cache.report["output"] = "hit"
+        return PairTable.load(folder, text=False), {**meta.get("attached", {}), "excluded": excluded,
+                                                    "exclusion_failed": excl_failed, "cache": dict(cache.report),
+                                                    "seconds": time.perf_counter() - t0}
+
+    # a running speculation is cancelled rather than waited for; one that already finished is reused
+    global _match_epoch
+    with _recent_lock:
+        _match_epoch += 1
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+        table, attached = _enrich(combos, inputs, paths, rules, cache, day, base, pool, progress)
+    with _recent_lock:
+        _recent[str(out_path)] = (inputs, frame_key(combos), table,
+                                  {k: v for k, v in attached.items() if k != "speculative"})
+
+    _step(progress, "Writing Possible_crossings", 0.7)   # last chance to cancel
+    step = _uncancellable(progress)
+    start = _unchanged_rows(table, meta, inputs, day, base) if wide else 0
+    cache.report["output"] = "append" if start else "miss"
+    if wide:
+        table.to_wide_csv(out_path, start=start,
+                          progress=lambda f: step("Writing Possible_crossings", 0.7 + 0.25 * f))
+    elif out_path.exists():
+        out_path.unlink()   # never leave a stale wide file next to the new pairs
+    # after the CSV: readers prefer the newer of the two
+    step("Saving pairs tables", 0.95)
+    table.save(folder, fmt, key=out_key, inputs=inputs,
+               attached={k: attached[k] for k in ("gv", "cd", "kinship")})
+    return table, {**attached, "excluded": excluded, "exclusion_failed": excl_failed,
+                   "cache": dict(cache.report), "seconds": time.perf_counter() - t0}
+
+def speculate_match(day=None, base=None, progress=None):
+    """Enrich the pairs the day's survey will produce, ahead of Match Crossings.
+
+    For one background worker after survey entries: combinations are built
+    in memory (nothing is written) and enriched incrementally against the last
+    result. match_crossings picks the table up when it runs on the same
+    combinations and sources; a match that starts meanwhile cancels this run
+    (Cancelled is raised at its next stage). progress may raise Cancelled too.
+    Returns the table, or None when there is nothing to do (no survey yet,
+    or rules "speculative_match" is false).
+    """
+    in_file = julian_csv("tassel_survey_data", day, base)
+    rules = get_rules(base)
+    if not in_file.exists() or not rules.get("speculative_match", True):
+        return None
+    paths = get_paths(base)
+    cache = stage_cache(base, rules)
+    epoch = _match_epoch
+
+    def step(label, fraction=None):
+        if _match_epoch != epoch:
+            raise Cancelled()
+        _step(progress, label, fraction)
+
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+        product, _ = _survey_combos(in_file, Path(paths["photoperiod"]), cache, base)
+        # as match_crossings will read it back from Combinations_<day>.csv
+        combos = _normalize_combos(pd.read_csv(io.StringIO(product.to_frame().to_csv(index=False)), dtype=str).fillna(""),
+                                   variety_registry(paths["photoperiod"], base))
+        combos, _, _ = _exclude(combos, rules, paths, day, base, step)
+        inputs = _match_inputs(cache, paths, rules, combos, pool, base)
+        table, attached = _enrich(combos, inputs, paths, rules, cache, day, base, pool, step)
+    attached["speculative"] = True
+    with _recent_lock:
+        if _match_epoch != epoch:
+            raise Cancelled()
+        _recent[str(julian_csv("possible_crossings", day, base))] = (inputs, frame_key(combos), table, attached)
+    return table
+
+def match_status(out_df, attached, out_path):
+    """One-line summary shown after a match (GUI status line / CLI output)."""
+    yn = lambda k: 'Y' if attached.get(k) else 'N'
+    load = attached.get("load") or {}
+    sec = lambda k: f" {load[k]:.2f}s" if k in load else ""
+    out_path = Path(out_path)
+    name = out_path.name if out_path.exists() else out_path.stem + ".pairs"
+    cache = attached.get("cache") or {}
+    hits = sum(v == "hit" for v in cache.values())
+    cached = f" | Cache: {hits}/{len(cache)} hit ({', '.join(f'{k} {v}' for k, v in cache.items())})" if cache else ""
+    excluded, failed = attached.get("excluded") or {}, attached.get("exclusion_failed") or {}
+    if excluded or failed:
+        parts = [f"{k} {v}" for k, v in excluded.items()] + [f"{k} FAILED: {why}" for k, why in failed.items()]
+        cached += f" | Excluded: {sum(excluded.values())} pairs (" + ", ".join(parts) + ")"
+    pct_failed = attached.get("gv_pct_failed") or {}
+    if pct_failed:
+        cached += " | GV %: " + ", ".join(f"PCT_{b} FAILED: {why}" for b, why in pct_failed.items())
+    inc = attached.get("incremental")
+    if inc:
+        cached += f" | Incremental: +{inc['added']}/-{inc['removed']} pairs"
+    if attached.get("speculative"):
+        cached += " | Enriched in background"
+    if "seconds" in attached:
+        cached += f" | {attached['seconds']:.2f}s total"
+    return (f"Saved {len(out_df)} rows → {name} | GV:{yn('gv')}{sec('gv')} "
+            f"| Per-parent CD:{yn('cd')}{sec('cd')} | Kinship:{yn('kinship')}{sec('amat')}{cached}")
+
+# -------------------- Reading Possible crossings back --------------------
+def _current_pairs_dir(day=None, base=None):
+    """The pairs folder when it is complete and not older than the wide CSV, else None."""
+    folder = pairs_dir(day, base)
+    layout = folder / "layout.json"
+    wide = julian_csv("possible_crossings", day, base)
+    if not layout.exists():
+        return None
+    if wide.exists() and wide.stat().st_mtime_ns > layout.stat().st_mtime_ns:
+        return None
+    return folder
+
+DAY_CACHE_SIZE = 4               # days kept in memory by open_day()
+_days = OrderedDict()             # (day, base) -> (source stamp, (headers, columns))
+_days_lock = threading.Lock()
+
+def crossing_days(base=None):
+    """Julian days that have a Possible_crossings (wide CSV or pairs folder), ascending."""
+    folder = (Path(base) if base else BASE_DIR) / "Crosses for the day"
+    days = set()
+    if folder.is_dir():
+        for p in folder.iterdir():
+            m = re.fullmatch(r"Possible_crossings_(\d+)(\.csv|\.pairs)", p.name)
+            if m:
+                days.add(int(m.group(1)))
+    return sorted(days)
+
+def _day_stamp(day, base):
+    folder = _current_pairs_dir(day, base)
+    src = folder / "layout.json" if folder is not None else julian_csv("possible_crossings", day, base)
+    st = src.stat()
+    return str(src), st.st_mtime_ns, st.st_size
+
+def open_day(day=None, base=None, progress=None):
+    """load_crossings() of a whole day, served from an LRU of the last DAY_CACHE_SIZE days opened.
+
+    An entry is reused only while the day's files are unchanged.
+    """
+    key = (julian_day() if day is None else int(day), str(base))
+    stamp = _day_stamp(day, base)
+    with _days_lock:
+        hit = _days.get(key)
+        if hit is not None and hit[0] == stamp:
+            _days.move_to_end(key)
+            return hit[1]
+    out = load_crossings(day, base, progress=progress)
+    with _days_lock:
+        _days[key] = (stamp, out)
+        _days.move_to_end(key)
+        while len(_days) > DAY_CACHE_SIZE:
+            _days.popitem(last=False)
+    return out
+
+def season_history(base=None, sync=True):
+    """HistoryStore of the season (<base>/season_history.sqlite), synced with the dated CSVs first."""
+    base = Path(base) if base else BASE_DIR
+    store = HistoryStore(base / HISTORY_FILENAME, base)
+    if sync:
+        store.sync()
+    return store
+
+def crossings_exist(day=None, base=None):
+    return julian_csv("possible_crossings", day, base).exists() or _current_pairs_dir(day, base) is not None
+
+def crossings_headers(day=None, base=None):
+    """Column names of the day's Possible_crossings without reading rows ([] when there is none)."""
+    folder = _current_pairs_dir(day, base)
+    if folder is not None:
+        return [c for c, _ in PairTable.read_layout(folder) or []]
+    wide = julian_csv("possible_crossings", day, base)
+    if not wide.exists():
+        return []
+    with open(wide, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+def read_wide_csv(path, usecols=None, progress=None, chunk=50000):
+    """(headers, {position: object array}) of a wide Possible_crossings CSV.
+
+    Headers come from the raw first line so duplicate names survive; cells are
+    kept as the exact CSV text ("" for empty). With progress the rows are read
+    in chunks and progress(label, fraction of bytes read) is called per chunk.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        headers = next(csv.reader(f), [])
+    want = list(range(len(headers))) if usecols is None else [i for i in usecols if 0 <= i < len(headers)]
+    if not headers or not want:
+        return headers, {}
+    opts = dict(dtype=str, header=None, skiprows=1, names=range(len(headers)),
+                usecols=want, keep_default_na=False, na_filter=False, encoding="utf-8")
+    if progress is None:
+        df = pd.read_csv(path, **opts)
+    else:
+        size, parts = max(1, os.path.getsize(path)), []
+        with open(path, "rb") as f:
+            for part in pd.read_csv(f, chunksize=chunk, **opts):
+                parts.append(part)
+                _step(progress, "Reading Possible_crossings", min(1.0, f.tell() / size))
+        df = pd.concat(parts) if parts else pd.read_csv(path, **opts)
+    return headers, {i: df[i].to_numpy(dtype=object) for i in want}
+
+def load_crossings(day=None, base=None, usecols=None, progress=None):
+    """(headers, {position: values}) of the day's Possible_crossings, cells as text.
+
+    Served from the pairs folder when it is current -- parent columns come back
+    as PairColumn views, so wide rows are only gathered when indexed -- else from
+    the wide CSV. usecols limits the column positions that are read; progress is
+    as for match_crossings.
+    """
+    folder = _current_pairs_dir(day, base)
+    if folder is None:
+        return read_wide_csv(julian_csv("possible_crossings", day, base), usecols, progress)
+    layout = PairTable.read_layout(folder)
+    headers = [c for c, _ in layout]
+    want = range(len(headers)) if usecols is None else [i for i in usecols if 0 <= i < len(headers)]
+    _step(progress, "Reading pairs tables")
+    table = PairTable.load(folder, columns=[headers[i] for i in want])
+    return headers, {i: table.column(headers[i], layout[i][1]) for i in want}
+
+def export_rows(path, headers, columns, rows, progress=None, chunk=20000):
+    """Write rows `rows` (positions) of `columns` (one per header) to a CSV at `path`.
+
+    Rows are gathered `chunk` at a time. Cancelling via progress removes the
+    partial file and re-raises Cancelled.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(headers)
+            for a in range(0, len(rows), chunk):
+                _step(progress, "Exporting rows", a / len(rows))
+                sel = rows[a:a + chunk]
+                w.writerows(zip(*(np.asarray(col[sel], dtype=object) for col in columns)))
+    except Cancelled:
+        Path(path).unlink(missing_ok=True)
+        raise
+
+# -------------------- Availability & allocation --------------------
+def load_tassel_counts(day=None, base=None):
+    """STDVARIETY -> {"male": n, "female": n} from Tassles_<day>.csv."""
+    counts = {}
+    tass = julian_csv("tassles", day, base)
+    if not tass.exists():
+        return counts
+    df = pd.read_csv(tass)
+    for _, r in df.iterrows():
+        var = str(r.get("STDVARIETY","")).strip()
+        try:
+            m = int(r.get("MALE TASSLES",0))
+            f = int(r.get("FEMALE TASSLES",0))
+        except Exception:
+            m,f = 0,0
+        counts[var] = {"male": m, "female": f}
+    return counts
+
+def load_rules_pair(rules=None, base=None):
+    """(females_per_male, males_per_female) from rules.json, each at least 1."""
+    r = rules if rules is not None else get_rules(base)
+    try:
+        fpm = int(r.get("females_per_male", 1))
+    except Exception:
+        fpm = 1
+    try:
+        mpf = int(r.get("males_per_female", 1))
+    except Exception:
+        mpf = 1
+    return max(1, fpm), max(1, mpf)
+
+def load_allocated_pairs(day=None, base=None):
+    """(female_std, male_std) pairs already written to allocated_<day>.csv."""
+    alloc_path = julian_csv("allocated", day, base)
+    if not alloc_path.exists():
+        return []
+    try:
+        df_a = pd.read_csv(alloc_path)
+    except Exception:
+        return []
+    col = lambda c: df_a[c].astype(str).str.strip() if c in df_a.columns else pd.Series("", index=df_a.index)
+    return list(zip(col("FEMALE"), col("MALE")))
+
+class CapacityLedger:
+    """Rule-adjusted capacities kept in memory: tassels x rules, minus allocated and pending crosses.
+
+    Built once per load; add()/remove() of a pending pair is O(1) and returns the
+    (variety, "female_cap" | "male_cap") entries it touched. Remaining capacity is
+    max(0, capacity - used), which is what the old clamped running subtraction gave.
+    """
+    def __init__(self, tassel_counts, rules_pair, allocated=()):
+        females_per_male, males_per_female = rules_pair
+        self.total = {}
+        for var, d in tassel_counts.items():
+            self.total[var] = {"male_cap": int(d.get("male",0)) * females_per_male,
+                               "female_cap": int(d.get("female",0)) * males_per_female}
+        self.used = {var: {"male_cap": 0, "female_cap": 0} for var in self.total}
+        for fstd, mstd in allocated:
+            self.add(fstd, mstd)
+
+    @classmethod
+    def for_day(cls, day=None, base=None, tassel_counts=None):
+        if tassel_counts is None:
+            tassel_counts = load_tassel_counts(day, base)
+        return cls(tassel_counts, load_rules_pair(base=base), load_allocated_pairs(day, base))
+
+    def _bump(self, fstd, mstd, n):
+        touched = []
+        if fstd in self.used:
+            self.used[fstd]["female_cap"] += n
+            touched.append((fstd, "female_cap"))
+        if mstd in self.used:
+            self.used[mstd]["male_cap"] += n
+            touched.append((mstd, "male_cap"))
+        return touched
+
+    def add(self, fstd, mstd):
+        return self._bump(fstd, mstd, 1)
+
+    def remove(self, fstd, mstd):
+        return self._bump(fstd, mstd, -1)
+
+    def remaining(self, var, key):
+        if var not in self.total:
+            return 0
+        return max(0, self.total[var][key] - self.used[var][key])
+
+    def capacities(self):
+        """{variety: {"male_cap": n, "female_cap": n}} as compute_capacities returns it."""
+        return {var: {"male_cap": self.remaining(var, "male_cap"),
+                      "female_cap": self.remaining(var, "female_cap")} for var in self.total}
+
+def compute_capacities(day=None, base=None, pending=(), tassel_counts=None):
+    """Remaining capacities after allocated_<day>.csv and `pending` (female_std, male_std) pairs."""
+    ledger = CapacityLedger.for_day(day, base, tassel_counts)
+    for fstd, mstd in pending:
+        ledger.add(fstd, mstd)
+    return ledger.capacities()
+
+def guard_pairs(pairs, capacities):
+    """Greedily accept (female_std, male_std) pairs in order against capacities.
+
+    Returns (accepted, skipped): accepted is a list of positions into `pairs`,
+    skipped a list of (position, reason).
+    """
+    remaining = dict((k, {"male_cap": v["male_cap"], "female_cap": v["female_cap"]})
+                     for k, v in capacities.items())
+    accepted, skipped = [], []
+    for i, (female_std, male_std) in enumerate(pairs):
+        f_ok = remaining.get(female_std,{"female_cap":0}).get("female_cap",0) > 0
+        m_ok = remaining.get(male_std,{"male_cap":0}).get("male_cap",0) > 0
+        if f_ok and m_ok:
+            remaining[female_std]["female_cap"] -= 1
+            remaining[male_std]["male_cap"] -= 1
+            accepted.append(i)
+        else:
+            reason=[]
+            if not f_ok: reason.append(f"female '{female_std}' has 0 remaining")
+            if not m_ok: reason.append(f"male '{male_std}' has 0 remaining (rule-adjusted)")
+            skipped.append((i,"; ".join(reason)))
+    return accepted, skipped
+
+def append_allocated(pairs, day=None, base=None):
+    """Append (female_std, male_std) pairs to allocated_<day>.csv."""
+    alloc_path = julian_csv("allocated", day, base)
+    df_append = pd.DataFrame([{"FEMALE":f,"MALE":m} for f,m in pairs])
+    if alloc_path.exists():
+        df_out = pd.concat([pd.read_csv(alloc_path), df_append], ignore_index=True)
+    else:
+        df_out = df_append
+    df_out.to_csv(alloc_path, index=False)
+    return alloc_path
+
+def allocation_settings(rules=None, base=None):
+    """rules "allocation" over sucrox.assign.ALLOCATION_DEFAULT."""
+    rules = rules if rules is not None else get_rules(base)
+    return {**ALLOCATION_DEFAULT, **(rules.get("allocation") or {})}
+
+def suggest_crosses(column, n, capacities, taken=(), settings=None):
+    """Rows to cross next: the max-score set of crosses that fits `capacities`.
+
+    column(name) gives a wide column of the n loaded rows (None when missing).
+    Pairs in `taken` (allocated or pending (female_std, male_std)) are not
+    suggested again, and of rows repeating one STD pair only the best scoring
+    is a candidate. Scores and mode come from `settings` (allocation_settings()).
+    Returns row positions, best score first.
+    """
+    settings = settings if settings is not None else allocation_settings()
+    if not n or column("FEMALE_STD") is None or column("MALE_STD") is None:
+        return []
+    strip = lambda name: pd.Series(np.asarray(column(name), dtype=object)).astype(str).str.strip()
+    df = pd.DataFrame({"F": strip("FEMALE_STD"), "M": strip("MALE_STD"),
+                       "score": pair_scores(column, n, settings)})
+    df = df[~pd.MultiIndex.from_frame(df[["F", "M"]]).isin(list(taken))]
+    df = df.sort_values("score", ascending=False, kind="stable").drop_duplicates(["F", "M"])
+    chosen = max_weight_flow(df["F"], df["M"], df["score"],
+                             {v: d["female_cap"] for v, d in capacities.items()},
+                             {v: d["male_cap"] for v, d in capacities.items()},
+                             fill=bool(settings.get("fill", True)))
+    return df.index[chosen].tolist()
+
+def suggest(out_path, day=None, base=None):
+    """Write the Auto-allocate suggestions for the remaining capacity as wide rows (CLI).
+
+    The file can be passed to allocate(). Returns the number of rows written.
+    """
+    headers, columns = load_crossings(day, base)
+    n = len(next(iter(columns.values()))) if columns else 0
+    column = lambda name: columns[headers.index(name)] if name in headers else None
+    rows = suggest_crosses(column, n, compute_capacities(day, base), load_allocated_pairs(day, base),
+                           allocation_settings(base=base))
+    export_rows(out_path, headers, [columns[i] for i in range(len(headers))], rows)
+    return len(rows)
+
+def allocate(selected_path, out_path, day=None, base=None):
+    """Guarded export of a CSV of selected Possible_crossings rows (CLI counterpart of the Export button).
+
+    Rows that fit the remaining rule-adjusted capacity are written to out_path and
+    appended to allocated_<day>.csv. Returns (n_exported, skipped).
+    """
+    with open(selected_path, newline="", encoding="utf-8") as f:
+        r = csv.reader(f)
+        headers = next(r)
+        rows = list(r)
+    try:
+        fstd_idx = headers.index("FEMALE_STD"); mstd_idx = headers.index("MALE_STD")
+    except ValueError:
+        raise ValueError("FEMALE_STD / MALE_STD not found.")
+    get = lambda row, i: row[i].strip() if i < len(row) else ""
+    pairs = [(get(row, fstd_idx), get(row, mstd_idx)) for row in rows]
+    accepted, skipped = guard_pairs(pairs, compute_capacities(day, base))
+    if not accepted:
+        return 0, skipped
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(headers)
+        for i in accepted:
+            w.writerow(rows[i])
+    append_allocated([pairs[i] for i in accepted], day, base)
+    return len(accepted), skipped
+
+# -------------------- Partner queries --------------------
+_parents_memo = {}                # (source, mtime, columns) -> parent tables of the last partner query
+
+def _parent_tables(day, base, columns):
+    """({"F": females, "M": males}, {"F": FEMALE_IDX, "M": MALE_IDX}) of the day's pairs.
+
+    Only `columns` are read, from the pairs folder when it is current (the wide
+    rows are never built), else from the wide CSV. The last result is kept
+    until the source changes, so repeated queries do not re-read it.
+    """
+    folder = _current_pairs_dir(day, base)
+    src = folder / "layout.json" if folder is not None else julian_csv("possible_crossings", day, base)
+    key = (str(src), src.stat().st_mtime_ns, tuple(columns))
+    if key in _parents_memo:
+        return _parents_memo[key]
+    if folder is not None:
+        layout = PairTable.read_layout(folder)
+        t = PairTable.load(folder, columns=[c for c, s in layout if s != "P" and c in columns])
+        out = ({"F": t.tables["F"], "M": t.tables["M"]},
+               {s: t.tables["P"][INDEX[s]].to_numpy() for s in INDEX})
+    else:
+        headers = crossings_headers(day, base)
+        use = [i for i, h in enumerate(headers) if h in columns]
+        _, cols = read_wide_csv(src, use)
+        wide = pd.DataFrame({headers[i]: cols[i] for i in use})
+        tables, idx = {}, {}
+        for s, side in (("F", "FEMALE"), ("M", "MALE")):
+            tables[s] = wide[[c for c in wide.columns if c.startswith(side + "_")]] \
+                .drop_duplicates(f"{side}_STD", ignore_index=True)
+            idx[s] = pd.Index(tables[s][f"{side}_STD"]).get_indexer(wide[f"{side}_STD"])
+        out = (tables, idx)
+    _parents_memo.clear()
+    _parents_memo[key] = out
+    return out
+
+def top_partners(parent, k=5, side=None, day=None, base=None, settings=None):
+    """The k best partners of one parent (STD id) under the Auto-allocate score.
+
+    side "F" / "M" says which sex `parent` is; None looks among the females
+    first. Only that parent's pairs are scored: traits come from the per-parent
+    tables, KINSHIP from the AMAT index, and np.argpartition picks the top k.
+    Returns a DataFrame (FEMALE_STD, MALE_STD, SCORE, KINSHIP, MID_<trait>...),
+    best first; empty when the parent is not in today's crosses.
+    """
+    settings = settings if settings is not None else allocation_settings(base=base)
+    traits = list((settings.get("traits") or {}).keys())
+    cols = ["FEMALE_STD", "MALE_STD"] + [f"{p}_{t}" for t in traits for p in ("FEMALE", "MALE")]
+    tables, idx = _parent_tables(day, base, cols)
+    reg = variety_registry(base=base)
+    parent = reg.std(parent)
+    out_cols = ["FEMALE_STD", "MALE_STD", "SCORE", "KINSHIP"] + [f"MID_{t}" for t in traits]
+    for s in ([side] if side else ["F", "M"]):
+        o = "M" if s == "F" else "F"
+        own_side, other_side = ("FEMALE", "MALE") if s == "F" else ("MALE", "FEMALE")
+        own = np.flatnonzero(tables[s][f"{own_side}_STD"].astype(str).str.strip().to_numpy() == parent)
+        if len(own):
+            break
+    else:
+        return pd.DataFrame(columns=out_cols)
+    # partners this parent has a pair with (after exclusions), one row per STD
+    rows = np.unique(idx[o][np.isin(idx[s], own)])
+    partners = tables[o].iloc[rows].reset_index(drop=True)
+    partners = partners[~partners[f"{other_side}_STD"].astype(str).str.strip().duplicated()].reset_index(drop=True)
+    n = len(partners)
+    if not n:
+        return pd.DataFrame(columns=out_cols)
+    me = tables[s].iloc[own[0]]
+    other_std = partners[f"{other_side}_STD"].astype(str).str.strip().to_numpy(dtype=object)
+    own_std = np.full(n, parent, dtype=object)
+    fstd, mstd = (own_std, other_std) if s == "F" else (other_std, own_std)
+
+    kin = np.full(n, np.nan)
+    amat = Path(get_paths(base).get("amat", ""))
+    if amat.is_file():
+        try:
+            pairs = pd.DataFrame({"FEMALE_STD": fstd, "MALE_STD": mstd})
+            index = _load_kinship(amat, base, get_rules(base).get("amat_cache", True), pairs, reg)
+            kin = pd.to_numeric(pd.Series(index.gather(fstd, mstd)), errors="coerce").to_numpy()
+        except Exception:
+            pass
+
+    def column(name):
+        if name == "KINSHIP":
+            return kin
+        if name.startswith(own_side + "_"):
+            return np.full(n, me[name], dtype=object) if name in me.index else None
+        return partners[name].to_numpy(dtype=object) if name in partners.columns else None
+
+    score = pair_scores(column, n, settings)
+    k = max(1, min(int(k), n))
+    top = np.argpartition(-score, k - 1)[:k]
+    top = top[np.argsort(-score[top], kind="stable")]
+    num = lambda name: pd.to_numeric(pd.Series(column(name)), errors="coerce").to_numpy() \
+        if column(name) is not None else np.full(n, np.nan)
+    res = {"FEMALE_STD": fstd[top], "MALE_STD": mstd[top], "SCORE": score[top].round(3), "KINSHIP": kin[top]}
+    for t in traits:
+        res[f"MID_{t}"] = ((num(f"FEMALE_{t}") + num(f"MALE_{t}")) / 2)[top]
+    return pd.DataFrame(res, columns=out_cols)
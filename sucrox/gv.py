@@ -0,0 +1,84 @@
+"""GV traits (ZT_GVs) read once per match.
+
+The file is parsed a single time: the text table feeds the FEMALE_/MALE_
+merges and a float matrix of the same rows feeds derived values. Percent of a
+baseline variety is computed per GV row (i.e. per variety), gathered onto the
+parent tables, and only expanded to one value per pair when displayed or exported.
+"""
+import numpy as np
+import pandas as pd
+
+BASELINES_DEFAULT = ["2001299"]
+_ROW = "__GV_ROW"
+
+class GVTable:
+    def __init__(self, frame, canon=None):
+        self.frame = frame                      # text, upper-stripped headers
+        self.canon = canon                      # ids -> canonical NUMVARs (VarietyRegistry.numvar_of), or None
+        self.traits = [c for c in frame.columns if c != "VARIETY"]
+        self._numeric = None
+        self._pct = {}                          # baseline -> (n_rows x n_traits) float array
+
+    @classmethod
+    def load(cls, path, canon=None):
+        """GVTable of the CSV; with canon, VARIETY ids are rewritten to canonical NUMVARs."""
+        gv = pd.read_csv(path, dtype=str).fillna("")
+        gv.columns = [str(c or "").strip().upper() for c in gv.columns]
+        if canon is not None and "VARIETY" in gv.columns:
+            gv["VARIETY"] = canon(gv["VARIETY"])
+        return cls(gv, canon)
+
+    @property
+    def numeric(self):
+        if self._numeric is None:
+            self._numeric = np.column_stack(
+                [pd.to_numeric(self.frame[c], errors="coerce").to_numpy(dtype=float) for c in self.traits]
+            ) if self.traits else np.zeros((len(self.frame), 0))
+        return self._numeric
+
+    def merge_side(self, df, side):
+        """Left-join <side>_<trait> columns onto df on <side>_NUMVAR (side: "FEMALE" / "MALE").
+
+        Returns (df, GV row per df row, -1 where unmatched).
+        """
+        g = self.frame.rename(columns={"VARIETY": "JOIN_KEY"}).assign(**{_ROW: np.arange(len(self.frame))})
+        df = df.merge(g, left_on=f"{side}_NUMVAR", right_on="JOIN_KEY", how="left")
+        cols = [c for c in g.columns if c not in ("JOIN_KEY", _ROW)]
+        df.rename(columns={c: f"{side}_{c}" for c in cols}, inplace=True)
+        df.drop(columns=["JOIN_KEY"], inplace=True, errors="ignore")
+        return df, df.pop(_ROW).fillna(-1).to_numpy(dtype=np.int64)
+
+    def pct_of(self, baseline):
+        """Per-row % of the baseline variety's traits (rounded to 3), or None when it is absent."""
+        if baseline not in self._pct:
+            want = self.canon([baseline])[0] if self.canon is not None else str(baseline)
+            hit = np.flatnonzero(self.frame["VARIETY"].astype(str).str.strip().to_numpy() == want)
+            if not len(hit):
+                self._pct[baseline] = None
+            else:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    self._pct[baseline] = np.round(self.numeric / self.numeric[hit[0]] * 100.0, 3)
+        return self._pct[baseline]
+
+    def pct_columns(self, baselines, pos):
+        """[(name, side, values)] for every trait and baseline found in the file.
+
+        pos maps "FEMALE" / "MALE" to the GV row of each row of that side's table
+        (see merge_side); values are per parent row, so the per-pair values are
+        only gathered when a column is displayed or exported (PairColumn). Names
+        follow <side>_<trait>_PCT_<baseline>.
+        """
+        out = []
+        for b in baselines:
+            b = str(b).strip()
+            pct = self.pct_of(b)
+            if pct is None:
+                continue
+            for j, c in enumerate(self.traits):
+                for side in ("FEMALE", "MALE"):
+                    rows = pos[side]
+                    vals = np.full(len(rows), np.nan)
+                    ok = rows >= 0
+                    vals[ok] = pct[rows[ok], j]
+                    out.append((f"{side}_{c}_PCT_{b}", side, vals))
+        return out
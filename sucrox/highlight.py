@@ -0,0 +1,111 @@
+"""Highlight rules compiled to boolean masks over whole columns.
+
+A rule is {"name", "color", "logic": "AND"|"OR", "clauses": [...]}; a clause is
+either {"column", "op", "value"} or a nested group {"logic", "clauses"}.
+Comparisons keep the old per-cell semantics: numeric when both sides parse as
+floats (commas ignored), otherwise ==/!= compare the stripped text and the
+other ordering ops are False; contains/not contains are case-insensitive.
+Missing columns and empty groups never match. When several rules match a
+row, the last one wins.
+"""
+import json
+import operator
+import numpy as np
+import pandas as pd
+
+NUMERIC_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+               "==": operator.eq, "!=": operator.ne}
+
+def to_float(x):
+    try:
+        return float(str(x).replace(",", ""))
+    except Exception:
+        return None
+
+class TypedColumn:
+    """Stripped text, lower-case text and parsed floats of one column, built once per load."""
+
+    def __init__(self, values):
+        s = pd.Series(values, dtype=object).fillna("").astype(str).str.strip()
+        self.text = s.to_numpy(dtype=object)
+        self._s = s
+        self._lower = None
+        self._num = None
+
+    @property
+    def lower(self):
+        if self._lower is None:
+            self._lower = self._s.str.lower()
+        return self._lower
+
+    @property
+    def num(self):
+        """(float values, parsed mask); parsed once per distinct cell text."""
+        if self._num is None:
+            parsed = {u: to_float(u) for u in pd.unique(self.text)}
+            ok = self._s.map({u: f is not None for u, f in parsed.items()}).to_numpy(dtype=bool)
+            vals = self._s.map({u: np.nan if f is None else f for u, f in parsed.items()})
+            self._num = (vals.to_numpy(dtype=float), ok)
+        return self._num
+
+def _clause(c):
+    col = c.get("column", "")
+    op = c.get("op", "")
+    v = (c.get("value", "") or "").strip()
+
+    def run(column, n):
+        tc = column(col)
+        if tc is None:
+            return np.zeros(n, dtype=bool)
+        if op in NUMERIC_OPS:
+            if op == "==":
+                out = tc.text == v
+            elif op == "!=":
+                out = tc.text != v
+            else:
+                out = np.zeros(n, dtype=bool)
+            b = to_float(v)
+            if b is not None:
+                num, ok = tc.num
+                with np.errstate(invalid="ignore"):
+                    out = np.where(ok, NUMERIC_OPS[op](num, b), out)
+            return np.asarray(out, dtype=bool)
+        if op in ("contains", "not contains"):
+            hit = tc.lower.str.contains(v.lower(), regex=False).to_numpy(dtype=bool)
+            return hit if op == "contains" else ~hit
+        return np.zeros(n, dtype=bool)
+    return run
+
+def compile_group(node):
+    """fn(column, n) -> bool mask for a rule or nested clause group; column(key) -> TypedColumn | None."""
+    parts = [compile_group(c) if "clauses" in c else _clause(c) for c in node.get("clauses", []) or []]
+    both = (node.get("logic", "AND") or "AND").upper() == "AND"
+
+    def run(column, n):
+        if not parts:
+            return np.zeros(n, dtype=bool)
+        masks = [p(column, n) for p in parts]
+        return np.logical_and.reduce(masks) if both else np.logical_or.reduce(masks)
+    return run
+
+class RuleSet:
+    """Compiled highlight_rules; `key` identifies the rule list it came from."""
+
+    def __init__(self, rules):
+        rules = rules or []
+        self.key = self.key_for(rules)
+        self._rules = [(r.get("color", "#FFEB3B"), compile_group(r)) for r in rules]
+
+    @staticmethod
+    def key_for(rules):
+        return json.dumps(rules or [], sort_keys=True)
+
+    def __bool__(self):
+        return bool(self._rules)
+
+    def colors(self, column, n):
+        """Color string (or None) per row."""
+        out = np.full(n, None, dtype=object)
+        for color, run in self._rules:
+            out[run(column, n)] = color
+        return out
@@ -0,0 +1,140 @@
+"""Season history: the dated survey / Tassles / Combinations / allocated CSVs in one SQLite file.
+
+The CSVs stay the source of truth. sync() stats them and re-ingests only files
+whose size or mtime moved since the last sync (and drops days whose file is
+gone), so cross-day questions ("how often was this male used?") are indexed
+queries instead of a rescan of every dated file.
+"""
+import re, sqlite3
+from contextlib import closing
+from pathlib import Path
+import pandas as pd
+
+SCHEMA_VERSION = 1
+
+# kind -> (folder under base, file name prefix, {table column: CSV header})
+SOURCES = {
+    "survey": ("tassle_survey_data", "tassel_survey_data_",
+               {"avariety": "AVARIETY", "stdvariety": "STDVARIETY", "can": "CAN", "cart": "CART",
+                "bay": "BAY", "tassels": "#TAS", "pollen": "POLLEN RATING", "sex": "SEX"}),
+    "tassles": ("Tassles", "Tassles_",
+                {"stdvariety": "STDVARIETY", "male": "MALE TASSLES", "female": "FEMALE TASSLES"}),
+    "combinations": ("Combinations", "Combinations_",
+                     {"female_avar": "FEMALE_AVAR", "male_avar": "MALE_AVAR", "female_std": "FEMALE_STD",
+                      "male_std": "MALE_STD", "female_numvar": "FEMALE_NUMVAR", "male_numvar": "MALE_NUMVAR"}),
+    "allocated": ("Crosses for the day", "allocated_", {"female_std": "FEMALE", "male_std": "MALE"}),
+}
+INTEGER = {"tassels", "male", "female"}
+INDEXES = {
+    "survey": [("stdvariety",)],
+    "tassles": [("stdvariety",)],
+    "combinations": [("female_std", "male_std"), ("male_std",)],
+    "allocated": [("female_std", "male_std"), ("male_std",)],
+}
+
+class HistoryStore:
+    def __init__(self, path, base):
+        self.path = Path(path)
+        self.base = Path(base)
+
+    def _connect(self):
+        con = sqlite3.connect(self.path)
+        if con.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            for kind in list(SOURCES) + ["files"]:
+                con.execute(f"DROP TABLE IF EXISTS {kind}")
+            con.execute("CREATE TABLE files (path TEXT PRIMARY KEY, kind TEXT, day INTEGER, size INTEGER, mtime_ns INTEGER)")
+            for kind, (_, _, cols) in SOURCES.items():
+                defs = ", ".join(f"{c} {'INTEGER' if c in INTEGER else 'TEXT'}" for c in cols)
+                con.execute(f"CREATE TABLE {kind} (day INTEGER, {defs})")
+                con.execute(f"CREATE INDEX {kind}_day ON {kind} (day)")
+                for cols_ in INDEXES[kind]:
+                    con.execute(f"CREATE INDEX {kind}_{'_'.join(cols_)} ON {kind} ({', '.join(cols_)})")
+            con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            con.commit()
+        return con
+
+    # ---- ingestion ----
+    def _files(self):
+        """{path: (kind, day, size, mtime_ns)} of the dated CSVs on disk."""
+        out = {}
+        for kind, (folder, prefix, _) in SOURCES.items():
+            pat = re.compile(re.escape(prefix) + r"(\d+)\.csv$")
+            d = self.base / folder
+            if not d.is_dir():
+                continue
+            for p in d.iterdir():
+                m = pat.match(p.name)
+                if m:
+                    st = p.stat()
+                    out[str(p)] = (kind, int(m.group(1)), st.st_size, st.st_mtime_ns)
+        return out
+
+    @staticmethod
+    def _rows(path, kind):
+        cols = SOURCES[kind][2]
+        df = pd.read_csv(path, dtype=str).fillna("")
+        df.columns = [str(c).strip().upper() for c in df.columns]
+        out = pd.DataFrame({c: (df[h].str.strip() if h in df.columns else "") for c, h in cols.items()},
+                           index=df.index)
+        for c in INTEGER & set(cols):
+            out[c] = pd.to_numeric(out[c], errors="coerce").fillna(0).astype(int)
+        return out
+
+    def sync(self):
+        """Bring the store in line with the CSVs; returns how many files were (re)ingested or dropped."""
+        on_disk = self._files()
+        with closing(self._connect()) as con:
+            known = {p: (k, d, s, t) for p, k, d, s, t in con.execute("SELECT path, kind, day, size, mtime_ns FROM files")}
+            changed = [p for p, v in on_disk.items() if known.get(p) != v]
+            gone = [p for p in known if p not in on_disk]
+            for p in gone:
+                kind, day = known[p][:2]
+                con.execute(f"DELETE FROM {kind} WHERE day = ?", (day,))
+                con.execute("DELETE FROM files WHERE path = ?", (p,))
+            for p in changed:
+                kind, day, size, mtime = on_disk[p]
+                try:
+                    rows = self._rows(p, kind)
+                except Exception:
+                    continue   # unreadable (e.g. being written): try again next sync
+                con.execute(f"DELETE FROM {kind} WHERE day = ?", (day,))
+                cols = list(rows.columns)
+                con.executemany(f"INSERT INTO {kind} (day, {', '.join(cols)}) VALUES (?{', ?' * len(cols)})",
+                                ((day, *r) for r in rows.itertuples(index=False)))
+                con.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (p, kind, day, size, mtime))
+            con.commit()
+        return len(changed) + len(gone)
+
+    # ---- queries ----
+    def query(self, sql, params=()):
+        """DataFrame of any SELECT over the survey / tassles / combinations / allocated tables."""
+        with closing(self._connect()) as con:
+            return pd.read_sql_query(sql, con, params=params)
+
+    def days(self, kind="allocated"):
+        with closing(self._connect()) as con:
+            return [d for (d,) in con.execute(f"SELECT DISTINCT day FROM {kind} ORDER BY day")]
+
+    def usage(self, variety):
+        """Season summary of one STD variety: crosses it was used in, days surveyed, tassels counted."""
+        v = str(variety).strip()
+        with closing(self._connect()) as con:
+            one = lambda sql: con.execute(sql, (v,)).fetchone()
+            col = lambda sql: [d for (d,) in con.execute(sql, (v,))]
+            return {
+                "female_crosses": one("SELECT COUNT(*) FROM allocated WHERE female_std = ?")[0],
+                "male_crosses": one("SELECT COUNT(*) FROM allocated WHERE male_std = ?")[0],
+                "male_partners": one("SELECT COUNT(DISTINCT female_std) FROM allocated WHERE male_std = ?")[0],
+                "female_partners": one("SELECT COUNT(DISTINCT male_std) FROM allocated WHERE female_std = ?")[0],
+                "days_used": col("SELECT DISTINCT day FROM allocated WHERE female_std = ?1 OR male_std = ?1 ORDER BY day"),
+                "days_surveyed": col("SELECT DISTINCT day FROM tassles WHERE stdvariety = ? ORDER BY day"),
+                "female_tassels": one("SELECT COALESCE(SUM(female), 0) FROM tassles WHERE stdvariety = ?")[0],
+                "male_tassels": one("SELECT COALESCE(SUM(male), 0) FROM tassles WHERE stdvariety = ?")[0],
+            }
+
+    def pair(self, female, male):
+        """Days on which female x male was allocated (with repeats)."""
+        with closing(self._connect()) as con:
+            return [d for (d,) in con.execute(
+                "SELECT day FROM allocated WHERE female_std = ? AND male_std = ? ORDER BY day",
+                (str(female).strip(), str(male).strip()))]
@@ -0,0 +1,274 @@
+"""Kinship (AMAT) lookups by STD variety.
+
+The relationship matrix is addressed positionally: each STD id maps to its
+row/column number once, and a whole day's pairs are filled with a single
+NumPy gather instead of one `.loc` call per pair.
+
+Square, symmetric matrices are additionally converted once into a packed
+float64 upper triangle (`<name>.tri.npy`) plus an id sidecar (`<name>.ids.json`)
+in a cache folder; later runs memory-map the triangle instead of re-parsing
+the CSV. The cache is rebuilt when the source's content hash changes. It
+holds numbers, not the CSV text, so it serves numeric lookups (the KINSHIP
+exclusion, partner ranking); Possible_crossings takes the text from the CSV.
+"""
+import os, csv, json, hashlib, threading
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 2                 # 2: float64 triangle (1 was float32)
+
+def _positions(labels, keys):
+    """Position of each key in labels (first occurrence), -1 when absent."""
+    idx = pd.Index(labels)
+    if idx.is_unique:
+        return idx.get_indexer(keys)
+    keep = ~idx.duplicated()
+    first = np.flatnonzero(keep)
+    p = idx[keep].get_indexer(keys)
+    return np.where(p >= 0, first[np.clip(p, 0, None)], -1)
+
+class KinshipIndex:
+    """AMAT values plus positional row/column indexes keyed on STD variety."""
+
+    def __init__(self, row_ids, col_ids, values):
+        self.row_ids = pd.Index([str(x).strip() for x in row_ids])
+        self.col_ids = pd.Index([str(x).strip() for x in col_ids])
+        self.values = values
+
+    @classmethod
+    def from_csv(cls, path, canon=None):
+        amx = pd.read_csv(path, index_col=0, dtype=str)
+        rows, cols = amx.index.astype(str), amx.columns.astype(str)
+        if canon is not None:
+            rows, cols = canon(rows), canon(cols)
+        return cls(rows, cols, amx.to_numpy(dtype=object))
+
+    def gather(self, female_std, male_std):
+        """KINSHIP for each (female, male) pair; falls back to [male, female], "" when absent."""
+        f = pd.Series(female_std, dtype=str).str.strip().to_numpy()
+        m = pd.Series(male_std, dtype=str).str.strip().to_numpy()
+        fr = _positions(self.row_ids, f); mc = _positions(self.col_ids, m)
+        mr = _positions(self.row_ids, m); fc = _positions(self.col_ids, f)
+        direct = (fr >= 0) & (mc >= 0)
+        swapped = ~direct & (mr >= 0) & (fc >= 0)
+
+        out = np.full(len(f), "", dtype=object)
+        out[direct] = self.values[fr[direct], mc[direct]]
+        out[swapped] = self.values[mr[swapped], fc[swapped]]
+        return out
+
+# -------------------- Packed float64 cache --------------------
+def _tri_offsets(i, n):
+    """Start of row i in a packed upper triangle (diagonal included)."""
+    return i * n - (i * (i - 1)) // 2
+
+def file_sha1(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(chunk), b""):
+            h.update(b)
+    return h.hexdigest()
+
+def _tmp_path(path, suffix=".tmp"):
+    """Per-process, per-thread temp name next to path: a match and a speculation may build the same cache."""
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}{suffix}")
+
+def _write_meta(path, meta):
+    tmp = _tmp_path(path)
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _to_float(cells):
+    return pd.to_numeric(pd.Series(cells, dtype=object).str.strip().replace("", np.nan),
+                         errors="coerce").to_numpy(dtype=np.float64)
+
+class PackedKinship:
+    """Symmetric AMAT stored as a (memory-mapped) float64 upper triangle."""
+
+    def __init__(self, ids, tri):
+        self.ids = pd.Index(ids)
+        self.n = len(ids)
+        self.tri = tri
+
+    def gather(self, female_std, male_std):
+        """KINSHIP for each pair as float64; NaN when either id is not in the matrix."""
+        f = pd.Series(female_std, dtype=str).str.strip().to_numpy()
+        m = pd.Series(male_std, dtype=str).str.strip().to_numpy()
+        i = _positions(self.ids, f); j = _positions(self.ids, m)
+        ok = (i >= 0) & (j >= 0)
+        lo = np.minimum(i, j)[ok].astype(np.int64); hi = np.maximum(i, j)[ok].astype(np.int64)
+        out = np.full(len(f), np.nan, dtype=np.float64)
+        out[ok] = self.tri[_tri_offsets(lo, self.n) + (hi - lo)]
+        return out
+
+def build_packed(csv_path, tri_path, atol=1e-6):
+    """Stream a square AMAT CSV into a packed float64 triangle; returns the id list.
+
+    Raises ValueError when the matrix is not square (same ids, same order) or not symmetric.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        r = csv.reader(f)
+        ids = [h.strip() for h in next(r)[1:]]
+        n = len(ids)
+        tri = np.lib.format.open_memmap(tri_path, mode="w+", dtype=np.float64, shape=(n * (n + 1) // 2,))
+        try:
+            i = -1
+            for row in r:
+                if not row:
+                    continue
+                i += 1
+                if i >= n or row[0].strip() != ids[i]:
+                    raise ValueError("AMAT rows do not match its columns")
+                vals = _to_float(row[1:n + 1] + [""] * (n + 1 - len(row)))
+                start = _tri_offsets(i, n)
+                tri[start:start + n - i] = vals[i:]
+                if i:
+                    # lower part of this row must mirror what earlier rows stored
+                    k = np.arange(i)
+                    upper = tri[_tri_offsets(k, n) + (i - k)]
+                    if not np.allclose(vals[:i], upper, atol=atol, equal_nan=True):
+                        raise ValueError("AMAT is not symmetric")
+            if i != n - 1:
+                raise ValueError("AMAT rows do not match its columns")
+            tri.flush()
+        finally:
+            del tri
+    return ids
+
+def _cache_stem(amat_path, cache_dir):
+    """cache_dir/<stem>-<hash of absolute path>; keeps same-named files apart."""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = hashlib.sha1(str(Path(amat_path).resolve()).encode("utf-8")).hexdigest()[:10]
+    return cache_dir / f"{Path(amat_path).stem}-{key}"
+
+def _fresh_meta(src, meta_path):
+    """Sidecar meta if it still describes src (re-hashing only when the mtime moved), else None."""
+    st = Path(src).stat()
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    if meta.get("version") != CACHE_VERSION or meta.get("size") != st.st_size:
+        return None
+    if meta.get("mtime_ns") != st.st_mtime_ns:
+        # touched/copied: only rebuild if the content really changed
+        if file_sha1(src) != meta.get("sha1"):
+            return None
+        meta["mtime_ns"] = st.st_mtime_ns
+        _write_meta(meta_path, meta)
+    return meta
+
+def _new_meta(src):
+    st = Path(src).stat()
+    return {"version": CACHE_VERSION, "source": str(src), "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns, "sha1": file_sha1(src)}
+
+def load_packed(amat_path, cache_dir):
+    """PackedKinship for amat_path, (re)building the cache in cache_dir when the source changed."""
+    stem = _cache_stem(amat_path, cache_dir)
+    tri_path = stem.with_name(stem.name + ".tri.npy")
+    meta_path = stem.with_name(stem.name + ".ids.json")
+
+    meta = _fresh_meta(amat_path, meta_path) if tri_path.exists() else None
+    if meta is None:
+        meta = dict(_new_meta(amat_path), ids=None)
+        tmp = _tmp_path(tri_path, ".tmp.npy")
+        try:
+            meta["ids"] = build_packed(amat_path, tmp)
+            os.replace(tmp, tri_path)
+        except ValueError:
+            # remember that this version of the file cannot be packed
+            tri_path.touch()
+            _write_meta(meta_path, meta)
+            raise
+        finally:
+            tmp.unlink(missing_ok=True)
+        _write_meta(meta_path, meta)
+    if meta.get("ids") is None:
+        raise ValueError("AMAT is not a square, symmetric matrix")
+    return PackedKinship(meta["ids"], np.load(tri_path, mmap_mode="r"))
+
+# -------------------- Byte-offset row index --------------------
+class RowOffsetIndex:
+    """Byte offset of every AMAT row, so only the rows of today's parents are parsed.
+
+    The sidecar (`<name>.rows.json`) maps the first field of each data line to
+    where that line starts; the header line is re-read on open.
+    """
+
+    def __init__(self, path, offsets, canon=None):
+        self.path = Path(path)
+        self.offsets = offsets
+        with open(self.path, newline="", encoding="utf-8-sig") as f:
+            self.header = [h.strip() for h in next(csv.reader(f))[1:]]
+        if canon is not None:
+            self.header = list(canon(self.header))
+            renamed = {}
+            for rid, off in zip(canon(list(offsets)), offsets.values()):
+                renamed.setdefault(rid, off)
+            self.offsets = renamed
+
+    @staticmethod
+    def scan(path):
+        """{row id: byte offset} for every data line (ids are assumed not to contain commas)."""
+        offsets = {}
+        with open(path, "rb") as f:
+            f.readline()
+            pos = f.tell()
+            for line in f:
+                rid = line.split(b",", 1)[0].strip().strip(b'"').decode("utf-8").strip()
+                if rid and rid not in offsets:
+                    offsets[rid] = pos
+                pos += len(line)
+        return offsets
+
+    @classmethod
+    def load(cls, amat_path, cache_dir, canon=None):
+        stem = _cache_stem(amat_path, cache_dir)
+        meta_path = stem.with_name(stem.name + ".rows.json")
+        meta = _fresh_meta(amat_path, meta_path)
+        if meta is None:
+            meta = dict(_new_meta(amat_path), offsets=cls.scan(amat_path))
+            _write_meta(meta_path, meta)
+        return cls(amat_path, meta["offsets"], canon)
+
+    def subset(self, ids):
+        """KinshipIndex over ids x ids, parsed from just those rows of the CSV."""
+        want = list(dict.fromkeys(str(x).strip() for x in ids))
+        rows = sorted((self.offsets[i], i) for i in want if i in self.offsets)
+        cols = _positions(self.header, want)
+        col_ids = [w for w, j in zip(want, cols) if j >= 0]
+        cols = cols[cols >= 0]
+        values = np.full((len(rows), len(col_ids)), np.nan, dtype=object)
+        with open(self.path, "rb") as f:
+            for r, (off, _) in enumerate(rows):
+                f.seek(off)
+                cells = next(csv.reader([f.readline().decode("utf-8")]))[1:]
+                for c, j in enumerate(cols):
+                    if j < len(cells) and cells[j] != "":
+                        values[r, c] = cells[j]
+        return KinshipIndex([rid for _, rid in rows], col_ids, values)
+
+def load_kinship(amat_path, cache_dir=None, packed=True, wanted=None, canon=None):
+    """Best available AMAT lookup.
+
+    With a cache_dir: the packed float64 triangle (when `packed` and the matrix
+    is square/symmetric; numbers only), else the row-offset index restricted to
+    `wanted` ids (the exact CSV text).
+    Without one, or without `wanted`, the whole CSV is parsed. canon (e.g.
+    VarietyRegistry.std_of) rewrites the matrix ids before any lookup.
+    """
+    if cache_dir is not None:
+        if packed:
+            try:
+                index = load_packed(amat_path, cache_dir)
+                if canon is not None:
+                    index.ids = pd.Index(canon(list(index.ids)))
+                return index
+            except ValueError:
+                pass  # not square/symmetric -> keep exact CSV lookups
+        if wanted is not None:
+            return RowOffsetIndex.load(amat_path, cache_dir, canon).subset(wanted)
+    return KinshipIndex.from_csv(amat_path, canon)
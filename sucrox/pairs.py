@@ -0,0 +1,169 @@
+"""A day's candidate crosses in normalized form.
+
+Every Possible_crossings column belongs to one of three tables: the female
+parents (FEMALE_* traits, one row per parent), the male parents, or the pairs
+themselves (FEMALE_IDX / MALE_IDX into the parent tables, plus pair values
+such as KINSHIP). Wide rows are only built by gathering through the index
+arrays, one column at a time, when something is displayed or exported.
+
+On disk the three tables sit next to the wide CSV in
+`Possible_crossings_<day>.pairs/` together with `layout.json`, which lists the
+wide column order, the table each column lives in and the file format: CSV,
+or typed Parquet (needs pyarrow) where reads can skip unwanted columns entirely.
+"""
+import os, json, importlib.util
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+LAYOUT_VERSION = 1
+TABLES = {"F": "females", "M": "males", "P": "pairs"}
+FORMATS = ("csv", "parquet")
+INDEX = {"F": "FEMALE_IDX", "M": "MALE_IDX"}
+
+def parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+def as_text(col):
+    """Cells as they read back from the CSV: numbers via str(), missing values as ""."""
+    if col.dtype == object:
+        return col.where(col.notna(), "").astype(str)
+    return col.astype(str).where(col.notna(), "")
+
+class PairColumn:
+    """One wide column as per-parent values plus the pair -> parent index; indexing gathers."""
+
+    def __init__(self, values, idx):
+        self.values = values
+        self.idx = idx
+
+    def __len__(self):
+        return len(self.idx)
+
+    def __getitem__(self, key):
+        return self.values[self.idx[key]]
+
+    def __array__(self, dtype=None, copy=None):
+        a = self.values[self.idx]
+        return a if dtype is None else a.astype(dtype)
+
+class PairTable:
+    def __init__(self, females, males, pairs, layout):
+        self.tables = {"F": females, "M": males, "P": pairs}
+        self.layout = [tuple(x) for x in layout]   # [(column, "F" | "M" | "P")] in wide order
+
+    def __len__(self):
+        return len(self.tables["P"])
+
+    @property
+    def columns(self):
+        return [name for name, _ in self.layout]
+
+    def column(self, name, side=None):
+        """Wide values of one column: a PairColumn for parent columns, the array itself for pair columns."""
+        side = side or dict(self.layout)[name]
+        values = self.tables[side][name].to_numpy()
+        if side == "P":
+            return values
+        return PairColumn(values, self.tables["P"][INDEX[side]].to_numpy(dtype=np.int64))
+
+    def expand(self, columns=None, rows=None):
+        """Wide DataFrame for `columns` (default: all, in layout order) and `rows` (slice/array)."""
+        want = self.layout if columns is None else [(c, s) for c, s in self.layout if c in set(columns)]
+        sel = slice(None) if rows is None else rows
+        return pd.DataFrame({name: self.column(name, side)[sel] for name, side in want})
+
+    def to_wide_csv(self, path, chunk=50000, start=0, progress=None):
+        """Write the wide CSV in row chunks, so at most `chunk` wide rows exist at once.
+
+        With start > 0 the file already holds the header and rows [0, start);
+        only the rows after them are appended. progress(fraction) is called per chunk.
+        """
+        n = len(self)
+        with open(path, "a" if start else "w", newline="", encoding="utf-8") as f:
+            if not n:
+                self.expand().to_csv(f, index=False)
+            for a in range(start, n, chunk):
+                if progress is not None:
+                    progress((a - start) / (n - start))
+                self.expand(rows=slice(a, min(n, a + chunk))).to_csv(f, index=False, header=a == 0)
+
+    def save(self, folder, fmt="csv", **meta):
+        """Write the three tables and layout.json; "parquet" falls back to CSV without pyarrow.
+
+        `meta` (e.g. key=...) is stored in layout.json next to the layout. Returns the format actually written.
+        """
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        layout_path = folder / "layout.json"
+        layout_path.unlink(missing_ok=True)   # written last: marks the folder complete
+        for name in TABLES.values():
+            for other in FORMATS:
+                (folder / f"{name}.{other}").unlink(missing_ok=True)
+        if fmt == "parquet":
+            try:
+                for side, name in TABLES.items():
+                    self.tables[side].to_parquet(folder / f"{name}.parquet", index=False)
+            except Exception:
+                fmt = "csv"   # no pyarrow, or a column Arrow cannot type
+        if fmt != "parquet":
+            fmt = "csv"
+            for side, name in TABLES.items():
+                self.tables[side].to_csv(folder / f"{name}.csv", index=False, encoding="utf-8")
+        tmp = layout_path.with_name(layout_path.name + ".tmp")
+        tmp.write_text(json.dumps({**meta, "version": LAYOUT_VERSION, "format": fmt,
+                                   "columns": self.layout}),
+                       encoding="utf-8")
+        os.replace(tmp, layout_path)
+        return fmt
+
+    @staticmethod
+    def read_meta(folder):
+        """layout.json of a saved table, or None when the folder is missing/incomplete."""
+        try:
+            meta = json.loads((Path(folder) / "layout.json").read_text(encoding="utf-8"))
+        except Exception:
+            return None
+        if meta.get("version") != LAYOUT_VERSION:
+            return None
+        return meta
+
+    @classmethod
+    def read_layout(cls, folder):
+        """[(column, side)] of a saved table (no row data is read), or None."""
+        meta = cls.read_meta(folder)
+        return None if meta is None else [tuple(x) for x in meta["columns"]]
+
+    @classmethod
+    def load(cls, folder, columns=None, text=True):
+        """Saved table reading only the parent/pair columns in `columns`.
+
+        With text=True cells come back as the wide CSV would show them ("" for
+        empty); text=False keeps Parquet's types (numbers stay numeric).
+        """
+        meta = cls.read_meta(folder)
+        if meta is None:
+            raise FileNotFoundError(Path(folder) / "layout.json")
+        layout = [tuple(x) for x in meta["columns"]]
+        fmt = meta.get("format", "csv")
+        want = set(c for c, _ in layout) if columns is None else set(columns)
+        tables = {}
+        for side, name in TABLES.items():
+            cols = [c for c, s in layout if s == side and c in want]
+            if side == "P":
+                cols = list(INDEX.values()) + cols
+            path = Path(folder) / f"{name}.{fmt}"
+            if fmt == "parquet":
+                df = pd.read_parquet(path, columns=cols)
+                if text:
+                    for c in df.columns:
+                        if c not in INDEX.values():
+                            df[c] = as_text(df[c])
+            else:
+                df = pd.read_csv(path, dtype=str, usecols=cols,
+                                 keep_default_na=False, na_filter=False, encoding="utf-8")
+            tables[side] = df
+        for c in INDEX.values():
+            tables["P"][c] = tables["P"][c].astype(np.int64)
+        return cls(tables["F"], tables["M"], tables["P"], layout if columns is None else
+                   [(c, s) for c, s in layout if c in want])
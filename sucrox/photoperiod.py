@@ -0,0 +1,101 @@
+"""In-memory index over Photoperiod_Pos (greenhouse layout).
+
+Loaded once and re-read only when the file's mtime/size changes:
+  - (BAY, CART, CAN) -> (AVARIETY, STDVARIETY) for the survey preview
+  - variety (AVARIETY or STDVARIETY, any case / zero padding, or an alias
+    when given the variety registry) -> all of its cans
+  - sorted names for prefix search
+"""
+import os, csv, time, bisect
+from pathlib import Path
+
+from sucrox.varieties import variety_key
+
+NO_FILE = ("No file", "No file")
+NO_MATCH = ("No match", "No match")
+
+class PhotoperiodIndex:
+    def __init__(self, path=None, recheck=2.0, registry=None):
+        self.path = Path(path) if path else None
+        self.recheck = recheck      # seconds between stat() checks of the file
+        self.registry = registry    # path -> VarietyRegistry (engine.variety_registry), or None
+        self._stamp = None
+        self._checked = 0.0
+        self.by_location = {}       # (bay, cart, can) -> (av, std)
+        self.by_variety = {}        # _key(VARIETY) -> [(bay, cart, can), ...]
+        self._names = []            # sorted (NAME upper, display name)
+
+    def set_path(self, path):
+        path = Path(path) if path else None
+        if path != self.path:
+            self.path = path
+            self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """Re-read the file if it changed (stat at most every `recheck` seconds unless forced)."""
+        now = time.monotonic()
+        if not force and self._stamp is not None and now - self._checked < self.recheck:
+            return
+        self._checked = now
+        try:
+            st = os.stat(self.path) if self.path else None
+        except OSError:
+            st = None
+        stamp = (st.st_mtime_ns, st.st_size) if st else False
+        if force or stamp != self._stamp:
+            if st:
+                self._load()
+            else:
+                self._clear()
+            self._stamp = stamp
+
+    def _key(self, name, reg=None):
+        """variety_key of the registry's STDVARIETY for name (of name itself without a registry)."""
+        return variety_key(reg.std(name) if reg is not None else name)
+
+    def _clear(self):
+        self.by_location, self.by_variety, self._names = {}, {}, []
+
+    def _load(self):
+        by_location, by_variety, names = {}, {}, {}
+        reg = self.registry(self.path) if self.registry else None
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = (str(row.get("BAY")).strip(), str(row.get("CART")).strip(), str(row.get("CAN")).strip())
+                av = str(row.get("AVARIETY") or row.get("avariety") or "").strip()
+                std = str(row.get("STDVARIETY") or av).strip()
+                by_location.setdefault(key, (av, std))
+                for name in {av, std}:
+                    if not name:
+                        continue
+                    cans = by_variety.setdefault(self._key(name, reg), [])
+                    if key not in cans:
+                        cans.append(key)
+                    names.setdefault(name.upper(), name)
+        self.by_location, self.by_variety = by_location, by_variety
+        self._names = sorted(names.items())
+
+    def lookup(self, bay, cart, can):
+        """(AVARIETY, STDVARIETY) at a location; NO_FILE / NO_MATCH like the old CSV scan."""
+        self.refresh()
+        if not self._stamp:
+            return NO_FILE
+        return self.by_location.get((str(bay), str(cart), str(can)), NO_MATCH)
+
+    def locations(self, variety):
+        """Every (bay, cart, can) holding variety (any spelling the registry knows, or any case / zero padding)."""
+        self.refresh()
+        reg = self.registry(self.path) if self.registry and self._stamp else None
+        return list(self.by_variety.get(self._key(variety, reg), []))
+
+    def search(self, prefix, limit=50):
+        """Variety names (AVARIETY/STDVARIETY) starting with prefix, case-insensitive."""
+        self.refresh()
+        p = str(prefix).strip().upper()
+        if not p:
+            return []
+        i = bisect.bisect_left(self._names, (p,))
+        out = []
+        while i < len(self._names) and self._names[i][0].startswith(p) and len(out) < limit:
+            out.append(self._names[i][1]); i += 1
+        return out
@@ -0,0 +1,118 @@
+"""Content-addressed cache for pipeline stages.
+
+A stage result is stored under a hash of everything it was computed from:
+input file contents, upstream frames and the settings it used. Re-running a
+stage whose inputs did not change loads the pickled result instead. Files are
+identified by a SHA-1 of their content, re-hashed only when size/mtime move.
+"""
+import os, json, pickle, hashlib, threading
+from pathlib import Path
+import pandas as pd
+
+STAGE_VERSION = 2   # bump when a stage's output format or logic changes
+MISSING = object()
+
+def digest(*parts):
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def frame_key(df):
+    """Hash of a DataFrame's column names and values."""
+    return digest(list(df.columns), pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+class StageCache:
+    def __init__(self, folder, keep=4, enabled=True):
+        self.folder = Path(folder)
+        self.keep = keep             # results kept per stage
+        self.enabled = enabled
+        self.report = {}             # stage -> "hit" | "miss" for this run
+        self._files = None
+        self._lock = threading.Lock()   # file_key is called from loader threads
+
+    # ---- file fingerprints ----
+    def _files_path(self):
+        return self.folder / "files.json"
+
+    def file_key(self, path):
+        """Content hash of a file ("missing" when absent); re-hashed only when size/mtime changed."""
+        path = Path(path)
+        try:
+            st = path.stat()
+        except OSError:
+            return "missing"
+        if not path.is_file():
+            return "missing"
+        name = str(path.resolve())
+        with self._lock:
+            if self._files is None:
+                try:
+                    self._files = json.loads(self._files_path().read_text(encoding="utf-8"))
+                except Exception:
+                    self._files = {}
+            known = self._files.get(name)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for b in iter(lambda: f.read(1 << 20), b""):
+                h.update(b)
+        with self._lock:
+            self._files[name] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+            if self.enabled:
+                self._write(self._files_path(), json.dumps(self._files).encode("utf-8"))
+        return h.hexdigest()
+
+    # ---- results ----
+    def key(self, stage, *parts):
+        return digest(STAGE_VERSION, stage, *parts)
+
+    def _path(self, stage, key):
+        return self.folder / "stages" / f"{stage}-{key}.pkl"
+
+    def get(self, stage, key):
+        """Cached result or MISSING; records the hit/miss in self.report."""
+        value = MISSING
+        if self.enabled:
+            try:
+                with open(self._path(stage, key), "rb") as f:
+                    value = pickle.load(f)
+                os.utime(self._path(stage, key))   # most recently used survives pruning
+            except Exception:
+                value = MISSING
+        self.report[stage] = "miss" if value is MISSING else "hit"
+        return value
+
+    def put(self, stage, key, value):
+        if not self.enabled:
+            return value
+        self._write(self._path(stage, key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        self._prune(stage)
+        return value
+
+    def _prune(self, stage):
+        """Keep the `keep` most recently used results of a stage; files another thread removed are skipped."""
+        found = []
+        for p in self.folder.joinpath("stages").glob(f"{stage}-*.pkl"):
+            try:
+                found.append((p.stat().st_mtime_ns, p))
+            except OSError:
+                continue
+        for _, p in sorted(found)[:-self.keep]:
+            try:
+                p.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def cached(self, stage, key, compute):
+        value = self.get(stage, key)
+        return self.put(stage, key, compute()) if value is MISSING else value
+
+    @staticmethod
+    def _write(path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
@@ -0,0 +1,125 @@
+"""One registry for every spelling of a variety id.
+
+Photoperiod_Pos ties AVARIETY, STDVARIETY, NUMVAR and VARIETY together;
+alias_map.json adds further spellings -> STDVARIETY. Every spelling is
+normalized (case, whitespace, zero-padding of the series number: `HOCP04-847`,
+`hocp04-0847` and `HoCP04-0847` are one key) and mapped to a record number, so
+resolving any form is a single dict lookup. The canonical strings are
+interned: every table built from the registry shares the same objects.
+"""
+import re, sys, json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from sucrox.stagecache import digest
+
+_SERIES = re.compile(r"([A-Z]*)(\d{2})-0*(\d+)")
+
+def variety_key(name):
+    """Normalized lookup key: upper case, no whitespace, series number padded to 4 digits."""
+    s = re.sub(r"\s+", "", str(name or "")).upper()
+    m = _SERIES.fullmatch(s)
+    return f"{m.group(1)}{m.group(2)}-{int(m.group(3)):04d}" if m else s
+
+class VarietyRegistry:
+    def __init__(self):
+        self._ids = {}                  # variety_key(any spelling) -> record number
+        self._seen = {}                 # exact spelling looked up -> record number (skips normalizing)
+        self._std, self._av, self._num = [], [], []
+
+    def __len__(self):
+        return len(self._std)
+
+    def _record(self, std):
+        i = self._ids.get(variety_key(std))
+        if i is None:
+            i = len(self._std)
+            self._std.append(sys.intern(std)); self._av.append(""); self._num.append("")
+            self._ids[variety_key(std)] = i
+        return i
+
+    def add(self, av="", std="", num="", *aliases):
+        """Register one Photoperiod row; a later row wins for a spelling, like the old key maps."""
+        av, std, num = str(av).strip(), str(std).strip(), str(num).strip()
+        if not (av or std or num):
+            return
+        i = self._record(std or av or num)
+        if av and not self._av[i]: self._av[i] = sys.intern(av)
+        if num and not self._num[i]: self._num[i] = sys.intern(num)
+        for name in (std, av, num, *aliases):
+            if str(name).strip():
+                self._ids[variety_key(name)] = i
+
+    def alias(self, name, std):
+        """name -> the variety std; spellings already known keep their record."""
+        std = str(std).strip()
+        if std:
+            self._ids.setdefault(variety_key(name), self._record(std))
+
+    @classmethod
+    def load(cls, pp_path=None, alias_path=None):
+        """Registry of the Photoperiod file and alias_map.json (either may be missing)."""
+        reg = cls()
+        if pp_path and Path(pp_path).exists():
+            df = pd.read_csv(pp_path, dtype=str).fillna("")
+            cols = {c.upper().strip(): c for c in df.columns}
+            get = lambda name: df[cols[name]] if name in cols else pd.Series("", index=df.index)
+            if all(c in cols for c in ("AVARIETY", "STDVARIETY", "NUMVAR")):
+                for row in zip(get("AVARIETY"), get("STDVARIETY"), get("NUMVAR"), get("VARIETY")):
+                    reg.add(*row)
+        if alias_path and Path(alias_path).exists():
+            try:
+                aliases = json.loads(Path(alias_path).read_text(encoding="utf-8"))
+            except Exception:
+                aliases = {}
+            for name, std in aliases.items():
+                reg.alias(name, std)
+        return reg
+
+    # ---- resolution ----
+    def find(self, name):
+        """Record number of any spelling, or None."""
+        try:
+            return self._seen[name]
+        except (KeyError, TypeError):
+            pass
+        i = self._ids.get(variety_key(name))
+        try:
+            self._seen[name] = i
+        except TypeError:
+            pass
+        return i
+
+    def std(self, name):
+        """STDVARIETY of any spelling; unknown names come back stripped."""
+        i = self.find(name)
+        return self._std[i] if i is not None else str(name).strip()
+
+    def avar(self, name):
+        i = self.find(name)
+        return self._av[i] if i is not None and self._av[i] else str(name).strip()
+
+    def numvar(self, name):
+        i = self.find(name)
+        return self._num[i] if i is not None and self._num[i] else str(name).strip()
+
+    def resolve(self, name):
+        """(AVARIETY, STDVARIETY, NUMVAR); parts the registry does not know are the name itself."""
+        return self.avar(name), self.std(name), self.numvar(name)
+
+    def _many(self, one, names):
+        codes, uniq = pd.factorize(pd.Series(np.asarray(names, dtype=object)).astype(str))
+        return np.array([one(u) for u in uniq] + [""], dtype=object)[codes]
+
+    def std_of(self, names):
+        """Array of std() per name (each distinct name resolved once)."""
+        return self._many(self.std, names)
+
+    def numvar_of(self, names):
+        return self._many(self.numvar, names)
+
+    @property
+    def key(self):
+        """Stable fingerprint of the mapping (for cache keys)."""
+        return digest(self._std, self._av, self._num, sorted(self._ids.items()))
@@ -0,0 +1,27 @@
+import numpy as np
+
+from sucrox.assign import max_weight_flow
+
+def test_best_total_not_greedy():
+    # greedy takes a-x (10) and is left with b-y (0); the best pair of crosses is a-y + b-x (18)
+    mask = max_weight_flow(["a", "a", "b", "b"], ["x", "y", "x", "y"], [10, 9, 9, 0], {"a": 1, "b": 1}, {"x": 1, "y": 1})
+    assert mask.tolist() == [False, True, True, False]
+
+def test_capacities_bound_the_crosses():
+    females, males = ["a", "a", "a", "b"], ["x", "y", "z", "x"]
+    mask = max_weight_flow(females, males, [5, 4, 3, 1], {"a": 2, "b": 0}, {"x": 1, "y": 1, "z": 1})
+    assert mask.tolist() == [True, True, False, False]
+
+def test_fill_takes_every_cross_the_capacities_allow():
+    args = (["a", "b"], ["x", "y"], [3.0, -1.0], {"a": 1, "b": 1}, {"x": 1, "y": 1})
+    assert max_weight_flow(*args, fill=True).tolist() == [True, True]
+    assert max_weight_flow(*args, fill=False).tolist() == [True, False]
+
+def test_no_candidates():
+    mask = max_weight_flow([], [], [], {}, {})
+    assert mask.dtype == bool and len(mask) == 0
+
+def test_parents_missing_from_caps_are_not_used():
+    mask = max_weight_flow(["a", "b"], ["x", "x"], [1, 2], {"a": 1}, {"x": 2})
+    assert mask.tolist() == [True, False]
+    assert isinstance(mask, np.ndarray)
@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from sucrox.config import ConfigStore
+
+DEFAULTS = {"rules": {"females_per_male": 1}, "paths": {}, "groups": {}}
+
+@pytest.fixture
+def store(tmp_path):
+    s = ConfigStore(tmp_path, DEFAULTS, recheck=0.0, write_delay=0.2)
+    yield s
+    s.flush()
+
+def counting(store):
+    writes = []
+    write = store._write
+    store._write = lambda name: (writes.append(name), write(name))
+    return writes
+
+def test_defaults_when_the_file_is_missing(store):
+    assert store.get("rules") == {"females_per_male": 1}
+    assert not store.path("rules").exists()
+
+def test_get_returns_a_copy(store):
+    store.get("rules")["females_per_male"] = 9
+    assert store.get("rules")["females_per_male"] == 1
+
+def test_set_is_visible_at_once_and_written_after_the_debounce(store):
+    writes = counting(store)
+    for n in range(2, 6):
+        store.set("rules", {"females_per_male": n})
+    assert store.get("rules") == {"females_per_male": 5}
+    assert not store.path("rules").exists()
+    time.sleep(0.5)
+    assert writes == ["rules"]
+    assert json.loads(store.path("rules").read_text(encoding="utf-8")) == {"females_per_male": 5}
+
+def test_flush_writes_pending_changes(store):
+    store.set("groups", {"G": [1]}, delay=60)
+    store.flush()
+    assert json.loads(store.path("groups").read_text(encoding="utf-8")) == {"G": [1]}
+
+def test_edits_on_disk_are_reloaded_and_announced(store):
+    store.get("rules")
+    seen = []
+    store.subscribe(lambda name, data: seen.append((name, data, threading.current_thread())))
+    path = store.path("rules")
+    path.write_text(json.dumps({"females_per_male": 3}), encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert store.get("rules") == {"females_per_male": 3}
+    assert seen == [("rules", {"females_per_male": 3}, threading.current_thread())]
+    assert store.get("rules") == {"females_per_male": 3} and len(seen) == 1   # unchanged: no second notice
+
+def test_subscribers_get_copies_and_a_failing_one_does_not_stop_the_rest(store):
+    got = []
+    store.subscribe(lambda name, data: 1 / 0)
+    cb = store.subscribe(lambda name, data: (got.append(data), data.clear()))
+    store.set("rules", {"females_per_male": 2}, delay=60)
+    assert got == [{}] and store.get("rules") == {"females_per_male": 2}
+    store.unsubscribe(cb)
+    store.set("rules", {"females_per_male": 4}, delay=60)
+    assert len(got) == 1
+
+def test_reads_never_write(tmp_path):
+    s = ConfigStore(tmp_path, DEFAULTS, resolvers={"paths": lambda d: {**d, "gv": "filled"}})
+    assert s.get("paths") == {"gv": "filled"}
+    s.flush()
+    assert not s.path("paths").exists()
@@ -0,0 +1,94 @@
+import pytest
+
+from sucrox import bench, engine
+
+DAY = bench.GOLDEN_DAY
+
+def sample(tmp_path, **rules):
+    return bench.fresh_copy(bench.GOLDEN, tmp_path / "base", rules)
+
+def lines(path):
+    return path.read_text(encoding="utf-8").splitlines()
+
+def recorded():
+    return lines(bench.GOLDEN / f"Possible_crossings_{DAY}.csv")
+
+def match(base):
+    engine.generate_combos(DAY, base)
+    table, attached = engine.match_crossings(DAY, base)
+    return lines(engine.julian_csv("possible_crossings", DAY, base)), attached
+
+# -------------------- Incremental / speculative match --------------------
+def test_incremental_match_equals_a_full_one(tmp_path):
+    base = sample(tmp_path, incremental_match=True)
+    survey = engine.julian_csv("tassel_survey_data", DAY, base)
+    full = survey.read_text(encoding="utf-8")
+    survey.write_text("".join(full.splitlines(True)[:4]), encoding="utf-8")   # no L05 / LCP86 / HO09-9402 yet
+    out, attached = match(base)
+    assert len(out) == 3 and "incremental" not in attached
+    survey.write_text(full, encoding="utf-8")
+    out, attached = match(base)
+    assert out == recorded()
+    assert attached["incremental"]["added"] == 6 and attached["incremental"]["removed"] == 0
+
+def test_incremental_match_is_off_by_rule(tmp_path):
+    base = sample(tmp_path, incremental_match=False)
+    match(base)
+    survey = engine.julian_csv("tassel_survey_data", DAY, base)
+    survey.write_text(survey.read_text(encoding="utf-8") + "L07-057,L07-0057,4,C,5,1,7,female\n", encoding="utf-8")
+    out, attached = match(base)
+    assert out == recorded() and "incremental" not in attached
+
+def test_speculation_is_picked_up_by_the_match(tmp_path):
+    base = sample(tmp_path, speculative_match=True, incremental_match=True)
+    assert engine.speculate_match(DAY, base) is not None
+    out, attached = match(base)
+    assert out == recorded() and attached.get("speculative")
+
+def test_a_match_cancels_an_older_speculation(tmp_path):
+    base = sample(tmp_path, speculative_match=True)
+    def match_starts(label, fraction):
+        with engine._recent_lock:
+            engine._match_epoch += 1      # what match_crossings does when it starts
+    with pytest.raises(engine.Cancelled):
+        engine.speculate_match(DAY, base, match_starts)
+    out, attached = match(base)
+    assert out == recorded() and not attached.get("speculative")
+
+def test_no_speculation_without_a_survey_or_when_off(tmp_path):
+    base = sample(tmp_path, speculative_match=False)
+    assert engine.speculate_match(DAY, base) is None
+    engine.julian_csv("tassel_survey_data", DAY, base).unlink()
+    engine.save_rules({**engine.get_rules(base), "speculative_match": True}, base)
+    assert engine.speculate_match(DAY, base) is None
+
+# -------------------- Capacities --------------------
+COUNTS = {"F1": {"female": 2, "male": 0}, "M1": {"female": 0, "male": 1}, "B1": {"female": 1, "male": 2}}
+
+def test_ledger_applies_the_rules_and_allocated_crosses():
+    ledger = engine.CapacityLedger(COUNTS, (2, 3), allocated=[("F1", "M1")])
+    assert ledger.capacities() == {"F1": {"male_cap": 0, "female_cap": 5},
+                                   "M1": {"male_cap": 1, "female_cap": 0},
+                                   "B1": {"male_cap": 4, "female_cap": 3}}
+
+def test_ledger_add_remove_and_clamp():
+    ledger = engine.CapacityLedger(COUNTS, (1, 1))
+    assert ledger.add("F1", "M1") == [("F1", "female_cap"), ("M1", "male_cap")]
+    assert ledger.add("F1", "unknown") == [("F1", "female_cap")]
+    assert ledger.add("F1", "M1") and ledger.remaining("F1", "female_cap") == 0
+    assert ledger.remaining("M1", "male_cap") == 0             # 1 - 2, clamped
+    ledger.remove("F1", "M1")
+    assert ledger.remaining("M1", "male_cap") == 0 and ledger.remaining("F1", "female_cap") == 0
+    ledger.remove("F1", "unknown")
+    assert ledger.remaining("M1", "male_cap") == 0 and ledger.remaining("F1", "female_cap") == 1
+    assert ledger.remaining("unknown", "male_cap") == 0
+
+def test_ledger_for_day_reads_tassles_rules_and_allocated(tmp_path):
+    base = sample(tmp_path, females_per_male=2)
+    engine.generate_combos(DAY, base)
+    before = engine.CapacityLedger.for_day(DAY, base).capacities()
+    assert before["Ho18-0878"]["male_cap"] == 4 and before["L07-0057"]["female_cap"] == 2
+    engine.append_allocated([("L07-0057", "Ho18-0878")], DAY, base)
+    after = engine.compute_capacities(DAY, base, pending=[("L07-0057", "Ho09-9402")])
+    assert after["L07-0057"]["female_cap"] == 0
+    assert after["Ho18-0878"]["male_cap"] == 3 and after["Ho09-9402"]["male_cap"] == 1
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from sucrox import bench, engine
+
+DAY = bench.GOLDEN_DAY
+
+@pytest.fixture
+def day(tmp_path):
+    """The golden sample day combined in a scratch folder: (base, combos, paths)."""
+    base = bench.fresh_copy(bench.GOLDEN, tmp_path / "base", {})
+    engine.generate_combos(DAY, base)
+    combos = pd.read_csv(engine.julian_csv("combinations", DAY, base), dtype=str, keep_default_na=False)
+    return base, combos, engine.get_paths(base)
+
+def kinship(base):
+    recorded = pd.read_csv(bench.GOLDEN / f"Possible_crossings_{DAY}.csv")
+    return dict(zip(zip(recorded["FEMALE_STD"], recorded["MALE_STD"]), recorded["KINSHIP"]))
+
+def test_nothing_set_keeps_every_pair(day):
+    base, combos, paths = day
+    out, dropped, failed = engine._exclude(combos, {}, paths, DAY, base)
+    assert out is combos and dropped == {} and failed == {}
+
+@pytest.mark.parametrize("amat_cache", [False, True])
+@pytest.mark.parametrize("ceiling", [0.0, 0.2, 0.3, 1.0])
+def test_kinship_ceiling(day, ceiling, amat_cache):
+    base, combos, paths = day
+    rules = {"exclusions": {"max_kinship": ceiling}, "amat_cache": amat_cache}
+    out, dropped, failed = engine._exclude(combos, rules, paths, DAY, base)
+    kin = kinship(base)
+    keep = [k for k in zip(combos["FEMALE_STD"], combos["MALE_STD"]) if kin[k] <= ceiling]
+    assert list(zip(out["FEMALE_STD"], out["MALE_STD"])) == keep
+    assert dropped == ({"kinship": len(combos) - len(keep)} if len(keep) < len(combos) else {})
+    assert failed == {}
+
+def test_ceiling_that_is_not_a_number_is_reported(day):
+    base, combos, paths = day
+    out, dropped, failed = engine._exclude(combos, {"exclusions": {"max_kinship": "high"}}, paths, DAY, base)
+    assert len(out) == len(combos) and dropped == {}
+    assert "kinship" in failed
+
+def test_failing_test_drops_nothing_and_is_reported(day):
+    base, combos, paths = day
+    paths = {**paths, "crossingdataset": str(base / "missing.csv")}
+    out, dropped, failed = engine._exclude(combos, {"exclusions": {"made_crosses": True}}, paths, DAY, base)
+    assert len(out) == len(combos) and dropped == {}
+    assert list(failed) == ["already made"]
+
+def test_same_variety(day):
+    base, combos, paths = day
+    selfs = pd.DataFrame([dict(zip(engine.COMBO_COLUMNS, ["L07-057", "L07-057", "L07-0057", "l07-0057",
+                                                          "2007057", "2007057"]))])
+    combos = pd.concat([combos, selfs], ignore_index=True)
+    out, dropped, failed = engine._exclude(combos, {"exclusions": {"same_variety": True}}, paths, DAY, base)
+    assert dropped == {"same variety": 1} and failed == {}
+    assert len(out) == len(combos) - 1
@@ -0,0 +1,14 @@
+import shutil
+
+from sucrox import bench
+
+def test_default_match_reproduces_the_original_output(tmp_path):
+    sha, same = bench.golden(tmp_path / "run")
+    assert same
+
+def test_a_different_output_is_caught(tmp_path):
+    recorded = shutil.copytree(bench.GOLDEN, tmp_path / "golden")
+    out = recorded / f"Possible_crossings_{bench.GOLDEN_DAY}.csv"
+    out.write_text(out.read_text(encoding="utf-8").replace("0.302562", "0.302561"), encoding="utf-8")
+    sha, same = bench.golden(tmp_path / "run", recorded)
+    assert not same
@@ -0,0 +1,51 @@
+import numpy as np
+
+from sucrox.highlight import RuleSet, TypedColumn
+
+DATA = {
+    "KINSHIP": ["0.10", "0.25", "", "0.05", "1,200"],
+    "FEMALE_STD": ["HoCP04-0847", "L07-0057", "HoCP96-0540", "Ho09-0840", "L05-0457"],
+    "MALE_FIBER": ["12", "11.5", "14", "n/a", "9"],
+}
+
+def colors(rules):
+    cols = {k: TypedColumn(v) for k, v in DATA.items()}
+    return RuleSet(rules).colors(cols.get, len(DATA["KINSHIP"])).tolist()
+
+def rule(logic, clauses, color="#A"):
+    return {"name": "r", "color": color, "logic": logic, "clauses": clauses}
+
+def test_nested_and_inside_or():
+    r = rule("OR", [{"column": "KINSHIP", "op": "<", "value": "0.08"},
+                    {"logic": "AND", "clauses": [{"column": "MALE_FIBER", "op": ">=", "value": "12"},
+                                                 {"column": "FEMALE_STD", "op": "contains", "value": "hocp"}]}])
+    assert colors([r]) == ["#A", None, "#A", "#A", None]
+
+def test_nested_or_inside_and():
+    r = rule("AND", [{"column": "KINSHIP", "op": "<", "value": "0.3"},
+                     {"logic": "OR", "clauses": [{"column": "FEMALE_STD", "op": "contains", "value": "L0"},
+                                                 {"column": "MALE_FIBER", "op": "==", "value": "n/a"}]}])
+    assert colors([r]) == [None, "#A", None, "#A", None]
+
+def test_numbers_compare_numerically_and_text_only_for_equality():
+    assert colors([rule("AND", [{"column": "KINSHIP", "op": ">", "value": "1000"}])]) == [None] * 4 + ["#A"]
+    assert colors([rule("AND", [{"column": "MALE_FIBER", "op": "<", "value": "x"}])]) == [None] * 5
+    assert colors([rule("AND", [{"column": "MALE_FIBER", "op": "!=", "value": "12"}])]) == [None] + ["#A"] * 4
+
+def test_missing_columns_and_empty_groups_never_match():
+    assert colors([rule("OR", [{"column": "NOPE", "op": "==", "value": ""}])]) == [None] * 5
+    assert colors([rule("AND", [{"column": "KINSHIP", "op": "<", "value": "1"}, {"logic": "OR", "clauses": []}])]) == [None] * 5
+    assert colors([rule("AND", [])]) == [None] * 5
+    assert not RuleSet([]) and RuleSet(None).colors({}.get, 2).tolist() == [None, None]
+
+def test_last_matching_rule_wins():
+    low = rule("AND", [{"column": "KINSHIP", "op": "<", "value": "0.2"}], "#LOW")
+    hocp = rule("AND", [{"column": "FEMALE_STD", "op": "contains", "value": "HOCP"}], "#HOCP")
+    assert colors([low, hocp]) == ["#HOCP", None, "#HOCP", "#LOW", None]
+    assert colors([hocp, low]) == ["#LOW", None, "#HOCP", "#LOW", None]
+
+def test_key_ignores_dict_order():
+    a = [{"color": "#A", "logic": "AND", "clauses": []}]
+    b = [{"clauses": [], "logic": "AND", "color": "#A"}]
+    assert RuleSet(a).key == RuleSet(b).key != RuleSet([]).key
+    assert isinstance(TypedColumn(["1", "x"]).num[0], np.ndarray)
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from sucrox.history import HistoryStore
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+@pytest.fixture
+def season(tmp_path):
+    write(tmp_path / "Tassles" / "Tassles_246.csv",
+          "STDVARIETY,MALE TASSLES,FEMALE TASSLES\nHo18-0878,2,0\nL07-0057,0,3\n")
+    write(tmp_path / "Crosses for the day" / "allocated_246.csv", "FEMALE,MALE\nL07-0057,Ho18-0878\n")
+    write(tmp_path / "Crosses for the day" / "Possible_crossings_246.csv", "not,indexed\n")
+    return tmp_path, HistoryStore(tmp_path / "history.sqlite", tmp_path)
+
+def test_sync_ingests_dated_files_once(season):
+    base, store = season
+    assert store.sync() == 2
+    assert store.sync() == 0
+    assert store.days() == [246]
+    assert store.pair("L07-0057", "Ho18-0878") == [246]
+    use = store.usage("Ho18-0878")
+    assert use["male_crosses"] == 1 and use["male_tassels"] == 2 and use["days_surveyed"] == [246]
+
+def test_sync_reingests_changed_files(season):
+    base, store = season
+    store.sync()
+    alloc = base / "Crosses for the day" / "allocated_246.csv"
+    write(alloc, "FEMALE,MALE\nL07-0057,Ho18-0878\nL07-0057,Ho18-0878\n")
+    os.utime(alloc, ns=(alloc.stat().st_atime_ns, alloc.stat().st_mtime_ns + 10**9))
+    assert store.sync() == 1
+    assert store.pair("L07-0057", "Ho18-0878") == [246, 246]
+
+def test_sync_drops_days_whose_file_is_gone(season):
+    base, store = season
+    store.sync()
+    write(base / "Crosses for the day" / "allocated_247.csv", "FEMALE,MALE\nL07-0057,Ho09-9402\n")
+    assert store.sync() == 1 and store.days() == [246, 247]
+    (base / "Crosses for the day" / "allocated_246.csv").unlink()
+    assert store.sync() == 1
+    assert store.days() == [247]
+    assert store.usage("Ho18-0878")["male_crosses"] == 0
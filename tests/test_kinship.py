@@ -0,0 +1,86 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from sucrox import bench
+from sucrox.kinship import KinshipIndex, PackedKinship, RowOffsetIndex, load_kinship, load_packed
+
+@pytest.fixture
+def amat(tmp_path):
+    ids = [f"L{y:02d}-{k:04d}" for y, k in zip(range(10, 310), range(300))]
+    bench._write_amat(tmp_path / "AMAT.csv", ids)
+    return tmp_path / "AMAT.csv", ids
+
+@pytest.mark.parametrize("packed", [True, False])
+def test_two_threads_on_a_cold_cache(tmp_path, amat, packed):
+    path, ids = amat
+    pairs = (ids[:50], ids[-50:])
+    for round_ in range(5):
+        cache = tmp_path / f"cache{round_}"
+        start, out, errors = threading.Barrier(2), [], []
+        def load():
+            start.wait()
+            try:
+                out.append(load_kinship(path, cache, packed, ids[:50] + ids[-50:]).gather(*pairs))
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=load) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert np.array_equal(np.asarray(out[0], dtype=float), np.asarray(out[1], dtype=float))
+        assert not [p for p in cache.iterdir() if ".tmp" in p.name]
+
+def csv_values(path, female, male):
+    return np.asarray(KinshipIndex.from_csv(path).gather(female, male), dtype=float)
+
+def test_packed_cache_matches_the_csv_and_is_reused(tmp_path, amat):
+    path, ids = amat
+    female, male = ids[0:280:7], ids[3:283:7]
+    packed = load_packed(path, tmp_path / "cache")
+    assert isinstance(packed, PackedKinship)
+    assert np.array_equal(packed.gather(female, male), csv_values(path, female, male))
+    assert np.array_equal(packed.gather(male, female), packed.gather(female, male))   # symmetric
+    assert np.isnan(packed.gather(["nope"], [ids[0]])).all()
+    tri = next((tmp_path / "cache").glob("*.tri.npy"))
+    built = tri.stat().st_mtime_ns
+    os.utime(path, ns=(0, 10**9))          # touched, same content: not rebuilt
+    load_packed(path, tmp_path / "cache")
+    assert tri.stat().st_mtime_ns == built
+
+def test_packed_cache_is_rebuilt_when_the_amat_changes(tmp_path, amat):
+    path, ids = amat
+    load_packed(path, tmp_path / "cache")
+    text = path.read_text(encoding="utf-8").replace(",1.0000", ",0.9000")
+    path.write_text(text, encoding="utf-8")
+    assert load_packed(path, tmp_path / "cache").gather([ids[5]], [ids[5]])[0] == 0.9
+
+def test_asymmetric_amat_falls_back_to_the_csv_text(tmp_path, amat):
+    path, ids = amat
+    lines = path.read_text(encoding="utf-8").splitlines(True)
+    cells = lines[2].split(",")
+    cells[1] = "0.4321"                    # (ids[1], ids[0]) no longer mirrors (ids[0], ids[1])
+    lines[2] = ",".join(cells)
+    path.write_text("".join(lines), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_packed(path, tmp_path / "cache")
+    index = load_kinship(path, tmp_path / "cache", True, ids[:3])
+    assert isinstance(index, KinshipIndex)
+    assert index.gather([ids[1]], [ids[0]]).tolist() == ["0.4321"]
+
+def test_row_offset_index_reads_only_the_wanted_rows_as_text(tmp_path, amat):
+    path, ids = amat
+    want = [ids[10], ids[200], ids[42]]
+    subset = RowOffsetIndex.load(path, tmp_path / "cache").subset(want + ["nope"])
+    assert sorted(subset.row_ids) == sorted(want)
+    full = KinshipIndex.from_csv(path)
+    f, m = [want[0], want[1], want[2], "nope"], [want[2], want[0], want[1], want[0]]
+    assert subset.gather(f, m).tolist() == full.gather(f, m).tolist()
+    assert subset.gather(f, m).tolist()[-1] == ""
+    assert next((tmp_path / "cache").glob("*.rows.json"))
+    # no cache dir (or no wanted ids): the whole CSV, as text
+    assert isinstance(load_kinship(path, None, False, want), KinshipIndex)
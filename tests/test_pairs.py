@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sucrox.pairs import PairTable, parquet_available
+
+def table():
+    females = pd.DataFrame({"FEMALE_STD": ["L07-0057", "Ho09-0840"], "FEMALE_FIBER": [12.5, np.nan]})
+    males = pd.DataFrame({"MALE_STD": ["Ho18-0878", "Ho09-9402", "L05-0457"], "MALE_FIBER": [11.0, 12.25, 13.0]})
+    pairs = pd.DataFrame({"FEMALE_IDX": [0, 0, 1, 1], "MALE_IDX": [2, 0, 1, 0], "KINSHIP": [0.1, 0.25, np.nan, 0.3]})
+    layout = [("FEMALE_STD", "F"), ("MALE_STD", "M"), ("FEMALE_FIBER", "F"), ("MALE_FIBER", "M"), ("KINSHIP", "P")]
+    return PairTable(females, males, pairs, layout)
+
+def wide_text(t, path):
+    t.to_wide_csv(path)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def test_expand_gathers_through_the_index():
+    wide = table().expand()
+    assert wide["MALE_STD"].tolist() == ["L05-0457", "Ho18-0878", "Ho09-9402", "Ho18-0878"]
+    assert wide["FEMALE_STD"].tolist() == ["L07-0057", "L07-0057", "Ho09-0840", "Ho09-0840"]
+    assert list(wide.columns) == table().columns
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_save_load_round_trip(tmp_path, fmt):
+    if fmt == "parquet" and not parquet_available():
+        pytest.skip("pyarrow is not installed")
+    t = table()
+    assert t.save(tmp_path / "pairs", fmt, key="abc") == fmt
+    back = PairTable.load(tmp_path / "pairs")
+    assert back.layout == t.layout and len(back) == len(t)
+    pd.testing.assert_frame_equal(wide_text(back, tmp_path / "back.csv"), wide_text(t, tmp_path / "wide.csv"))
+    assert PairTable.read_meta(tmp_path / "pairs")["key"] == "abc"
+
+def test_load_reads_only_the_wanted_columns(tmp_path):
+    table().save(tmp_path / "pairs")
+    back = PairTable.load(tmp_path / "pairs", columns=["MALE_FIBER", "KINSHIP"])
+    assert back.columns == ["MALE_FIBER", "KINSHIP"]
+    assert list(back.tables["F"].columns) == []
+    assert back.expand()["MALE_FIBER"].tolist() == ["13.0", "11.0", "12.25", "11.0"]
+
+def test_parquet_keeps_types_without_text(tmp_path):
+    if not parquet_available():
+        pytest.skip("pyarrow is not installed")
+    table().save(tmp_path / "pairs", "parquet")
+    back = PairTable.load(tmp_path / "pairs", text=False)
+    assert back.expand()["KINSHIP"].dtype == float
+
+def test_incomplete_folder_is_not_read(tmp_path):
+    table().save(tmp_path / "pairs")
+    (tmp_path / "pairs" / "layout.json").unlink()
+    assert PairTable.read_meta(tmp_path / "pairs") is None
+    with pytest.raises(FileNotFoundError):
+        PairTable.load(tmp_path / "pairs")
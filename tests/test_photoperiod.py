@@ -0,0 +1,48 @@
+import json
+import shutil
+
+import pytest
+
+from sucrox import bench, engine
+from sucrox.photoperiod import PhotoperiodIndex, NO_FILE, NO_MATCH
+
+@pytest.fixture
+def base(tmp_path):
+    shutil.copytree(bench.GOLDEN / "Photoperiod_Pos", tmp_path / "Photoperiod_Pos")
+    (tmp_path / engine.ALIAS_FILENAME).write_text(json.dumps({"Houma 840": "Ho09-0840"}), encoding="utf-8")
+    return tmp_path
+
+def pp(base):
+    return base / "Photoperiod_Pos" / "Photoperiod_Pos_2025.csv"
+
+def test_aliases_find_cans_through_the_registry(base):
+    index = PhotoperiodIndex(pp(base), registry=lambda path: engine.variety_registry(path, base))
+    cans = index.locations("Ho09-0840")
+    assert cans and index.locations("Houma 840") == cans
+    assert index.locations("ho09-840") == cans
+
+def test_without_a_registry_only_spelling_variants_match(base):
+    index = PhotoperiodIndex(pp(base))
+    assert index.locations("ho09-840") == index.locations("Ho09-0840") != []
+    assert index.locations("Houma 840") == []
+
+def test_lookup_by_location(base):
+    index = PhotoperiodIndex(pp(base))
+    bay, cart, can = index.locations("L07-0057")[0]
+    assert index.lookup(bay, cart, can) == ("L07-057", "L07-0057")
+    assert index.lookup("99", "Z", "99") == NO_MATCH
+    assert PhotoperiodIndex(base / "missing.csv").lookup(bay, cart, can) == NO_FILE
+
+def test_search_by_prefix(base):
+    index = PhotoperiodIndex(pp(base))
+    assert index.search("l0") == ["L05-0457", "L05-457", "L07-0057", "L07-057"]
+    assert index.search("L0", limit=1) == ["L05-0457"]
+    assert index.search("  ") == []
+
+def test_file_changes_are_picked_up(base):
+    index = PhotoperiodIndex(pp(base), recheck=0.0)
+    assert index.locations("L99-0001") == []
+    with open(pp(base), "a", encoding="utf-8", newline="") as f:
+        f.write("L,2099-1,20991,L99-001,L99-0001,9,Z,9,1,,\n")
+    assert index.locations("l99-1") == [("9", "Z", "9")]
+    assert index.lookup("9", "Z", "9") == ("L99-001", "L99-0001")
@@ -0,0 +1,62 @@
+import os
+import threading
+
+from sucrox.stagecache import StageCache, MISSING
+
+def test_concurrent_puts_never_fail(tmp_path):
+    cache = StageCache(tmp_path, keep=1)
+    errors = []
+    def put(n):
+        try:
+            for k in range(40):
+                cache.put("gv", f"{n}-{k}", k)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=put, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(list((tmp_path / "stages").glob("gv-*.pkl"))) >= 1
+
+def test_hit_and_miss_are_reported(tmp_path):
+    cache = StageCache(tmp_path)
+    calls = []
+    compute = lambda: calls.append(1) or {"rows": 3}
+    assert cache.cached("gv", "k1", compute) == {"rows": 3}
+    assert cache.report == {"gv": "miss"}
+    assert StageCache(tmp_path).cached("gv", "k1", compute) == {"rows": 3}
+    assert len(calls) == 1
+    fresh = StageCache(tmp_path)
+    assert fresh.get("gv", "k2") is MISSING and fresh.report == {"gv": "miss"}
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = StageCache(tmp_path, enabled=False)
+    cache.put("gv", "k", 1)
+    assert cache.get("gv", "k") is MISSING
+    assert not (tmp_path / "stages").exists()
+
+def test_prune_keeps_the_most_recently_used(tmp_path):
+    cache = StageCache(tmp_path, keep=2)
+    for i, k in enumerate(["a", "b"]):
+        cache.put("cd", k, k)
+        os.utime(cache._path("cd", k), ns=(i * 10**9, i * 10**9))
+    assert cache.get("cd", "a") == "a"    # used: now the newest
+    cache.put("cd", "c", "c")
+    cache.put("gv", "x", "x")             # other stages are not counted
+    assert sorted(p.name for p in (tmp_path / "stages").glob("*.pkl")) == \
+        sorted([cache._path("cd", "a").name, cache._path("cd", "c").name, cache._path("gv", "x").name])
+
+def test_keys_follow_content_not_timestamps(tmp_path):
+    src = tmp_path / "GV.csv"
+    src.write_text("VARIETY,FIBER\n1,2\n", encoding="utf-8")
+    cache = StageCache(tmp_path / "cache")
+    first = cache.file_key(src)
+    os.utime(src, ns=(0, 10**9))
+    assert cache.file_key(src) == first
+    assert StageCache(tmp_path / "cache").file_key(src) == first   # fingerprints are persisted
+    src.write_text("VARIETY,FIBER\n1,3\n", encoding="utf-8")
+    assert cache.file_key(src) != first
+    assert cache.file_key(tmp_path / "missing.csv") == "missing"
+    assert cache.key("gv", first) != cache.key("cd", first)
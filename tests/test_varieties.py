@@ -0,0 +1,18 @@
+import pytest
+
+from sucrox.varieties import variety_key
+
+@pytest.mark.parametrize("spelling", ["HoCP04-0847", "HOCP04-847", "hocp04-0847", " HoCP 04-847 ", "HoCP04-00847"])
+def test_spellings_share_one_key(spelling):
+    assert variety_key(spelling) == "HOCP04-0847"
+
+@pytest.mark.parametrize("name, key", [
+    ("L23-153", "L23-0153"),
+    ("ho09-9402", "HO09-9402"),
+    ("2009840", "2009840"),          # NUMVARs are not series ids
+    ("LCP86-454", "LCP86-0454"),
+    ("not a variety", "NOTAVARIETY"),
+    (None, ""),
+])
+def test_variety_key(name, key):
+    assert variety_key(name) == key